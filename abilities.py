@@ -1,6 +1,8 @@
 from ursina import *
 from ursina import curve
 
+from sounds import sound_manager
+
 class Ability(Entity):
     def __init__(self, player, ability_enabled = True):
         super().__init__(
@@ -27,9 +29,6 @@ class Rope(Ability):
         self.max_rope_length = False
         self.below_rope = False
 
-        # Audio
-        self.rope_sound = Audio("rope.wav", False)
-
     def update(self):
         if self.ability_enabled:
             if self.can_rope and self.player.ability_bar.value > 0:
@@ -77,8 +76,7 @@ class Rope(Ability):
                     self.rope_entity = rope_ray.entity
                     self.rope_pivot.position = rope_point
                     self.rope_position = self.position
-                    self.rope_sound.pitch = random.uniform(0.7, 1)
-                    self.rope_sound.play()
+                    sound_manager.play("rope", pitch = random.uniform(0.7, 1))
             elif key == "right mouse up":
                 self.rope_pivot.position = self.position
                 if self.can_rope and self.player.ability_bar.value > 0:
@@ -95,10 +93,6 @@ class DashAbility(Ability):
 
         self.dashing = False
 
-        # Audio
-        self.dash_sound = Audio("dash.wav", False)
-        self.dash_sound.volume = 0.8
-
     def update(self):
         if self.ability_enabled:
             if self.dashing and not held_keys["right mouse"]:
@@ -117,7 +111,7 @@ class DashAbility(Ability):
 
                 self.player.shake_camera(0.3, 100)
 
-                self.dash_sound.play()
+                sound_manager.play("dash", volume = 0.8)
 
                 self.player.movementX = (self.player.forward[0] * self.player.velocity_z + 
                     self.player.left[0] * self.player.velocity_x + 
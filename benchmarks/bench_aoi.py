@@ -0,0 +1,136 @@
+"""
+Outbound server traffic in a scripted 8-player match, with and without
+area-of-interest filtering of projectile/particle relays.
+
+Two squads of four circle around points 400 units apart and trade fire:
+rifle tracers every 0.2 s, two hit particles on half the shots (landing on a
+random opponent) and a 10-particle rocket impact every 5 s per player. The
+script is seeded, so both runs replay the same match.
+
+    python benchmarks/bench_aoi.py --duration 10
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import server  # noqa: E402
+from network import Network  # noqa: E402
+
+SQUAD_CENTERS = ((-200, 10, 0), (200, 10, 0))
+FRAME_RATE = 60
+
+
+class ScriptedPlayer:
+    def __init__(self, index: int, net: Network):
+        self.index = index
+        self.net = net
+        self.squad = index % 2
+        self.phase = index * math.pi / 2
+        self.world_x = self.world_y = self.world_z = 0.0
+        self.rotation_y = 0.0
+        self.health = 10
+        self.current_gun = 0
+        self.next_shot = 0.0
+        self.next_rocket = 1.0 + index * 0.5
+
+    def move(self, t: float):
+        cx, cy, cz = SQUAD_CENTERS[self.squad]
+        angle = self.phase + t * 0.5
+        self.world_x = cx + math.cos(angle) * 30
+        self.world_y = cy
+        self.world_z = cz + math.sin(angle) * 30
+        self.rotation_y = math.degrees(angle)
+
+    @property
+    def position(self):
+        return (self.world_x, self.world_y, self.world_z)
+
+
+def play(aoi_radius: float | None, duration: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    srv = server.EventLoopServer("127.0.0.1", 0, 8, aoi_radius=aoi_radius)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+    players = []
+    for i in range(8):
+        net = Network("127.0.0.1", srv.port, f"bot{i}")
+        net.connect()
+        net.settimeout(0.0005)
+        players.append(ScriptedPlayer(i, net))
+
+    baseline = srv.stats.as_dict()
+    culled_before = srv.aoi_culled
+    frame = 1 / FRAME_RATE
+    start = time.perf_counter()
+    for step in range(int(duration * FRAME_RATE)):
+        t = step * frame
+        for p in players:
+            p.move(t)
+            p.net.send_player(p)
+            if t >= p.next_shot:
+                p.next_shot = t + 0.2
+                p.net.send_projectile(p.position, (0, p.rotation_y, 0), kind="bullet", direction=(1, 0, 0))
+                if rng.random() < 0.5:
+                    target = rng.choice([o for o in players if o.squad != p.squad])
+                    for _ in range(2):
+                        p.net.send_particles(target.position, (rng.random(), rng.random(), rng.random()), 10)
+            if t >= p.next_rocket:
+                p.next_rocket = t + 5
+                impact = rng.choice([o for o in players if o.squad != p.squad]).position
+                p.net.send_projectile(p.position, (0, p.rotation_y, 0), kind="rocket", direction=(1, 0, 0))
+                for _ in range(10):
+                    p.net.send_particles(impact, (rng.random(), rng.random(), rng.random()), 30, texture="jetpack")
+        for p in players:
+            while p.net.receive_info():
+                pass
+        sleep_for = start + (step + 1) * frame - time.perf_counter()
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+
+    time.sleep(0.2)
+    for p in players:
+        while p.net.receive_info():
+            pass
+    stats = srv.stats.as_dict()
+    culled = srv.aoi_culled - culled_before
+    for p in players:
+        p.net.close()
+    srv.stop()
+
+    return {
+        "aoi_radius": aoi_radius,
+        "bytes_sent": stats["bytes_sent"] - baseline["bytes_sent"],
+        "messages_sent": stats["messages_sent"] - baseline["messages_sent"],
+        "culled": culled,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--radius", type=float, default=server.AOI_RADIUS)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    everyone = play(None, args.duration, args.seed)
+    nearby = play(args.radius, args.duration, args.seed)
+
+    print(f"{'relay':<16} {'messages':>9} {'KB':>9} {'culled':>7}")
+    for label, r in (("everyone", everyone), (f"aoi r={args.radius:g}", nearby)):
+        print(f"{label:<16} {r['messages_sent']:>9} {r['bytes_sent'] / 1024:>9.1f} {r['culled']:>7}")
+    print(
+        f"outbound messages -{(1 - nearby['messages_sent'] / everyone['messages_sent']) * 100:.0f}%, "
+        f"bytes -{(1 - nearby['bytes_sent'] / everyone['bytes_sent']) * 100:.0f}%"
+    )
+
+
+if __name__ == "__main__":
+    main()
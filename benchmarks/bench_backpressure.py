@@ -0,0 +1,186 @@
+"""
+Stalled-reader harness: relay latency of healthy clients with and without
+one client that connects and then never reads.
+
+Healthy clients send player updates at --rate and a burst of particle
+effects with each one, so the stalled client's backlog grows quickly. The
+server runs in a subprocess that reports its outbound queue stats; at the
+end the harness checks whether the stalled client was disconnected.
+
+    python benchmarks/bench_backpressure.py --clients 8 --duration 15
+"""
+
+import argparse
+import json
+import os
+import selectors
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import BenchClient, free_port, percentile  # noqa: E402
+from protocol import FrameReader, KIND_HELLO, decode_hello, encode_hello, encode_message  # noqa: E402
+
+# Runs the chosen core and writes its send queue stats to stderr twice a second
+LAUNCHER = """
+import json, sys, threading, time
+import server
+mode, port, max_players = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+
+def queues():
+    return [info["outbound"] for info in list(server.players.values()) if "outbound" in info]
+
+if mode == "eventloop":
+    srv = server.EventLoopServer("127.0.0.1", port, max_players)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    def stats():
+        s = srv.outbound_stats()
+        return {"max_queued_bytes": s["max_queued_bytes"], "dropped": s["dropped"]}
+else:
+    threading.Thread(target=server.run_threaded, args=("127.0.0.1", port, max_players), daemon=True).start()
+    def stats():
+        qs = queues()
+        return {"max_queued_bytes": max((q.max_queued_bytes for q in qs), default=0), "dropped": sum(q.dropped for q in qs)}
+
+while True:
+    time.sleep(0.5)
+    try:
+        print("STATS", json.dumps(stats()), file=sys.stderr, flush=True)
+    except (RuntimeError, AttributeError):
+        pass
+"""
+
+
+def start_server(mode: str, port: int, max_players: int):
+    proc = subprocess.Popen(
+        [sys.executable, "-c", LAUNCHER, mode, str(port), str(max_players)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    latest = {}
+
+    def follow():
+        for line in proc.stderr:
+            if line.startswith("STATS "):
+                # Peaks, so a queue still counts after its client is dropped
+                for key, value in json.loads(line[len("STATS "):]).items():
+                    latest[key] = max(latest.get(key, 0), value)
+
+    threading.Thread(target=follow, daemon=True).start()
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc, latest
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def stalled_client(port: int) -> socket.socket:
+    """Handshake with a tiny receive window, then never read again."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(("127.0.0.1", port))
+    sock.sendall(encode_hello({"username": "stalled", "udp": False, "state_codec": False}))
+    reader = FrameReader()
+    while True:
+        reader.feed(sock.recv(4096))
+        if any(kind == KIND_HELLO and decode_hello(body) for kind, body in reader.frames()):
+            return sock
+
+
+def disconnected(sock: socket.socket, timeout: float = 2.0) -> bool:
+    """Drain the stalled client's socket; True if the server hung up on it."""
+    sock.settimeout(timeout)
+    try:
+        while sock.recv(1 << 20):
+            pass
+        return True
+    except ConnectionResetError:
+        return True
+    except socket.timeout:
+        return False
+
+
+def run(mode: str, n_clients: int, stalled: bool, rate: float, effects: int, duration: float) -> dict:
+    port = free_port()
+    proc, stats = start_server(mode, port, n_clients + 1)
+    try:
+        stuck = stalled_client(port) if stalled else None
+        clients = []
+        for i in range(n_clients):
+            clients.append(BenchClient(port, i))
+            time.sleep(0.01)
+        time.sleep(0.5)
+
+        selector = selectors.DefaultSelector()
+        for client in clients:
+            selector.register(client.sock, selectors.EVENT_READ, client)
+            client.read([])
+
+        effect = encode_message({"object": "particle", "position": (0, 0, 0), "direction": (1, 1, 1), "spray": 10, "model": "particles", "texture": None})
+        latencies = []
+        windows = []
+        interval = 1 / rate
+        start = next_send = window_start = time.time()
+        seq = 0
+        while time.time() - start < duration:
+            now = time.time()
+            if now >= next_send:
+                for client in clients:
+                    if client.send_player(seq) and len(client.outbox) < 65536:
+                        client.outbox += effect * effects
+                seq += 1
+                next_send += interval
+            if now - window_start >= 1.0:
+                windows.append(percentile(latencies[-2000:], 99) * 1000)
+                window_start = now
+            for key, _ in selector.select(max(0.0, next_send - time.time())):
+                key.data.read(latencies)
+        hung_up = disconnected(stuck) if stuck else None
+        time.sleep(0.6)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    return {
+        "mode": mode,
+        "stalled": stalled,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "worst_second_p99_ms": max(windows, default=float("nan")),
+        "updates": len(latencies),
+        "max_queued_kb": stats.get("max_queued_bytes", 0) / 1024,
+        "dropped": stats.get("dropped", 0),
+        "stalled_disconnected": hung_up,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["threaded", "eventloop"])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=20, help="player updates per client per second")
+    parser.add_argument("--effects", type=int, default=20, help="particle messages sent with each update")
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'stalled':>7} {'updates':>8} {'p50 ms':>8} {'p99 ms':>8} {'worst 1s p99':>13} {'max queue KB':>13} {'dropped':>8} {'hung up':>8}")
+    for mode in args.modes:
+        for stalled in (False, True):
+            r = run(mode, args.clients, stalled, args.rate, args.effects, args.duration)
+            hung_up = "-" if r["stalled_disconnected"] is None else ("yes" if r["stalled_disconnected"] else "no")
+            print(
+                f"{r['mode']:<10} {'yes' if stalled else 'no':>7} {r['updates']:>8} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                f"{r['worst_second_p99_ms']:>13.2f} {r['max_queued_kb']:>13.0f} {r['dropped']:>8} {hung_up:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Frame time and garbage collector pauses during a sustained minigun burst,
+with the ``bullet_pool`` against a new bullet and trail per shot.
+
+A minigun fires every --interval seconds (its cooldown by default) for
+--duration seconds while frames are paced at --fps in real time. Reported
+per frame: the time to fire that frame's shots plus the engine step that
+moves and renders the bullets. Collector pauses are timed with
+``gc.callbacks``, per generation.
+
+``per shot`` builds every bullet and its trail mesh on firing and destroys
+them on expiry, as before the pool.
+
+    python benchmarks/bench_bullets.py --duration 30
+
+Needs Ursina.
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import percentile  # noqa: E402
+
+
+class GcTimer:
+    def __init__(self):
+        self.pauses = {0: [], 1: [], 2: []}
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.pauses[info["generation"]].append(time.perf_counter() - self._start)
+            self._start = None
+
+
+class PerShot:
+    """Bullets as they were before the pool: made on every shot and destroyed when done."""
+
+    def fire(self, gun, pos, **kwargs):
+        from guns import Bullet
+
+        bullet = Bullet(self)
+        bullet.fire(gun, pos, **kwargs)
+        return bullet
+
+    def release(self, bullet):
+        from ursina import destroy
+
+        destroy(bullet)
+
+
+def make_gun():
+    from ursina import Entity, camera
+
+    # Just what a firing Bullet reads from its gun and player
+    player = Entity(position=(0, 0, -5))
+    player.map = Entity()
+    player.multiplayer = None
+    gun = Entity(parent=camera, position=(0.5, -0.75, 1.7))
+    gun.tip = Entity(parent=gun, position=(-0.5, 1.3, 1.5))
+    gun.player = player
+    gun.gun_type = "minigun"
+    gun.damage = 1
+    return gun
+
+
+def run(app, bullets, gun, args) -> dict:
+    from ursina import scene
+
+    timer = GcTimer()
+    frame_times = []
+    frames = int(args.duration * args.fps)
+    shots = 0
+    next_shot = 0.0
+    gc.collect()
+    gc.callbacks.append(timer)
+    next_frame = time.perf_counter()
+    try:
+        for frame in range(frames):
+            t = frame / args.fps
+            begin = time.perf_counter()
+            while next_shot <= t:
+                bullets.fire(gun, gun.tip.world_position)
+                next_shot += args.interval
+                shots += 1
+            app.step()
+            frame_times.append(time.perf_counter() - begin)
+            next_frame += 1 / args.fps
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        gc.callbacks.remove(timer)
+    return {"frame_times": frame_times, "gc": timer.pauses, "shots": shots, "entities": len(scene.entities)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between shots")
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--window", choices=["none", "offscreen", "onscreen"], default="none")
+    args = parser.parse_args()
+
+    from ursina import Ursina
+
+    app = Ursina(window_type=args.window)
+    from guns import bullet_pool
+
+    gun = make_gun()
+    bullet_pool.fill()
+
+    print(f"{'bullets':<9} {'shots':>6} {'mean ms':>8} {'p50':>8} {'p99':>8} {'max':>8}  "
+          f"{'gc gen0/1/2':>12} {'gc total ms':>12} {'gc max ms':>10}  entities")
+    for name, bullets in (("per shot", PerShot()), ("pooled", bullet_pool)):
+        r = run(app, bullets, gun, args)
+        ms = [v * 1000 for v in r["frame_times"]]
+        pauses = [p * 1000 for gen in r["gc"].values() for p in gen]
+        counts = "/".join(str(len(r["gc"][gen])) for gen in (0, 1, 2))
+        print(f"{name:<9} {r['shots']:>6} {statistics.fmean(ms):>8.3f} {percentile(ms, 50):>8.3f} {percentile(ms, 99):>8.3f} "
+              f"{max(ms):>8.3f}  {counts:>12} {sum(pauses):>12.2f} {max(pauses, default=0):>10.2f}  {r['entities']}")
+        # Let the last bullets expire before the next pass
+        deadline = time.perf_counter() + 2.5
+        while time.perf_counter() < deadline:
+            app.step()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Client frame cost of networking: inline socket reads versus the I/O thread.
+
+A measured client does what ``MultiplayerManager.update`` does each frame:
+send the local player, then drain and apply ``receive_info``. Inline, that
+means socket reads with the game's 1 ms timeout and decoding on the render
+thread. With ``start_io_thread``, the frame only drains a queue.
+``loadgen.py`` bots in a subprocess supply the remote players, effects and
+damage traffic. The time spent in update is reported per frame.
+
+    python benchmarks/bench_client_io.py --remotes 8 --frames 600
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import free_port, percentile, start_server  # noqa: E402
+from network import Network  # noqa: E402
+
+
+def apply(msg: dict, remotes: dict) -> None:
+    """Roughly what the manager does with a message, minus the Ursina calls."""
+    if msg.get("object") == "snapshot":
+        for state in msg.get("players", ()):
+            remotes.setdefault(state["id"], {}).update(state)
+    elif msg.get("object") == "player" and msg.get("id") is not None:
+        remotes.setdefault(str(msg["id"]), {}).update(msg)
+
+
+def measure(port: int, threaded: bool, frames: int, fps: float) -> dict:
+    net = Network("127.0.0.1", port, "measured")
+    if not threaded:
+        net.settimeout(0.001)  # what MultiplayerManager used
+    net.connect()
+    if threaded:
+        net.start_io_thread()
+    player = SimpleNamespace(world_x=0.0, world_y=1.0, world_z=0.0, rotation_y=0.0, health=10, current_gun=0)
+    remotes = {}
+    costs = []
+    applied = 0
+    interval = 1 / fps
+    next_frame = time.perf_counter()
+    try:
+        for frame in range(frames):
+            start = time.perf_counter()
+            player.world_x = frame * 0.1 % 50
+            net.send_player(player)
+            while True:
+                msg = net.receive_info()
+                if not msg:
+                    break
+                for m in msg if isinstance(msg, list) else (msg,):
+                    apply(m, remotes)
+                    applied += 1
+            costs.append(time.perf_counter() - start)
+            # The rest of the frame is rendering; sleep it off
+            next_frame += interval
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+    finally:
+        net.close()
+    ms = [c * 1000 for c in costs[len(costs) // 10:]]  # skip the join burst
+    return {
+        "mean": statistics.fmean(ms),
+        "p50": percentile(ms, 50),
+        "p99": percentile(ms, 99),
+        "max": max(ms),
+        "remotes": len(remotes),
+        "messages": applied,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--remotes", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=float, default=60)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server("eventloop", port, args.remotes + 1, 30)
+    duration = 2 * (args.frames / args.fps + 2) + 2
+    bots = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "loadgen.py"), "--connect", f"127.0.0.1:{port}",
+         "--bots", str(args.remotes), "--duration", str(duration), "--warmup", "0"],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    try:
+        time.sleep(1.0)
+        print(f"{args.remotes} remote players, {args.fps:g} fps; time in update per frame (ms)")
+        print(f"{'client':<10} {'mean':>7} {'p50':>7} {'p99':>7} {'max':>7} {'msgs':>7} {'remotes':>8}")
+        for name, threaded in (("inline", False), ("io thread", True)):
+            r = measure(port, threaded, args.frames, args.fps)
+            print(f"{name:<10} {r['mean']:>7.3f} {r['p50']:>7.3f} {r['p99']:>7.3f} {r['max']:>7.3f} {r['messages']:>7} {r['remotes']:>8}")
+            time.sleep(1.0)
+    finally:
+        bots.kill()
+        bots.wait()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
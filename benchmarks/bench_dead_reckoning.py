@@ -0,0 +1,196 @@
+"""
+Remote player error versus truth through update gaps: holding the last
+state versus extrapolating on the sent velocity.
+
+Recording: a mover client walks, strafes and stops at --fps through a real
+server (tick --tick-rate), while a watcher client logs every snapshot of
+the mover as it arrives. The mover's true path is logged each frame. The
+session is saved with --record and can be replayed later with --session.
+
+Replay: Wi-Fi-like stalls are laid over the arrival times. Each stall
+holds back everything in it for --stall-min to --stall-max seconds, then
+delivers it in a burst. The watcher's view is redrawn at --fps through an
+interpolation buffer with and without velocity. The error is the distance
+to where the mover truly was at the moment being shown. ``worst jump`` is
+the largest per-frame step beyond the true step, i.e. a visible teleport.
+
+    python benchmarks/bench_dead_reckoning.py --record session.json
+    python benchmarks/bench_dead_reckoning.py --session session.json --stalls 0.5
+"""
+
+import argparse
+import bisect
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import free_port, percentile, start_server  # noqa: E402
+from interpolation import INTERP_DELAY, ServerClock, SnapshotBuffer  # noqa: E402
+from network import Network  # noqa: E402
+
+ACCELERATION = 40.0  # units/s^2 towards the current goal velocity
+
+
+def record(args) -> dict:
+    rng = random.Random(args.seed)
+    port = free_port()
+    server = start_server("eventloop", port, 4, args.tick_rate)
+    mover = Network("127.0.0.1", port, "mover")
+    watcher = Network("127.0.0.1", port, "watcher")
+    truth, packets = [], []
+    try:
+        mover.connect()
+        watcher.connect()
+        mover.settimeout(0.0)
+        watcher.settimeout(0.0)
+        player = SimpleNamespace(world_x=0.0, world_y=1.0, world_z=0.0, rotation_y=0.0, health=10, current_gun=0)
+        velocity = [0.0, 0.0]
+        goal = (0.0, 0.0)
+        next_goal = 0.0
+        frame = 1 / args.fps
+        start = last = time.perf_counter()
+        while (now := time.perf_counter()) - start < args.duration:
+            t, dt = now - start, now - last
+            last = now
+            if t >= next_goal:
+                # Walk somewhere, strafe, or stand still for a moment
+                speed = rng.choice((0.0, 5.0, 10.0, 10.0))
+                heading = rng.uniform(0, 2 * math.pi)
+                goal = (speed * math.sin(heading), speed * math.cos(heading))
+                next_goal = t + rng.uniform(0.4, 2.0)
+            for axis in (0, 1):
+                step = goal[axis] - velocity[axis]
+                velocity[axis] += max(-ACCELERATION * dt, min(ACCELERATION * dt, step))
+            player.world_x += velocity[0] * dt
+            player.world_z += velocity[1] * dt
+            if any(velocity):
+                player.rotation_y = math.degrees(math.atan2(velocity[0], velocity[1])) % 360
+            mover.send_player(player)
+            truth.append((t, player.world_x, player.world_y, player.world_z))
+            while mover.receive_info():
+                pass
+            msg = watcher.receive_info()
+            arrival = time.perf_counter() - start
+            for m in msg if isinstance(msg, list) else (msg,) if msg else ():
+                if m.get("object") != "snapshot":
+                    continue
+                for state in m["players"]:
+                    if str(state.get("id")) == mover.id:
+                        fields = {k: state[k] for k in ("position", "rotation", "velocity") if k in state}
+                        packets.append((arrival, m["tick"], fields))
+            time.sleep(max(0.0, frame - (time.perf_counter() - now)))
+    finally:
+        mover.close()
+        watcher.close()
+        server.terminate()
+        server.wait()
+    return {"tick_rate": args.tick_rate, "fps": args.fps, "truth": truth, "packets": packets}
+
+
+def with_stalls(packets: list, duration: float, args) -> list:
+    """Arrival times with Wi-Fi-style stalls: everything inside one arrives when it ends."""
+    rng = random.Random(args.seed + 1)
+    stalls = []
+    t = 0.0
+    while t < duration:
+        t += rng.expovariate(args.stalls) if args.stalls > 0 else duration
+        length = rng.uniform(args.stall_min, args.stall_max)
+        stalls.append((t, t + length))
+        t += length
+    delayed = []
+    for arrival, tick, fields in packets:
+        for begin, end in stalls:
+            if begin <= arrival < end:
+                arrival = end + rng.random() * 0.005
+                break
+        delayed.append((arrival, tick, fields))
+    delayed.sort(key=lambda p: p[0])
+    return delayed
+
+
+def true_at(truth: list, times: list, t: float) -> tuple:
+    i = min(max(bisect.bisect_left(times, t), 1), len(times) - 1)
+    (t0, *a), (t1, *b) = truth[i - 1], truth[i]
+    f = 0.0 if t1 == t0 else min(1.0, max(0.0, (t - t0) / (t1 - t0)))
+    return tuple(x + (y - x) * f for x, y in zip(a, b))
+
+
+def replay(session: dict, packets: list, args, use_velocity: bool) -> dict:
+    truth = session["truth"]
+    times = [row[0] for row in truth]
+    clock = ServerClock(session["tick_rate"])
+    buffer = SnapshotBuffer()
+    state = {"position": None, "rotation": 0.0, "velocity": None}
+    errors, jumps = [], []
+    previous = None
+    frame = 1 / args.fps
+    next_packet = 0
+    t = 1.0
+    while t < times[-1]:
+        while next_packet < len(packets) and packets[next_packet][0] <= t:
+            arrival, tick, fields = packets[next_packet]
+            next_packet += 1
+            state.update(fields)
+            if state["position"] is None:
+                continue
+            buffer.push(clock.observe(tick, arrival), state["position"], state["rotation"], state["velocity"] if use_velocity else None)
+        drawn = buffer.render(t - args.delay)
+        if drawn is not None:
+            position = drawn[0]
+            shown_at = t - args.delay
+            errors.append(math.dist(position, true_at(truth, times, shown_at)))
+            if previous is not None:
+                true_step = math.dist(true_at(truth, times, shown_at), true_at(truth, times, shown_at - frame))
+                jumps.append(max(0.0, math.dist(position, previous) - true_step))
+            previous = position
+        t += frame
+    return {
+        "error_mean": statistics.fmean(errors),
+        "error_p99": percentile(errors, 99),
+        "error_max": max(errors),
+        "worst_jump": max(jumps),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session", help="replay this recorded session instead of recording one")
+    parser.add_argument("--record", help="save the recorded session here")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--tick-rate", type=float, default=20, help="server snapshot rate while recording")
+    parser.add_argument("--fps", type=float, default=120)
+    parser.add_argument("--stalls", type=float, default=0.5, help="stalls per second on replay")
+    parser.add_argument("--stall-min", type=float, default=0.1)
+    parser.add_argument("--stall-max", type=float, default=0.35)
+    parser.add_argument("--delay", type=float, default=INTERP_DELAY, help="interpolation delay, seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.session:
+        with open(args.session) as f:
+            session = json.load(f)
+    else:
+        session = record(args)
+        if args.record:
+            with open(args.record, "w") as f:
+                json.dump(session, f)
+    packets = with_stalls(session["packets"], session["truth"][-1][0], args)
+    print(f"{len(session['packets'])} snapshots at {session['tick_rate']:g} Hz, "
+          f"{args.stalls:g} stalls/s of {args.stall_min * 1000:.0f}-{args.stall_max * 1000:.0f} ms, "
+          f"{args.delay * 1000:.0f} ms interpolation delay")
+    print(f"{'remote player':<24} {'error mean':>11} {'p99':>7} {'max':>7} {'worst jump':>11}")
+    for name, use_velocity in (("hold last state", False), ("extrapolate velocity", True)):
+        r = replay(session, packets, args, use_velocity)
+        print(f"{name:<24} {r['error_mean']:>11.3f} {r['error_p99']:>7.3f} {r['error_max']:>7.3f} {r['worst_jump']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Stream parser microbenchmark: the old ``{``/``}`` brace scanner against
+``protocol.FrameReader`` on bursts of player messages.
+
+Each burst is parsed twice: delivered in 2048-byte reads (what
+``Network.receive_info`` sees normally) and as one backed-up buffer.
+
+    python benchmarks/bench_framing.py --messages 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from protocol import FrameReader, decode_message, encode_message  # noqa: E402
+
+
+def sample_message(i: int) -> dict:
+    return {
+        "object": "player",
+        "id": str(i % 10 + 1),
+        "position": (i * 0.25, 12.5, -i * 0.125),
+        "rotation": i % 360,
+        "health": 10,
+        "gun": i % 5,
+        "joined": False,
+        "left": False,
+    }
+
+
+def brace_parse(chunks) -> int:
+    """The parser ``Network.receive_info`` and ``handle_messages`` used before framing."""
+    recv_buffer = ""
+    count = 0
+    for chunk in chunks:
+        recv_buffer += chunk.decode("utf8")
+        while True:
+            try:
+                start = recv_buffer.index("{")
+                end = recv_buffer.index("}", start) + 1
+            except ValueError:
+                break
+            msg = recv_buffer[start:end]
+            recv_buffer = recv_buffer[end:]
+            json.loads(msg)
+            count += 1
+    return count
+
+
+def frame_parse(chunks) -> int:
+    reader = FrameReader()
+    count = 0
+    for chunk in chunks:
+        reader.feed(chunk)
+        for _, body in reader.frames():
+            decode_message(body)
+            count += 1
+    return count
+
+
+def split(stream: bytes, size: int):
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def timed(parser, chunks, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    messages = [sample_message(i) for i in range(args.messages)]
+    brace_stream = b"".join(json.dumps(m).encode("utf8") for m in messages)
+    frame_stream = b"".join(encode_message(m) for m in messages)
+
+    assert brace_parse([brace_stream]) == frame_parse([frame_stream]) == args.messages
+
+    print(f"{args.messages} messages, brace stream {len(brace_stream)} B, framed stream {len(frame_stream)} B")
+    print(f"{'delivery':<14} {'brace ms':>10} {'framed ms':>10} {'speedup':>8}")
+    for label, brace_chunks, frame_chunks in (
+        ("2048 B reads", split(brace_stream, 2048), split(frame_stream, 2048)),
+        ("single burst", [brace_stream], [frame_stream]),
+    ):
+        brace_t = timed(brace_parse, brace_chunks, args.repeat)
+        frame_t = timed(frame_parse, frame_chunks, args.repeat)
+        print(f"{label:<14} {brace_t * 1000:>10.1f} {frame_t * 1000:>10.1f} {brace_t / frame_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
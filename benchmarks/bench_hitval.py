@@ -0,0 +1,114 @@
+"""
+Server-side hit validation: cost per claim and how many honest hits survive
+with and without rewinding the target.
+
+A target strafes side to side at --speed units/s, recorded at the server
+tick rate. A shooter with --latency seconds of one-way delay aims at the
+body centre it sees, which is where the target was when the last snapshot
+it received was sent. Claims are checked at the shooter's view tick
+(lag-compensated) and at the server's current tick (what validating
+against the latest position would do).
+
+Timing runs the same bursts through the numpy path (if installed, forced on
+for every burst size) and the pure-Python path.
+
+    python benchmarks/bench_hitval.py --latency 0.1 --speed 30
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import lagcomp  # noqa: E402
+import server  # noqa: E402
+from lagcomp import BODY_BOX, LagCompensator  # noqa: E402
+
+SHOOTER = (0.0, 3.0, -60.0)
+BURSTS = (1, 10, 25, 50, 200)
+
+
+def target_at(t: float, speed: float) -> tuple:
+    # 4 s strafes across 40 units, turning to face the way it runs
+    span = 40
+    phase = (t * speed) % (2 * span)
+    x = phase - span / 2 if phase < span else span * 1.5 - phase
+    yaw = 90 if phase < span else 270
+    return (x, 1.0, 0.0), yaw
+
+
+def build(speed: float, tick_rate: float, seconds: float) -> LagCompensator:
+    comp = LagCompensator(int(server.LAG_COMP_WINDOW * tick_rate) + 2)
+    for tick in range(int(seconds * tick_rate) + 1):
+        position, yaw = target_at(tick / tick_rate, speed)
+        comp.record(tick, "target", position, yaw)
+    return comp
+
+
+def claims(count: int, speed: float, tick_rate: float, now_tick: int, latency: float, rng: random.Random):
+    """Honest shots at what the shooter sees ``latency`` (plus tick jitter) in the past."""
+    ticks, origins, directions = [], [], []
+    for _ in range(count):
+        view_tick = now_tick - round((latency + rng.random() / tick_rate) * tick_rate)
+        (x, y, z), _ = target_at(view_tick / tick_rate, speed)
+        aim = (x - SHOOTER[0], y + BODY_BOX[0] - SHOOTER[1], z - SHOOTER[2])
+        ticks.append(view_tick)
+        origins.append(SHOOTER)
+        directions.append(aim)
+    return ticks, origins, directions
+
+
+def accuracy(args) -> tuple:
+    rng = random.Random(1)
+    comp = build(args.speed, args.tick_rate, 2)
+    now_tick = int(2 * args.tick_rate)
+    ticks, origins, directions = claims(1000, args.speed, args.tick_rate, now_tick, args.latency, rng)
+    rewound = sum(hit for hit, _ in comp.trace("target", ticks, origins, directions, server.MAX_SHOT_RANGE))
+    latest = sum(hit for hit, _ in comp.trace("target", [now_tick] * len(ticks), origins, directions, server.MAX_SHOT_RANGE))
+    return rewound / len(ticks), latest / len(ticks)
+
+
+def cost(args, burst: int) -> float:
+    rng = random.Random(2)
+    comp = build(args.speed, args.tick_rate, 2)
+    now_tick = int(2 * args.tick_rate)
+    ticks, origins, directions = claims(burst, args.speed, args.tick_rate, now_tick, args.latency, rng)
+    rounds = max(1, args.claims // burst)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        comp.trace("target", ticks, origins, directions, server.MAX_SHOT_RANGE)
+    return (time.perf_counter() - start) / (rounds * burst) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1, help="one-way shooter latency in seconds")
+    parser.add_argument("--speed", type=float, default=30, help="target strafe speed, units/s")
+    parser.add_argument("--tick-rate", type=float, default=server.TICK_RATE)
+    parser.add_argument("--claims", type=int, default=20000, help="claims timed per burst size")
+    args = parser.parse_args()
+
+    rewound, latest = accuracy(args)
+    print(f"honest hits confirmed at {args.latency * 1000:.0f} ms, {args.speed:g} units/s strafe:")
+    print(f"  rewound to view tick  {rewound * 100:5.1f}%")
+    print(f"  latest position       {latest * 100:5.1f}%")
+
+    backends = [("numpy", lagcomp.np)] if lagcomp.np is not None else []
+    backends.append(("python", None))
+    print(f"\n{'backend':<8} " + " ".join(f"{f'burst {n}':>10}" for n in BURSTS) + "   (us per claim)")
+    numpy, min_batch = lagcomp.np, lagcomp.VECTORIZE_MIN_BATCH
+    lagcomp.VECTORIZE_MIN_BATCH = 1
+    for name, module in backends:
+        lagcomp.np = module
+        print(f"{name:<8} " + " ".join(f"{cost(args, n):>10.2f}" for n in BURSTS))
+    lagcomp.np, lagcomp.VECTORIZE_MIN_BATCH = numpy, min_batch
+    if numpy is None:
+        print("numpy not installed; only the fallback was timed")
+
+
+if __name__ == "__main__":
+    main()
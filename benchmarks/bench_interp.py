@@ -0,0 +1,109 @@
+"""
+Remote player smoothness: snapping to the newest state versus the
+interpolation buffer, at several network send rates.
+
+A remote player runs a curved path at about 10 units/s. Its state is sent
+at --rates, each packet delayed by --latency plus up to --jitter and
+dropped with probability --loss. The client draws at --fps. Per frame,
+the drawn step is compared with the true step over the same frame time.
+``stutter`` is the mean and p99 of that difference. ``stalls`` is the
+share of frames where the player didn't move at all. ``behind`` is how
+far the drawn player trails the true one.
+
+    python benchmarks/bench_interp.py --rates 20 30 60 --jitter 0.03
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import percentile  # noqa: E402
+from interpolation import INTERP_DELAY, ServerClock, SnapshotBuffer  # noqa: E402
+
+
+def true_position(t: float) -> tuple:
+    return (20 * math.sin(t * 0.5), 1.0, 12 * math.sin(t * 0.8))
+
+
+def deliveries(rate: float, duration: float, latency: float, jitter: float, loss: float, rng: random.Random) -> list:
+    """``(arrival, tick, position)`` for every packet that made it, in arrival order."""
+    packets = []
+    for tick in range(int(duration * rate)):
+        if rng.random() < loss:
+            continue
+        sent = tick / rate
+        packets.append((sent + latency + rng.random() * jitter, tick, true_position(sent)))
+    packets.sort()
+    return packets
+
+
+def simulate(rate: float, args, interpolate: bool) -> dict:
+    rng = random.Random(args.seed)
+    packets = deliveries(rate, args.duration, args.latency, args.jitter, args.loss, rng)
+    clock = ServerClock(rate)
+    buffer = SnapshotBuffer()
+    latest = None
+    latest_tick = -1
+    drawn = []
+    frame = 1 / args.fps
+    next_packet = 0
+    t = 1.0  # let the first packets arrive
+    while t < args.duration:
+        while next_packet < len(packets) and packets[next_packet][0] <= t:
+            arrival, tick, position = packets[next_packet]
+            next_packet += 1
+            if interpolate:
+                buffer.push(clock.observe(tick, arrival), position, 0.0)
+            elif tick > latest_tick:
+                latest, latest_tick = position, tick
+        if interpolate:
+            state = buffer.sample(t - args.delay)
+            drawn.append((t, state[0] if state else None))
+        else:
+            drawn.append((t, latest))
+        t += frame
+
+    stutter, behind, stalls = [], [], 0
+    for (t0, p0), (t1, p1) in zip(drawn, drawn[1:]):
+        if p0 is None or p1 is None:
+            continue
+        step = math.dist(p0, p1)
+        true_step = math.dist(true_position(t0), true_position(t1))
+        stutter.append(abs(step - true_step))
+        stalls += step == 0
+        behind.append(math.dist(p1, true_position(t1)))
+    return {
+        "stutter_mean": statistics.fmean(stutter),
+        "stutter_p99": percentile(stutter, 99),
+        "stalls": stalls / len(stutter),
+        "behind": statistics.fmean(behind),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", nargs="+", type=float, default=[20, 30, 60], help="state sends per second")
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--latency", type=float, default=0.04, help="one-way delay, seconds")
+    parser.add_argument("--jitter", type=float, default=0.03, help="extra random delay up to this, seconds")
+    parser.add_argument("--loss", type=float, default=0.02)
+    parser.add_argument("--delay", type=float, default=INTERP_DELAY, help="interpolation delay, seconds")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'rate':>5} {'client':<12} {'stutter mean':>13} {'stutter p99':>12} {'stalls':>7} {'behind':>7}")
+    for rate in args.rates:
+        for name, interpolate in (("snap", False), (f"interp {args.delay * 1000:.0f}ms", True)):
+            r = simulate(rate, args, interpolate)
+            print(f"{rate:>5g} {name:<12} {r['stutter_mean']:>13.3f} {r['stutter_p99']:>12.3f} {r['stalls'] * 100:>6.1f}% {r['behind']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
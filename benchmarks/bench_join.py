@@ -0,0 +1,108 @@
+"""
+Join time versus lobby size.
+
+For each server core and lobby size, a newcomer connects and the time is
+taken from connect() until it knows about every player already in the
+lobby (one ``world`` message, or one ``joined`` message per player from
+older servers). Each join is repeated and the median reported. The second
+column repeats the join while another connection sits in the handshake
+without ever sending its hello.
+
+    python benchmarks/bench_join.py --lobby 0 1 3 5 9
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import free_port, start_server  # noqa: E402
+from network import Network  # noqa: E402
+
+JOIN_TIMEOUT = 5.0
+
+
+def join(port: int, lobby: int) -> float:
+    """Seconds until a newcomer has heard about all ``lobby`` players, or inf."""
+    start = time.perf_counter()
+    net = Network("127.0.0.1", port, "newcomer", use_udp=False)
+    try:
+        net.connect()
+        net.settimeout(0.001)  # what MultiplayerManager uses
+        known = set()
+        while len(known) < lobby:
+            if time.perf_counter() - start > JOIN_TIMEOUT:
+                return float("inf")
+            msg = net.receive_info()
+            for m in msg if isinstance(msg, list) else (msg,) if msg else ():
+                if m.get("object") == "world":
+                    known.update(str(p["id"]) for p in m["players"])
+                elif m.get("object") == "player" and m.get("joined"):
+                    known.add(str(m["id"]))
+        return time.perf_counter() - start
+    except OSError:
+        return float("inf")
+    finally:
+        net.close()
+
+
+def measure(mode: str, lobby: int, repeats: int, stalled: bool) -> float:
+    port = free_port()
+    proc = start_server(mode, port, lobby + 3, 30)
+    try:
+        members = []
+        for i in range(lobby):
+            net = Network("127.0.0.1", port, f"bot{i}", use_udp=False)
+            net.connect()
+            net.settimeout(0.0)
+            members.append(net)
+        time.sleep(0.2)
+
+        stuck = socket.create_connection(("127.0.0.1", port)) if stalled else None
+        time.sleep(0.05)
+        times = []
+        for _ in range(repeats):
+            times.append(join(port, lobby))
+            if times[-1] == float("inf"):
+                break
+            # Let the server process the leave before the next join
+            time.sleep(0.1)
+            for net in members:
+                while net.receive_info():
+                    pass
+        if stuck:
+            stuck.close()
+        for net in members:
+            net.close()
+    finally:
+        proc.terminate()
+        proc.wait()
+    return statistics.median(times)
+
+
+def fmt(seconds: float) -> str:
+    return "timeout" if seconds == float("inf") else f"{seconds * 1000:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["threaded", "eventloop"])
+    parser.add_argument("--lobby", nargs="+", type=int, default=[0, 1, 3, 5, 9])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'lobby':>5} {'join ms':>9} {'join ms, stalled handshake':>27}")
+    for mode in args.modes:
+        for lobby in args.lobby:
+            normal = measure(mode, lobby, args.repeats, False)
+            stalled = measure(mode, lobby, 1, True)
+            print(f"{mode:<10} {lobby:>5} {fmt(normal):>9} {fmt(stalled):>27}")
+
+
+if __name__ == "__main__":
+    main()
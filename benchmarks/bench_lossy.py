@@ -0,0 +1,212 @@
+"""
+Lossy loopback harness: remote-player update latency over TCP vs the UDP
+transform channel at 0-5% packet loss.
+
+The event loop server listens on 127.0.0.1 and a proxy on 127.0.0.2 (same
+port, Linux loopback) sits between it and two clients. The proxy adds a
+one-way delay to everything, drops datagrams with the given probability,
+and models a lost TCP segment as a retransmission timeout that holds up the
+rest of that stream, which is what head-of-line blocking looks like to the
+game.
+
+    python benchmarks/bench_lossy.py --loss 0 1 3 5 --duration 10
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import random
+import selectors
+import socket
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import server  # noqa: E402
+from network import Network  # noqa: E402
+
+SERVER_HOST = "127.0.0.1"
+PROXY_HOST = "127.0.0.2"
+TCP_RTO = 0.2  # Linux minimum retransmission timeout
+
+
+class LossyProxy:
+    def __init__(self, port: int, loss: float, delay: float):
+        self.port = port
+        self.loss = loss
+        self.delay = delay
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.create_server((PROXY_HOST, port))
+        self.selector.register(self.listener, selectors.EVENT_READ, ("accept", None))
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind((PROXY_HOST, port))
+        self.selector.register(self.udp, selectors.EVENT_READ, ("udp_client", None))
+        self._upstream_udp = {}
+        self._stream_clock = {}
+        self._schedule = []
+        self._counter = itertools.count()
+        self._running = True
+
+    def _later(self, when: float, fn, *args):
+        heapq.heappush(self._schedule, (when, next(self._counter), fn, args))
+
+    def _lost(self) -> bool:
+        return random.random() < self.loss
+
+    def _forward_stream(self, src: socket.socket, dst: socket.socket):
+        try:
+            data = src.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            self.selector.unregister(src)
+            return
+        now = time.perf_counter()
+        deliver_at = now + self.delay + (TCP_RTO if self._lost() else 0)
+        # TCP delivers in order, so nothing overtakes a retransmitted segment
+        deliver_at = max(deliver_at, self._stream_clock.get(src, 0))
+        self._stream_clock[src] = deliver_at
+        self._later(deliver_at, dst.sendall, data)
+
+    def run(self):
+        while self._running:
+            timeout = 0.05
+            if self._schedule:
+                timeout = max(0.0, min(timeout, self._schedule[0][0] - time.perf_counter()))
+            for key, _ in self.selector.select(timeout):
+                role, peer = key.data
+                if role == "accept":
+                    client, _ = self.listener.accept()
+                    upstream = socket.create_connection((SERVER_HOST, self.port))
+                    for sock in (client, upstream):
+                        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    self.selector.register(client, selectors.EVENT_READ, ("stream", upstream))
+                    self.selector.register(upstream, selectors.EVENT_READ, ("stream", client))
+                elif role == "stream":
+                    self._forward_stream(key.fileobj, peer)
+                elif role == "udp_client":
+                    data, addr = self.udp.recvfrom(65536)
+                    upstream = self._upstream_udp.get(addr)
+                    if upstream is None:
+                        upstream = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                        upstream.connect((SERVER_HOST, self.port))
+                        self._upstream_udp[addr] = upstream
+                        self.selector.register(upstream, selectors.EVENT_READ, ("udp_server", addr))
+                    if not self._lost():
+                        self._later(time.perf_counter() + self.delay, upstream.send, data)
+                elif role == "udp_server":
+                    data = key.fileobj.recv(65536)
+                    if not self._lost():
+                        self._later(time.perf_counter() + self.delay, self.udp.sendto, data, peer)
+            now = time.perf_counter()
+            while self._schedule and self._schedule[0][0] <= now:
+                _, _, fn, args = heapq.heappop(self._schedule)
+                try:
+                    fn(*args)
+                except OSError:
+                    pass
+        self.listener.close()
+        self.udp.close()
+
+    def stop(self):
+        self._running = False
+
+
+class FakePlayer:
+    world_x = world_y = world_z = 0.0
+    rotation_y = 0.0
+    health = 10
+    current_gun = 0
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(use_udp: bool, loss: float, delay: float, rate: float, duration: float, tick_rate: float) -> dict:
+    srv = server.EventLoopServer(SERVER_HOST, 0, 4, tick_rate)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    proxy = LossyProxy(srv.port, loss, delay)
+    threading.Thread(target=proxy.run, daemon=True).start()
+
+    clients = []
+    for name in ("sender", "receiver"):
+        net = Network(PROXY_HOST, srv.port, name, use_udp=use_udp)
+        net.connect()
+        net.settimeout(0.001)
+        clients.append(net)
+
+    player = FakePlayer()
+    latencies = []
+    # Positions are quantized on the wire, so send milliseconds since start
+    epoch = time.perf_counter()
+    interval = 1 / rate
+    warmup_end = time.perf_counter() + 1.0
+    end = warmup_end + duration
+    next_send = time.perf_counter()
+    while time.perf_counter() < end:
+        now = time.perf_counter()
+        if now >= next_send:
+            # The server forwards transforms only, so the send time rides in world_x
+            player.world_x = (now - epoch) * 1000
+            for net in clients:
+                net.send_player(player)
+            next_send += interval
+        for net in clients:
+            while True:
+                msg = net.receive_info()
+                if not msg:
+                    break
+                received = time.perf_counter()
+                for m in msg if isinstance(msg, list) else (msg,):
+                    if m.get("object") != "snapshot" or received < warmup_end:
+                        continue
+                    for state in m["players"]:
+                        if "position" in state:
+                            latencies.append(received - epoch - state["position"][0] / 1000)
+
+    udp_active = all(net.udp_ready for net in clients)
+    stale = sum(net.udp_stale_dropped for net in clients)
+    for net in clients:
+        net.close()
+    proxy.stop()
+    srv.stop()
+
+    return {
+        "transport": "udp" if use_udp else "tcp",
+        "loss_pct": loss * 100,
+        "udp_active": udp_active,
+        "updates": len(latencies),
+        "stale_dropped": stale,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=float("nan")) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loss", nargs="+", type=float, default=[0, 1, 3, 5], help="packet loss in percent")
+    parser.add_argument("--delay", type=float, default=0.01, help="one-way proxy delay in seconds")
+    parser.add_argument("--rate", type=float, default=60, help="client send rate")
+    parser.add_argument("--tick-rate", type=float, default=30)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'transport':<9} {'loss %':>6} {'updates':>8} {'stale':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for loss in args.loss:
+        for use_udp in (False, True):
+            r = run(use_udp, loss / 100, args.delay, args.rate, args.duration, args.tick_rate)
+            note = "" if r["udp_active"] or not use_udp else "  (udp never confirmed)"
+            print(f"{r['transport']:<9} {r['loss_pct']:>6.0f} {r['updates']:>8} {r['stale_dropped']:>6} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}{note}")
+
+
+if __name__ == "__main__":
+    main()
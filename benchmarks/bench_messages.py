@@ -0,0 +1,76 @@
+"""
+Message encode/decode throughput: JSON against the ``schema`` binary
+encoding, per message type.
+
+Each type is encoded into a frame and decoded from its body --count times
+with typical field values. Sizes include the 3-byte frame header.
+
+    python benchmarks/bench_messages.py --count 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from protocol import FRAME_HEADER, decode_message, encode_message  # noqa: E402
+from schema import ENCODING_BINARY, decode_binary, encode_payload  # noqa: E402
+
+
+def player_entry(i: int) -> dict:
+    return {
+        "id": str(i + 1),
+        "position": (i * 3.25, 12.5, -i * 1.125),
+        "rotation": 37.5 + i,
+        "health": 10,
+        "gun": i % 5,
+        "velocity": (4.0, 0.0, -2.5),
+    }
+
+
+SAMPLES = {
+    "player": {"object": "player", "id": "3", "position": (12.25, 3.5, -40.125), "rotation": 181.5, "health": 7.5, "gun": 2, "velocity": (4.0, 0.0, -2.5)},
+    "snapshot": {"object": "snapshot", "tick": 48213, "players": [player_entry(i) for i in range(8)]},
+    "damage": {"object": "damage", "id": "3", "target": "5", "amount": 2.5, "headshot": False, "tick": 48200.4, "origin": (12.25, 5.5, -40.125), "direction": (0.6, -0.1, 0.79)},
+    "projectile": {"object": "projectile", "id": "3", "position": (12.25, 5.5, -40.125), "rotation": (0.0, 181.5, 0.0), "kind": "bullet", "direction": (0.6, -0.1, 0.79)},
+    "particle": {"object": "particle", "id": "3", "position": (30.0, 2.0, -12.0), "direction": (0.3, 0.8, 0.1), "spray": 30, "model": "particles", "texture": None},
+    "effect": {"object": "effect", "id": "3", "effect": "hit", "position": (30.0, 2.0, -12.0), "seed": 2914782231},
+    "ping": {"object": "ping", "t": 81234.56789},
+}
+
+
+def timed(fn, arg, count: int, repeat: int) -> float:
+    """Best seconds per call over ``repeat`` runs of ``count`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'message':<11} {'encoding':<8} {'bytes':>6} {'encode/s':>10} {'decode/s':>10}")
+    for name, payload in SAMPLES.items():
+        for encoding, encode, decode in (
+            ("json", encode_message, decode_message),
+            ("binary", lambda p: encode_payload(p, ENCODING_BINARY), decode_binary),
+        ):
+            frame = encode(payload)
+            body = frame[FRAME_HEADER.size:]
+            encode_time = timed(encode, payload, args.count, args.repeat)
+            decode_time = timed(decode, body, args.count, args.repeat)
+            print(f"{name:<11} {encoding:<8} {len(frame):>6} {1 / encode_time:>10,.0f} {1 / decode_time:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
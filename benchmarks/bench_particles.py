@@ -0,0 +1,129 @@
+"""
+Frame time with --live particles kept alive: the instanced
+``particle_system`` against an entity per particle.
+
+Each frame spawns enough particles, spread over a few emitter kinds like
+the game's (jetpack puffs, hit sparks, destroyed debris), to hold about
+--live alive at their one second lifetime. Frames are paced at --fps in
+real time for --duration seconds after a second of ramp-up. Reported per
+frame: spawning plus the engine step that moves and draws them.
+
+``entity per particle`` is ``particles.Particles`` as it was before
+instancing, with its own update, fade-out and destroy timer.
+
+    python benchmarks/bench_particles.py --live 5000 --window offscreen
+
+Needs Ursina.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import percentile  # noqa: E402
+
+KINDS = [("particle", "jetpack"), ("particles", "particle.png"), ("particles", "destroyed")]
+
+
+def legacy_spawner():
+    from ursina import Entity, Vec3, curve, destroy
+    from ursina import time as utime
+
+    class Particles(Entity):
+        def __init__(self, position, direction=Vec3(random.random(), random.random(), random.random()), spray_amount=30, **kwargs):
+            super().__init__(model="particle", texture="particle.png", scale=0.2, position=position, rotation_y=random.random() * 360)
+            self.direction = direction
+            self.spray_amount = spray_amount
+            self.prev_spray_amount = self.spray_amount
+            self.fade_out(duration=0.2, delay=0.7, curve=curve.linear)
+            destroy(self, 1)
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+
+        def update(self):
+            self.position += self.direction * self.spray_amount * utime.dt
+            self.spray_amount -= self.prev_spray_amount * utime.dt
+
+    def spawn(position, direction, spray, model, texture):
+        Particles(position, Vec3(*direction), spray_amount=spray, model=model, texture=texture)
+
+    return spawn, lambda: None
+
+
+def instanced_spawner():
+    from particles import particle_system
+
+    def spawn(position, direction, spray, model, texture):
+        particle_system.emit(position, direction, spray_amount=spray, model=model, texture=texture)
+
+    return spawn, lambda: particle_system.live
+
+
+def run(app, make_spawner, args) -> dict:
+    from ursina import Vec3
+
+    rng = random.Random(1)
+    spawn, live = make_spawner()
+    per_frame = args.live / args.fps  # one second lifetime
+    owed = 0.0
+    frame_times, live_counts = [], []
+    ramp = int(args.fps)
+    next_frame = time.perf_counter()
+    for frame in range(ramp + int(args.duration * args.fps)):
+        owed += per_frame
+        start = time.perf_counter()
+        while owed >= 1:
+            owed -= 1
+            model, texture = KINDS[rng.randrange(len(KINDS))]
+            position = Vec3(rng.uniform(-40, 40), rng.uniform(0, 20), rng.uniform(-40, 40))
+            direction = (rng.random(), rng.uniform(-1, 1), rng.random())
+            spawn(position, direction, rng.choice((10, 30)), model, texture)
+        app.step()
+        if frame >= ramp:
+            frame_times.append(time.perf_counter() - start)
+            live_counts.append(live())
+        next_frame += 1 / args.fps
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return {"frame_times": frame_times, "live": live_counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", type=int, default=5000, help="particles to keep alive")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--window", choices=["none", "offscreen", "onscreen"], default="offscreen")
+    parser.add_argument("--skip-legacy", action="store_true", help="only run the instanced particles")
+    args = parser.parse_args()
+
+    from ursina import Ursina, scene
+
+    os.chdir(ROOT)  # shaders are loaded relative to the game directory
+    app = Ursina(window_type=args.window)
+    passes = [("instanced", instanced_spawner)]
+    if not args.skip_legacy:
+        passes.insert(0, ("entity per particle", legacy_spawner))
+
+    print(f"{'particles':<20} {'live':>6} {'mean ms':>8} {'p50':>8} {'p99':>8} {'max':>8}  entities")
+    for name, make_spawner in passes:
+        r = run(app, make_spawner, args)
+        ms = [v * 1000 for v in r["frame_times"]]
+        live = r["live"][-1] if r["live"][-1] is not None else "-"
+        print(f"{name:<20} {live:>6} {statistics.fmean(ms):>8.3f} {percentile(ms, 50):>8.3f} {percentile(ms, 99):>8.3f} "
+              f"{max(ms):>8.3f}  {len(scene.entities)}")
+        # Let the last particles die before the next pass
+        deadline = time.perf_counter() + 1.5
+        while time.perf_counter() < deadline:
+            app.step()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Client message handling, replayed from a capture without a server.
+
+A capture recorded with loadgen is fed through ``MultiplayerManager`` at
+--speed. Each frame advances a fixed 1/--fps of playback time, so every
+run delivers the same messages in the same frames and only the time it
+takes to handle them changes between revisions. Reported per frame:
+``handle`` is ``MultiplayerManager.update`` (decoding, spawning remote
+players, projectiles and particles, applying damage), ``step`` is the
+engine step that updates and renders what was spawned.
+
+    python benchmarks/loadgen.py --bots 16 --duration 20 --capture fight.ncap
+    python benchmarks/bench_playback.py fight.ncap --speed 10
+
+Needs Ursina.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import percentile  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="capture file, e.g. from loadgen.py --capture")
+    parser.add_argument("--speed", type=float, default=10, help="playback speed relative to the recording")
+    parser.add_argument("--fps", type=float, default=60, help="frames per second of playback time")
+    parser.add_argument("--window", choices=["none", "offscreen", "onscreen"], default="none")
+    args = parser.parse_args()
+
+    from ursina import Ursina
+
+    from multiplayer import MultiplayerManager
+
+    app = Ursina(window_type=args.window)
+    player = SimpleNamespace(world_x=0.0, world_y=1.0, world_z=0.0, rotation_y=0.0, health=10, current_gun=0, dead=False, healthbar=SimpleNamespace(value=10))
+    manager = MultiplayerManager(player)
+    frame = [0]
+    net = manager.playback(args.capture, speed=args.speed, clock=lambda: frame[0] / args.fps)
+
+    handle, step = [], []
+    while not net.finished:
+        frame[0] += 1
+        start = time.perf_counter()
+        manager.update()
+        handle.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        app.step()
+        step.append(time.perf_counter() - start)
+
+    received = sorted(net.received.totals.items(), key=lambda item: -item[1])
+    print(f"{frame[0]} frames, {sum(n for _, n in received)} messages: " + ", ".join(f"{n} {kind}" for kind, n in received))
+    print(f"remote players {len(manager.remote_players)}, decode errors {net.decode_errors}")
+    print(f"{'per frame':<10} {'mean':>8} {'p50':>8} {'p99':>8} {'max':>8} {'total':>8}")
+    for name, values in (("handle", handle), ("step", step)):
+        ms = [v * 1000 for v in values]
+        print(f"{name:<10} {statistics.fmean(ms):>8.3f} {percentile(ms, 50):>8.3f} {percentile(ms, 99):>8.3f} "
+              f"{max(ms):>8.3f} {sum(values):>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Receive path throughput and allocations on a saturated loopback link:
+``recv`` plus a copy into the reader against ``FrameReader.recv_into``.
+
+A sender process writes a stream of binary frames (the ``bench_messages``
+samples in turn) to a TCP loopback socket as fast as it can. The receiver
+reads it with each path and walks every frame, decoding them with --decode.
+
+``recv + feed`` is the reader as it was before ``recv_into``: every read is
+a new ``bytes`` object appended to a ``bytearray``, and consumed frames are
+deleted from its front. Allocations are measured in a second, shorter pass
+under tracemalloc: the peak of traced memory above where it stood before
+each read, summed over reads and divided by the frames received.
+
+    python benchmarks/bench_recv.py --duration 3 --decode
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_messages import SAMPLES  # noqa: E402
+from protocol import FRAME_HEADER, READ_SIZE, FrameReader  # noqa: E402
+from schema import ENCODING_BINARY, decode_binary, encode_payload  # noqa: E402
+
+OLD_RECV_SIZE = 2048
+
+
+class FeedReader:
+    """The FrameReader before recv_into: a growing bytearray, trimmed after every pass."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def recv_into(self, sock, size: int) -> int:
+        data = sock.recv(size)
+        self.buffer += data
+        return len(data)
+
+    def frames(self):
+        buf = self.buffer
+        end = len(buf)
+        offset = 0
+        view = memoryview(buf)
+        body = None
+        try:
+            while end - offset >= FRAME_HEADER.size:
+                length, kind = FRAME_HEADER.unpack_from(buf, offset)
+                start = offset + FRAME_HEADER.size
+                if end - start < length:
+                    break
+                offset = start + length
+                body = view[start:offset]
+                yield kind, body
+                body.release()
+        finally:
+            if body is not None:
+                body.release()
+            view.release()
+            del buf[:offset]
+
+
+def sender(port: int, duration: float):
+    block = b"".join(encode_payload(payload, ENCODING_BINARY) for payload in SAMPLES.values()) * 200
+    sock = socket.create_connection(("127.0.0.1", port))
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            sock.sendall(block)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def receive(reader, size: int, duration: float, decode: bool, trace: bool) -> dict:
+    listener = socket.create_server(("127.0.0.1", 0))
+    proc = multiprocessing.Process(target=sender, args=(listener.getsockname()[1], duration))
+    proc.start()
+    sock, _ = listener.accept()
+    listener.close()
+    frames = received = 0
+    allocated = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            if trace:
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            n = reader.recv_into(sock, size)
+            if not n:
+                break
+            received += n
+            for _, body in reader.frames():
+                if decode:
+                    decode_binary(body)
+                frames += 1
+            if trace:
+                allocated += tracemalloc.get_traced_memory()[1] - base
+    finally:
+        elapsed = time.perf_counter() - start
+        sock.close()
+        proc.join()
+    return {"frames": frames, "bytes": received, "seconds": elapsed, "allocated": allocated}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--trace-duration", type=float, default=1)
+    parser.add_argument("--decode", action="store_true", help="decode every frame too")
+    args = parser.parse_args()
+
+    print(f"{'receive path':<22} {'frames/s':>11} {'MB/s':>7} {'alloc B/frame':>14}")
+    for name, make_reader, size in (
+        (f"recv({OLD_RECV_SIZE}) + feed", FeedReader, OLD_RECV_SIZE),
+        (f"recv({READ_SIZE}) + feed", FeedReader, READ_SIZE),
+        (f"recv_into({READ_SIZE})", FrameReader, READ_SIZE),
+    ):
+        r = receive(make_reader(), size, args.duration, args.decode, trace=False)
+        tracemalloc.start()
+        traced = receive(make_reader(), size, args.trace_duration, args.decode, trace=True)
+        tracemalloc.stop()
+        print(f"{name:<22} {r['frames'] / r['seconds']:>11,.0f} {r['bytes'] / r['seconds'] / 1e6:>7.1f} "
+              f"{traced['allocated'] / max(1, traced['frames']):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
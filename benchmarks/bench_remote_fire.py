@@ -0,0 +1,129 @@
+"""
+Frame time under sustained remote fire: an entity per remote projectile
+against the ``ProjectilePool``.
+
+Shots arrive at --rate a second, spread over frames paced at --fps in real
+time, for --duration seconds, from spread-out positions and directions. A
+--rocket-share of them are rockets. Reported per frame: the time to spawn
+that frame's shots plus the engine step that moves and renders everything,
+and the number of entities in the scene at the end.
+
+``entity per shot`` is remote projectiles as they were before the pool:
+a new entity with its own trail child, ``update`` and destroy timer.
+
+    python benchmarks/bench_remote_fire.py --rate 600 --duration 10
+
+Needs Ursina.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import percentile  # noqa: E402
+
+
+def legacy_spawner():
+    from ursina import Entity, Vec3, color, destroy
+    from ursina import time as utime
+
+    class RemoteProjectile(Entity):
+        def __init__(self, position, rotation, kind="bullet"):
+            super().__init__(
+                model="bullet.obj" if kind == "bullet" else "rocket.obj",
+                texture="level.png",
+                scale=0.08 if kind == "bullet" else 0.2,
+                position=position,
+                rotation=rotation,
+            )
+            self.speed = 2000 if kind == "bullet" else 600
+            trail_color = color.azure if kind == "bullet" else color.orange
+            self.trail = Entity(model="cube", scale=(0.02, 0.02, 0.3), color=trail_color, parent=self)
+            destroy(self, delay=2)
+
+        def update(self):
+            self.position += self.forward * self.speed * utime.dt
+
+    def spawn(position, rotation, kind, direction):
+        proj = RemoteProjectile(position=position, rotation=rotation, kind=kind)
+        dir_vec = Vec3(*direction)
+        if dir_vec.length() > 0:
+            proj.look_at(proj.position + dir_vec)
+
+    return spawn, None
+
+
+def pool_spawner():
+    from projectile_pool import ProjectilePool
+
+    pool = ProjectilePool()
+
+    def spawn(position, rotation, kind, direction):
+        pool.spawn(position, rotation, kind=kind, direction=direction)
+
+    return spawn, pool
+
+
+def run(app, make_spawner, args) -> dict:
+    from ursina import Vec3, scene
+
+    rng = random.Random(1)
+    spawn, pool = make_spawner()
+    frames = int(args.duration * args.fps)
+    per_frame = args.rate / args.fps
+    owed = 0.0
+    frame_times = []
+    next_frame = time.perf_counter()
+    for _ in range(frames):
+        owed += per_frame
+        start = time.perf_counter()
+        while owed >= 1:
+            owed -= 1
+            position = Vec3(rng.uniform(-60, 60), rng.uniform(1, 10), rng.uniform(-60, 60))
+            direction = (rng.uniform(-1, 1), rng.uniform(-0.2, 0.2), rng.uniform(-1, 1))
+            kind = "rocket" if rng.random() < args.rocket_share else "bullet"
+            spawn(position, (0, rng.uniform(0, 360), 0), kind, direction)
+        app.step()
+        frame_times.append(time.perf_counter() - start)
+        next_frame += 1 / args.fps
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    entities = len(scene.entities)
+    if pool is not None:
+        entities = f"{entities} ({pool.live} live)"
+    return {"frame_times": frame_times, "entities": entities}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=300, help="remote shots per second")
+    parser.add_argument("--rocket-share", type=float, default=0.1)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--window", choices=["none", "offscreen", "onscreen"], default="none")
+    args = parser.parse_args()
+
+    from ursina import Ursina
+
+    app = Ursina(window_type=args.window)
+    print(f"{'projectiles':<16} {'mean ms':>8} {'p50':>8} {'p99':>8} {'max':>8}  entities")
+    for name, make_spawner in (("entity per shot", legacy_spawner), ("pool", pool_spawner)):
+        r = run(app, make_spawner, args)
+        ms = [v * 1000 for v in r["frame_times"]]
+        print(f"{name:<16} {statistics.fmean(ms):>8.3f} {percentile(ms, 50):>8.3f} {percentile(ms, 99):>8.3f} "
+              f"{max(ms):>8.3f}  {r['entities']}")
+        # Let the legacy projectiles' destroy timers run out before the next pass
+        deadline = time.perf_counter() + 2.5
+        while time.perf_counter() < deadline:
+            app.step()
+
+
+if __name__ == "__main__":
+    main()
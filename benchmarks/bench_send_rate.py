@@ -0,0 +1,103 @@
+"""
+Player state messages sent by a high frame rate client, with and without
+the send rate limit and change check.
+
+The client calls ``send_player`` every frame at --fps. It walks for
+--walk seconds, then stands still for --idle seconds, repeatedly. A second
+client watches, to check it still ends up with the final position.
+
+    python benchmarks/bench_send_rate.py --fps 240 --duration 12
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import free_port, start_server  # noqa: E402
+from network import HEARTBEAT_INTERVAL, SEND_RATE, Network  # noqa: E402
+
+
+def run(port: int, args, send_rate, heartbeat) -> dict:
+    client = Network("127.0.0.1", port, "sender", send_rate=send_rate, heartbeat=heartbeat)
+    watcher = Network("127.0.0.1", port, "watcher")
+    client.connect()
+    watcher.connect()
+    client.settimeout(0.0)
+    watcher.settimeout(0.0)
+    player = SimpleNamespace(world_x=0.0, world_y=1.0, world_z=0.0, rotation_y=0.0, health=10, current_gun=0)
+    seen = None
+    frame = 1 / args.fps
+    start = time.perf_counter()
+    next_frame = start
+    try:
+        while (t := time.perf_counter() - start) < args.duration:
+            if t % (args.walk + args.idle) < args.walk:
+                player.world_x = 10 * math.sin(t)
+                player.rotation_y = (t * 90) % 360
+            client.send_player(player)
+            while client.receive_info():
+                pass
+            seen = latest_position(watcher, client.id, seen)
+            next_frame += frame
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+        time.sleep(args.walk + args.idle)  # long enough for a heartbeat to land
+        client.send_player(player)
+        deadline = time.perf_counter() + 1.0
+        while time.perf_counter() < deadline:
+            seen = latest_position(watcher, client.id, seen)
+            time.sleep(0.01)
+    finally:
+        client.close()
+        watcher.close()
+    return {
+        "sent_per_second": client.sent.totals.get("player", 0) / args.duration,
+        "skipped": client.player_sends_skipped,
+        "final_error": math.dist(seen, (player.world_x, player.world_y, player.world_z)) if seen else float("nan"),
+    }
+
+
+def latest_position(net: Network, player_id: str, seen):
+    while True:
+        msg = net.receive_info()
+        if not msg:
+            return seen
+        for m in msg if isinstance(msg, list) else (msg,):
+            if m.get("object") == "snapshot":
+                for state in m["players"]:
+                    if str(state.get("id")) == player_id and "position" in state:
+                        seen = state["position"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", type=float, default=240)
+    parser.add_argument("--duration", type=float, default=12)
+    parser.add_argument("--walk", type=float, default=2)
+    parser.add_argument("--idle", type=float, default=2)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server("eventloop", port, 4, 30)
+    try:
+        print(f"{'client':<28} {'sent/s':>8} {'skipped':>8} {'final error':>12}")
+        for name, send_rate, heartbeat in (
+            ("every frame", None, None),
+            (f"{SEND_RATE:g} Hz cap", SEND_RATE, None),
+            (f"{SEND_RATE:g} Hz cap + change check", SEND_RATE, HEARTBEAT_INTERVAL),
+        ):
+            r = run(port, args, send_rate, heartbeat)
+            print(f"{name:<28} {r['sent_per_second']:>8.1f} {r['skipped']:>8} {r['final_error']:>12.3f}")
+            time.sleep(0.2)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
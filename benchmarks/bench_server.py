@@ -0,0 +1,181 @@
+"""
+Relay benchmark for the server cores.
+
+Starts ``server.py`` in a subprocess for each mode, connects N headless
+clients that send player updates at a fixed rate, and reports relayed
+player updates/sec and relay latency percentiles. For the event loop core an
+update counts once per entry in the ``snapshot`` messages it batches them in.
+
+    python benchmarks/bench_server.py --clients 10 32 64 --duration 5
+"""
+
+import argparse
+import os
+import selectors
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from protocol import KIND_JSON, decode_message, encode_message  # noqa: E402
+from network import Network  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(mode: str, port: int, max_players: int, tick_rate: float) -> subprocess.Popen:
+    launcher = (
+        "import server; "
+        f"server.main({mode!r}, '127.0.0.1', {port}, {max_players}, {tick_rate})"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", launcher], cwd=ROOT, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+class BenchClient:
+    def __init__(self, port: int, index: int):
+        # JSON keeps the send time in position.x at full precision (binary vectors are f32)
+        # and is all the threaded core speaks, so both cores relay the same bytes
+        net = Network("127.0.0.1", port, f"bot{index}", use_udp=False, use_state_codec=False, encoding="json")
+        net.connect()
+        self.id = net.id
+        self.sock = net.client
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.reader = net._reader
+        self.outbox = bytearray()
+        self.bytes_received = 0
+
+    def send_player(self, seq: int) -> bool:
+        # Snapshots only carry transform fields, so the send time rides in position.x
+        payload = {
+            "object": "player",
+            "id": self.id,
+            "position": (time.time(), 1, seq % 100),
+            "rotation": 0,
+            "health": 10,
+            "gun": 0,
+        }
+        if len(self.outbox) > 65536:
+            return False
+        self.outbox += encode_message(payload)
+        try:
+            del self.outbox[:self.sock.send(self.outbox)]
+        except BlockingIOError:
+            pass
+        return True
+
+    def read(self, latencies: list) -> int:
+        try:
+            data = self.sock.recv(65536)
+        except BlockingIOError:
+            return 0
+        now = time.time()
+        self.bytes_received += len(data)
+        self.reader.feed(data)
+        count = 0
+        for kind, body in self.reader.frames():
+            if kind != KIND_JSON:
+                continue
+            msg = decode_message(body)
+            if msg.get("object") == "snapshot":
+                states = msg["players"]
+            elif msg.get("object") == "player" and not msg.get("joined") and not msg.get("left"):
+                states = (msg,)
+            else:
+                continue
+            for state in states:
+                latencies.append(now - state["position"][0])
+                count += 1
+        return count
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(mode: str, n_clients: int, rate: float, duration: float, tick_rate: float) -> dict:
+    port = free_port()
+    proc = start_server(mode, port, n_clients, tick_rate)
+    try:
+        clients = []
+        for i in range(n_clients):
+            clients.append(BenchClient(port, i))
+            time.sleep(0.01)
+        time.sleep(0.5)
+
+        selector = selectors.DefaultSelector()
+        for client in clients:
+            selector.register(client.sock, selectors.EVENT_READ, client)
+            client.read([])
+
+        latencies = []
+        received = sent = dropped = 0
+        interval = 1 / rate
+        start = next_tick = time.time()
+        seq = 0
+        while time.time() - start < duration:
+            now = time.time()
+            if now >= next_tick:
+                for client in clients:
+                    if client.send_player(seq):
+                        sent += 1
+                    else:
+                        dropped += 1
+                seq += 1
+                next_tick += interval
+            for key, _ in selector.select(max(0.0, next_tick - time.time())):
+                received += key.data.read(latencies)
+        elapsed = time.time() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    return {
+        "mode": mode,
+        "clients": n_clients,
+        "sent": sent,
+        "send_dropped": dropped,
+        "relayed_per_sec": received / elapsed,
+        "kb_in_per_sec": sum(client.bytes_received for client in clients) / elapsed / 1024,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["threaded", "eventloop"])
+    parser.add_argument("--clients", nargs="+", type=int, default=[10, 32, 64])
+    parser.add_argument("--rate", type=float, default=20, help="player updates per client per second")
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--tick-rate", type=float, default=30, help="event loop snapshot rate")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'clients':>7} {'relayed/s':>10} {'KB/s in':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for n_clients in args.clients:
+        for mode in args.modes:
+            result = run(mode, n_clients, args.rate, args.duration, args.tick_rate)
+            print(f"{result['mode']:<10} {result['clients']:>7} {result['relayed_per_sec']:>10.0f} {result['kb_in_per_sec']:>9.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Player state bandwidth: JSON messages vs the quantized delta codec.
+
+Each bot moves every frame, turns now and then and rarely changes health or
+gun, which is roughly what a match looks like. Reports per-message sizes,
+encode/decode throughput and the bytes per player per second both directions
+cost at the default send and snapshot rates.
+
+    python benchmarks/bench_state_codec.py --players 8
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from protocol import DATAGRAM_HEADER, dump_message  # noqa: E402
+from state_codec import PlayerStateCodec, SequenceHistory  # noqa: E402
+
+SEND_RATE = 60
+TICK_RATE = 30
+
+
+def script(player: int, frame: int) -> tuple:
+    t = frame / SEND_RATE
+    angle = player + t * 0.5
+    position = (math.cos(angle) * 80, 10 + (frame % 40 == 0) * 0.5, math.sin(angle) * 80)
+    rotation = (frame // 15 * 7.5 + player * 40) % 360
+    health = 100 - (frame // 300) * 10
+    gun = (frame // 600) % 3
+    return position, rotation, health, gun
+
+
+def json_state(player: int, frame: int) -> bytes:
+    position, rotation, health, gun = script(player, frame)
+    return dump_message({
+        "object": "player",
+        "id": str(player),
+        "position": position,
+        "rotation": rotation,
+        "health": health,
+        "gun": gun,
+        "joined": False,
+        "left": False,
+    })
+
+
+def json_snapshot(players: int, frame: int, viewer: int) -> bytes:
+    states = []
+    for p in range(players):
+        if p == viewer:
+            continue
+        position, rotation, health, gun = script(p, frame)
+        states.append({"id": str(p), "position": position, "rotation": rotation, "health": health, "gun": gun})
+    return dump_message({"object": "snapshot", "tick": frame, "players": states})
+
+
+def measure(players: int, seconds: float) -> dict:
+    codec = PlayerStateCodec()
+    frames = int(seconds * SEND_RATE)
+    ticks_per_send = SEND_RATE // TICK_RATE
+
+    json_up = json_down = codec_up = codec_down = 0
+    received = SequenceHistory(64)
+    sent = SequenceHistory(64)
+    snapshots = SequenceHistory(64)
+    acked_state = acked_snapshot = None
+    for frame in range(1, frames + 1):
+        # One client's uplink, acknowledged a couple of frames late
+        q = codec.quantize(*script(0, frame))
+        body = codec.encode_state(q, sent.get(acked_state), acked_state or 0, acked_snapshot or 0)
+        sent.put(frame, q)
+        decoded, _ = codec.decode_state(body, received)
+        received.put(frame, decoded)
+        if frame > 2:
+            acked_state = frame - 2
+        codec_up += DATAGRAM_HEADER.size + len(body)
+        json_up += DATAGRAM_HEADER.size + len(json_state(0, frame))
+
+        if frame % ticks_per_send:
+            continue
+        world = {p: codec.quantize(*script(p, frame)) for p in range(1, players)}
+        body = codec.encode_snapshot(world, snapshots.get(acked_snapshot), acked_snapshot or 0, frame)
+        snapshots.put(frame, world)
+        acked_snapshot = frame
+        codec_down += DATAGRAM_HEADER.size + len(body)
+        json_down += DATAGRAM_HEADER.size + len(json_snapshot(players, frame, 0))
+
+    return {
+        "json_up": json_up / seconds,
+        "codec_up": codec_up / seconds,
+        "json_down": json_down / seconds / (players - 1),
+        "codec_down": codec_down / seconds / (players - 1),
+    }
+
+
+def throughput(players: int, iterations: int) -> dict:
+    codec = PlayerStateCodec()
+    base = {p: codec.quantize(*script(p, 0)) for p in range(players)}
+    world = {p: codec.quantize(*script(p, 1)) for p in range(players)}
+    history = SequenceHistory()
+    history.put(1, base)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = codec.encode_snapshot(world, base, 1, 0)
+    encode = iterations / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        codec.decode_snapshot(body, history)
+    decode = iterations / (time.perf_counter() - start)
+
+    state = json_snapshot(players, 1, -1)
+    start = time.perf_counter()
+    for i in range(iterations):
+        json_snapshot(players, 1, -1)
+    json_encode = iterations / (time.perf_counter() - start)
+    return {"encode": encode, "decode": decode, "json_encode": json_encode, "json_size": len(state), "codec_size": len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    r = measure(args.players, args.seconds)
+    print(f"per player, {SEND_RATE} Hz sends / {TICK_RATE} Hz snapshots, including datagram headers")
+    print(f"{'':<8} {'up B/s':>9} {'down B/s':>9}")
+    print(f"{'json':<8} {r['json_up']:>9.0f} {r['json_down']:>9.0f}")
+    print(f"{'codec':<8} {r['codec_up']:>9.0f} {r['codec_down']:>9.0f}")
+    print(f"uplink -{(1 - r['codec_up'] / r['json_up']) * 100:.0f}%, snapshots -{(1 - r['codec_down'] / r['json_down']) * 100:.0f}%")
+
+    t = throughput(args.players, args.iterations)
+    print(
+        f"\n{args.players}-player snapshot: json {t['json_size']} B, delta {t['codec_size']} B; "
+        f"encode {t['encode']:,.0f}/s, decode {t['decode']:,.0f}/s (json dump {t['json_encode']:,.0f}/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Frame time with --trails moving trails: one batched line mesh per
+thickness against a mesh per trail.
+
+Each trail follows its own entity flying in a circle. Frames are paced at
+--fps in real time for --duration seconds. Reported per frame: the engine
+step, which samples every trail each 25 ms and renders them, and the
+number of line geometry nodes in the scene, one draw call each.
+
+``mesh per trail`` is ``TrailRenderer`` as it was before batching: its own
+line ``Mesh``, shifted with ``pop(0)``/``append`` and regenerated in full
+on every sample.
+
+    python benchmarks/bench_trails.py --trails 50 --window offscreen
+
+Needs Ursina.
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import percentile  # noqa: E402
+
+
+def legacy_trail():
+    from ursina import Entity, Mesh, color, destroy, lerp
+    from ursina import time as utime
+
+    class TrailRenderer(Entity):
+        def __init__(self, thickness=10, color=color.white, end_color=color.clear, length=6, **kwargs):
+            super().__init__(**kwargs)
+            self.renderer = Entity(model=Mesh(
+                vertices=[self.world_position for i in range(length)],
+                colors=[lerp(end_color, color, i / length * 2) for i in range(length)],
+                mode="line",
+                thickness=thickness,
+                static=False,
+            ))
+            self._t = 0
+            self.update_step = .025
+
+        def update(self):
+            self._t += utime.dt
+            if self._t >= self.update_step:
+                self._t = 0
+                self.renderer.model.vertices.pop(0)
+                self.renderer.model.vertices.append(self.world_position)
+                self.renderer.model.generate()
+
+        def on_destroy(self):
+            destroy(self.renderer)
+
+    return TrailRenderer
+
+
+def batched_trail():
+    from trail_renderer import TrailRenderer
+
+    return TrailRenderer
+
+
+def run(app, make_trail, args) -> dict:
+    from ursina import Entity, color, destroy, scene
+
+    TrailRenderer = make_trail()
+    movers = []
+    for i in range(args.trails):
+        mover = Entity()
+        mover.phase = i * 2 * math.pi / args.trails
+        TrailRenderer(8, color.azure, color.clear, 5, parent=mover)
+        movers.append(mover)
+
+    frame_times = []
+    next_frame = time.perf_counter()
+    for frame in range(int(args.duration * args.fps)):
+        t = frame / args.fps
+        for mover in movers:
+            angle = mover.phase + t * 3
+            mover.position = (math.cos(angle) * 30, 5 + math.sin(angle * 2), math.sin(angle) * 30)
+        start = time.perf_counter()
+        app.step()
+        frame_times.append(time.perf_counter() - start)
+        next_frame += 1 / args.fps
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    geom_nodes = scene.findAllMatches("**/+GeomNode").getNumPaths()
+    for mover in movers:
+        destroy(mover)
+    return {"frame_times": frame_times, "geom_nodes": geom_nodes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trails", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--window", choices=["none", "offscreen", "onscreen"], default="offscreen")
+    args = parser.parse_args()
+
+    from ursina import Ursina
+
+    app = Ursina(window_type=args.window)
+    print(f"{'trails':<15} {'mean ms':>8} {'p50':>8} {'p99':>8} {'max':>8}  geom nodes")
+    for name, make_trail in (("mesh per trail", legacy_trail), ("batched", batched_trail)):
+        r = run(app, make_trail, args)
+        ms = [v * 1000 for v in r["frame_times"]]
+        print(f"{name:<15} {statistics.fmean(ms):>8.3f} {percentile(ms, 50):>8.3f} {percentile(ms, 99):>8.3f} "
+              f"{max(ms):>8.3f}  {r['geom_nodes']}")
+        for _ in range(3):
+            app.step()
+
+
+if __name__ == "__main__":
+    main()
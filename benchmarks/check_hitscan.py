@@ -0,0 +1,150 @@
+"""
+Check that player hits no longer depend on frame rate.
+
+Enemy-like targets stand around the camera at increasing distances. At each of
+--fps frame rates (frames paced in real time), the camera aims at every
+target in turn and fires one shot per frame, then frames run until every
+bullet is done. Damage taken by the targets counts the hits.
+
+``hitscan`` is ``Bullet`` as it is now: the hit is resolved by one ray
+when the shot is fired. ``polled`` is the bullet before hitscan: it flies
+at ~150 units a second towards what the crosshair was on, and counts a hit
+on the first frame it is within 3 units, so at low frame rates it steps
+over the target. Exits non-zero if the hitscan hits differ between frame
+rates or miss a target.
+
+    python benchmarks/check_hitscan.py --fps 15 30 60 144
+
+Needs Ursina.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TARGET_HEALTH = 1000
+
+
+def polled_pool():
+    from ursina import Vec3, camera, curve, distance, raycast
+    from ursina import time as utime
+
+    from guns import HITSCAN_RANGE, Bullet, BulletPool
+
+    class PolledBullet(Bullet):
+        def _hitscan(self, aim):
+            # What mouse.hovered_entity gave: the entity under the crosshair
+            hovered = raycast(camera.world_position, camera.forward, distance=HITSCAN_RANGE, ignore=[self, self.gun, self.gun.player]).entity
+            self.hovered_point = hovered
+            if hovered is None:
+                return
+            target = Vec3(hovered.world_position) + (self.forward * 10000) + self.randomness
+            self.animate("position", target, distance(hovered.world_position + (self.forward * 10000), self.gun.player) / 150, curve=curve.linear)
+
+        def update(self):
+            self.age += utime.dt
+            if self.age >= self.expires:
+                self.release()
+                return
+            if self.hovered_point is not None and distance(self, self.hovered_point) < 3:
+                if self._handle_hit(self.hovered_point):
+                    self.release()
+
+    class PolledPool(BulletPool):
+        def fill(self):
+            while len(self.free) + len(self.live) < self.size:
+                self.free.append(PolledBullet(self))
+
+    return PolledPool()
+
+
+def hitscan_pool():
+    from guns import BulletPool
+
+    return BulletPool()
+
+
+def make_scene(count: int):
+    from ursina import Entity, camera
+
+    player = Entity(position=(0, 0, -2))
+    player.map = Entity()
+    player.multiplayer = None
+    player.dead = False
+    player.shot_enemy = lambda: None
+    gun = Entity(parent=camera, position=(0.5, -0.75, 1.7))
+    gun.tip = Entity(parent=gun, position=(-0.5, 1.3, 1.5))
+    gun.player = player
+    gun.gun_type = "rifle"
+    gun.damage = 1
+
+    targets = []
+    for i in range(count):
+        # One per direction around the camera, so none stands in front of another
+        angle = i * 2 * math.pi / count
+        reach = 20 + i * 230 / max(1, count - 1)
+        target = Entity(model="cube", collider="box", scale=2, position=(math.sin(angle) * reach, 0, math.cos(angle) * reach))
+        target.reset_pos = lambda: None
+        targets.append(target)
+    return gun, targets
+
+
+def run(app, pool, gun, targets, fps: float) -> int:
+    from ursina import camera
+
+    for target in targets:
+        target.health = TARGET_HEALTH
+    camera.position = (0, 0, 0)
+
+    def frame(next_frame):
+        app.step()
+        next_frame += 1 / fps
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return next_frame
+
+    next_frame = time.perf_counter()
+    for target in targets:
+        camera.look_at(target)
+        pool.fire(gun, gun.tip.world_position)
+        next_frame = frame(next_frame)
+    while pool.live:
+        next_frame = frame(next_frame)
+    return sum(TARGET_HEALTH - target.health for target in targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", type=float, nargs="+", default=[15, 30, 60, 144])
+    parser.add_argument("--targets", type=int, default=20)
+    args = parser.parse_args()
+
+    from ursina import Ursina
+
+    os.chdir(ROOT)  # hit particles load their shaders relative to the game directory
+    app = Ursina(window_type="none")
+    gun, targets = make_scene(args.targets)
+    pools = {"hitscan": hitscan_pool(), "polled": polled_pool()}
+
+    print(f"{'fps':>6} " + " ".join(f"{name:>9}" for name in pools))
+    results = {name: [] for name in pools}
+    for fps in args.fps:
+        for name, pool in pools.items():
+            results[name].append(run(app, pool, gun, targets, fps))
+        print(f"{fps:>6g} " + " ".join(f"{results[name][-1]:>5}/{len(targets):<3}" for name in pools))
+
+    hitscan = results["hitscan"]
+    if len(set(hitscan)) != 1 or hitscan[0] != len(targets):
+        print("hitscan hits depend on frame rate or missed a target")
+        sys.exit(1)
+    print("hitscan hits are the same at every frame rate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Headless load generator: N bot players against a real server, no Ursina.
+
+Every bot is a ``network.Network`` client driving a stand-in player. Bots
+run laps along their own lane, send ``send_player`` at --rate, and spend
+part of the time in firefights using the game's guns and fire rates: each
+shot sends a projectile and a seeded impact effect, and hits also send
+a damage claim with the shot's origin and direction. Rockets send a
+splash claim and an explosion effect. Bots that die send zero health, wait, respawn.
+
+Latency is measured end to end, from one bot sending its state to
+another bot receiving it in a snapshot or relay. Bots move at a known
+speed, so the send time can be recovered from the position received.
+Claim latency runs from ``send_damage`` to the shooter seeing the
+server's ``damage`` message. The server confirms a shooter's claims on a
+target in the order they were sent, so each confirmation is matched with
+the oldest claim on that target still waiting; claims left unconfirmed
+for CLAIM_TIMEOUT (rejected ones) are forgotten.
+
+By default the server runs in a subprocess, which reports the CPU time
+it used during the run (and, for the event loop core, its traffic and
+hit validation counters). Use --connect to load a server that is
+already running; its CPU is then not reported.
+
+--capture records everything the first bot receives, for replaying the
+fight through the client with bench_playback.py.
+
+    python benchmarks/loadgen.py --bots 16 --duration 30 --out load.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import selectors
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_server import free_port, percentile  # noqa: E402
+from network import Network  # noqa: E402
+
+# Lap geometry: bots run along x at a fixed speed and wrap around
+TRACK_LENGTH = 120.0
+TRACK_SPEED = 10.0  # units/s; at 1/64 unit precision that's ~1.6 ms resolution
+LANES = 8
+LANE_SPACING = 6.0
+
+# Guns in Player.guns order: (weight, cooldown s, pellets, damage per hit, kind)
+GUNS = [
+    (0.35, 0.2, (1, 1), 0.8, "bullet"),  # rifle
+    (0.20, 0.8, (2, 4), 1.0, "bullet"),  # shotgun
+    (0.20, 0.3, (1, 1), 1.0, "bullet"),  # pistol
+    (0.15, 0.1, (1, 1), 0.5, "bullet"),  # minigun
+    (0.10, 5.0, (1, 1), 10.0, "rocket"),  # rocket launcher
+]
+PLAYER_HEALTH = 10
+EYE_HEIGHT = 2.0
+BODY_HEIGHT = 2.1
+ROCKET_FLIGHT = 0.5
+RESPAWN_DELAY = 2.0
+CLAIM_TIMEOUT = 1.0  # seconds before an unconfirmed claim is taken as rejected
+
+# Runs a server core, reports its CPU time between "start" and "stop" on stdin
+LAUNCHER = """
+import json, sys, threading, time
+import server
+mode, port, max_players, tick_rate = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4])
+srv = None
+if mode == "eventloop":
+    srv = server.EventLoopServer("127.0.0.1", port, max_players, tick_rate)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+else:
+    threading.Thread(target=server.run_threaded, args=("127.0.0.1", port, max_players), daemon=True).start()
+
+cpu = wall = 0.0
+for line in sys.stdin:
+    if line.strip() == "start":
+        cpu, wall = time.process_time(), time.perf_counter()
+    elif line.strip() == "stop":
+        report = {"cpu_seconds": time.process_time() - cpu, "wall_seconds": time.perf_counter() - wall}
+        try:
+            import resource
+            report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except ImportError:
+            pass
+        if srv is not None:
+            report["traffic"] = srv.stats.as_dict()
+            report["outbound"] = {k: v for k, v in srv.outbound_stats().items() if k != "queued_bytes"}
+            report["hits_confirmed"] = srv.hits_confirmed
+            report["hits_rejected"] = srv.hits_rejected
+        print("REPORT", json.dumps(report), file=sys.stderr, flush=True)
+        break
+"""
+
+
+class ServerProcess:
+    """A server core in a subprocess that can report its own CPU usage."""
+
+    def __init__(self, mode: str, port: int, max_players: int, tick_rate: float):
+        self.mode = mode
+        self.proc = subprocess.Popen(
+            [sys.executable, "-c", LAUNCHER, mode, str(port), str(max_players), str(tick_rate)],
+            cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        self.report = None
+        self._reported = threading.Event()
+        threading.Thread(target=self._follow, daemon=True).start()
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                return
+            except OSError:
+                time.sleep(0.05)
+        self.proc.kill()
+        raise RuntimeError(f"{mode} server did not start")
+
+    def _follow(self):
+        for line in self.proc.stderr:
+            if line.startswith("REPORT "):
+                self.report = json.loads(line[len("REPORT "):])
+                self._reported.set()
+
+    def _command(self, cmd: str):
+        self.proc.stdin.write(cmd + "\n")
+        self.proc.stdin.flush()
+
+    def start(self):
+        self._command("start")
+
+    def stop(self) -> dict | None:
+        self._command("stop")
+        self._reported.wait(5)
+        self.proc.terminate()
+        self.proc.wait()
+        return self.report
+
+
+def lap_x(t: float, phase: float) -> float:
+    return (t * TRACK_SPEED + phase) % TRACK_LENGTH - TRACK_LENGTH / 2
+
+
+def sent_ago(x: float, now: float, phase: float) -> float | None:
+    """
+    How long ago a bot with ``phase`` was at ``x``, given it is laps ahead
+    now. None if ``x`` is ahead of the bot (quantized or extrapolated
+    past it), which would otherwise wrap to almost a whole lap.
+    """
+    travelled = (now * TRACK_SPEED + phase - (x + TRACK_LENGTH / 2)) % TRACK_LENGTH
+    if travelled > TRACK_LENGTH / 2:
+        return None
+    return travelled / TRACK_SPEED
+
+
+class Bot:
+    """One simulated player: a Network client plus the state a Player would hold."""
+
+    def __init__(self, index: int, addr: str, port: int, args, rng: random.Random):
+        self.index = index
+        self.rng = rng
+        self.phase = rng.uniform(0, TRACK_LENGTH)
+        self.player = SimpleNamespace(world_x=0.0, world_y=1.0, world_z=(index % LANES - LANES / 2) * LANE_SPACING, rotation_y=90.0, health=PLAYER_HEALTH, current_gun=0)
+        capture = args.capture if index == 0 else None
+        self.net = Network(addr, port, f"bot{index}", use_udp=args.udp, use_state_codec=args.codec, capture=capture, encoding=args.encoding)
+        self.net.connect()
+        self.net.settimeout(0.0)
+
+        self.engaged_until = 0.0
+        self.next_engagement = rng.uniform(0, 2)
+        self.next_shot = 0.0
+        self.next_gun_switch = rng.uniform(5, 15)
+        self.dead_until = None
+        self.rockets = []  # (explode at, centre, target bot)
+        self.claims = {}  # target id -> send times of claims awaiting confirmation, oldest first
+
+    def position(self) -> tuple:
+        return (self.player.world_x, self.player.world_y, self.player.world_z)
+
+    def move(self, t: float):
+        self.player.world_x = lap_x(t, self.phase)
+
+    def update(self, t: float, now: float, bots: list, counts: dict, miss_rate: float):
+        """One frame: move, send state, maybe fight."""
+        self.move(t)
+        if self.dead_until is not None and t >= self.dead_until:
+            self.dead_until = None
+            self.player.health = PLAYER_HEALTH
+        before = self.net.sent.totals.get("player", 0)
+        self.net.send_player(self.player)
+        counts["player"] += self.net.sent.totals.get("player", 0) - before
+
+        for rocket in [r for r in self.rockets if r[0] <= t]:
+            self.rockets.remove(rocket)
+            self._explode(rocket[1], rocket[2], bots, counts, now)
+
+        if self.dead_until is not None:
+            return
+        if t >= self.next_gun_switch:
+            weights = [gun[0] for gun in GUNS]
+            self.player.current_gun = self.rng.choices(range(len(GUNS)), weights)[0]
+            self.next_gun_switch = t + self.rng.uniform(5, 15)
+        if t >= self.next_engagement:
+            self.engaged_until = t + self.rng.uniform(1, 4)
+            self.next_engagement = self.engaged_until + self.rng.uniform(1, 4)
+        if t < self.engaged_until and t >= self.next_shot:
+            self._fire(t, now, bots, counts, miss_rate)
+
+    def _fire(self, t: float, now: float, bots: list, counts: dict, miss_rate: float):
+        _, cooldown, pellets, damage, kind = GUNS[self.player.current_gun]
+        self.next_shot = t + cooldown
+        others = [b for b in bots if b is not self and b.net.id is not None]
+        if not others:
+            return
+        target = self.rng.choice(others)
+        x, y, z = self.position()
+        origin = (x, y + EYE_HEIGHT, z)
+        aim = (target.player.world_x, target.player.world_y + BODY_HEIGHT, target.player.world_z)
+        direction = tuple(a - o for a, o in zip(aim, origin))
+        self.player.rotation_y = math.degrees(math.atan2(direction[0], direction[2]))
+
+        if kind == "rocket":
+            self.net.send_projectile(origin, (0, self.player.rotation_y, 0), kind="rocket", direction=direction)
+            counts["projectile"] += 1
+            self.rockets.append((t + ROCKET_FLIGHT, aim, target))
+            return
+
+        for _ in range(self.rng.randint(*pellets)):
+            self.net.send_projectile(origin, (0, self.player.rotation_y, 0), kind="bullet", direction=direction)
+            counts["projectile"] += 1
+            if self.rng.random() < miss_rate:
+                # Sprayed wide of the target: sparks on the wall behind it
+                self.net.send_effect("impact", (aim[0] + 30, aim[1], aim[2]), self.rng.getrandbits(32))
+                counts["effect"] += 1
+                continue
+            self.net.send_effect("hit", aim, self.rng.getrandbits(32))
+            counts["effect"] += 1
+            self.claims.setdefault(target.net.id, deque()).append(now)
+            self.net.send_damage(target.net.id, damage, origin=origin, direction=direction)
+            counts["damage"] += 1
+
+    def _explode(self, centre, target: "Bot", bots: list, counts: dict, now: float):
+        self.net.send_effect("rocket_impact", centre, self.rng.getrandbits(32))
+        counts["effect"] += 1
+        for bot in bots:
+            if bot is not self and bot.net.id is not None and math.dist(centre, bot.position()) < 10:
+                self.claims.setdefault(bot.net.id, deque()).append(now)
+                self.net.send_damage(bot.net.id, max(0.0, 10 - math.dist(centre, bot.position())), splash=centre)
+                counts["damage"] += 1
+
+    def receive(self, t: float, now: float, phases: dict, results: dict):
+        msg = self.net.receive_info()
+        for m in msg if isinstance(msg, list) else (msg,) if msg else ():
+            kind = m.get("object")
+            results["received"][kind] = results["received"].get(kind, 0) + 1
+            if kind == "snapshot":
+                for state in m["players"]:
+                    self._state_latency(state, t, phases, results)
+            elif kind == "player" and not m.get("joined") and not m.get("left"):
+                self._state_latency(m, t, phases, results)
+            elif kind == "damage":
+                self._damage(m, now, t, results)
+
+    def _state_latency(self, state: dict, t: float, phases: dict, results: dict):
+        phase = phases.get(str(state.get("id")))
+        if phase is None or "position" not in state:
+            return
+        ago = sent_ago(state["position"][0], t, phase)
+        if ago is None:
+            results["state_ahead"] += 1
+            return
+        results["state_latency"].append(ago)
+
+    def _damage(self, m: dict, now: float, t: float, results: dict):
+        if str(m.get("id")) == self.net.id:
+            results["confirmed"] += 1
+            pending = self.claims.get(str(m.get("target")))
+            while pending and now - pending[0] > CLAIM_TIMEOUT:
+                pending.popleft()
+            if pending:
+                results["claim_latency"].append(now - pending.popleft())
+        if str(m.get("target")) == self.net.id and self.dead_until is None:
+            health = m.get("health")
+            self.player.health = max(0.0, self.player.health - float(m["amount"])) if health is None else float(health)
+            if self.player.health <= 0:
+                self.player.health = 0
+                self.dead_until = t + RESPAWN_DELAY
+                results["deaths"] += 1
+
+
+def summary(values: list) -> dict:
+    ms = [v * 1000 for v in values]
+    return {
+        "count": len(ms),
+        "p50_ms": percentile(ms, 50),
+        "p90_ms": percentile(ms, 90),
+        "p99_ms": percentile(ms, 99),
+        "max_ms": max(ms, default=float("nan")),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        host, port = host or "127.0.0.1", int(port)
+    else:
+        host, port = "127.0.0.1", free_port()
+        server = ServerProcess(args.mode, port, args.bots, args.tick_rate)
+
+    rng = random.Random(args.seed)
+    selector = selectors.DefaultSelector()
+    bots = []
+    try:
+        for i in range(args.bots):
+            bots.append(Bot(i, host, port, args, random.Random(rng.random())))
+            time.sleep(args.join_interval)
+        phases = {bot.net.id: bot.phase for bot in bots}
+
+        counts = {"player": 0, "projectile": 0, "effect": 0, "damage": 0}
+        results = {"received": {}, "state_latency": [], "state_ahead": 0, "claim_latency": [], "confirmed": 0, "deaths": 0}
+        epoch = time.perf_counter()
+        for bot in bots:
+            bot.move(0.0)
+        # Warm-up frames let UDP channels come up before anything is measured
+        warm_until = args.warmup
+        measuring = False
+        registered = set()
+        frames = 0
+        interval = 1 / args.rate
+        next_frame = 0.0
+        while True:
+            t = time.perf_counter() - epoch
+            if t >= warm_until + args.duration:
+                break
+            if not measuring and t >= warm_until:
+                measuring = True
+                counts = dict.fromkeys(counts, 0)
+                results = {"received": {}, "state_latency": [], "state_ahead": 0, "claim_latency": [], "confirmed": 0, "deaths": 0}
+                frames = 0
+                if server is not None:
+                    server.start()
+            for bot in bots:
+                for sock in (bot.net.client, bot.net.udp):
+                    if sock is not None and sock not in registered:
+                        selector.register(sock, selectors.EVENT_READ, bot)
+                        registered.add(sock)
+
+            if t >= next_frame:
+                now = time.perf_counter()
+                for bot in bots:
+                    bot.update(t, now, bots, counts, args.miss_rate)
+                frames += 1
+                next_frame += interval
+                if next_frame < t:
+                    next_frame = t + interval  # fell behind; don't try to catch up in a burst
+
+            timeout = max(0.0, next_frame - (time.perf_counter() - epoch))
+            ready = {key.data for key, _ in selector.select(timeout)}
+            now = time.perf_counter()
+            for bot in ready:
+                bot.receive(now - epoch, now, phases, results)
+    finally:
+        server_report = server.stop() if server is not None else None
+        for bot in bots:
+            bot.net.close()
+        selector.close()
+
+    report = {
+        "tool": "loadgen",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "mode": None if args.connect else args.mode,
+            "connect": args.connect,
+            "bots": args.bots,
+            "rate": args.rate,
+            "duration": args.duration,
+            "tick_rate": args.tick_rate,
+            "udp": args.udp,
+            "state_codec": args.codec,
+            "encoding": args.encoding,
+            "miss_rate": args.miss_rate,
+            "seed": args.seed,
+        },
+        "sent": counts,
+        "sent_per_second": {k: v / args.duration for k, v in counts.items()},
+        "achieved_rate": frames / args.duration,
+        "received": results["received"],
+        "state_latency": summary(results["state_latency"]),
+        "state_ahead": results["state_ahead"],
+        "claim_latency": summary(results["claim_latency"]),
+        "claims_confirmed": results["confirmed"],
+        "deaths": results["deaths"],
+        "server": server_report,
+    }
+    if server_report and server_report.get("wall_seconds"):
+        server_report["cpu_percent"] = 100 * server_report["cpu_seconds"] / server_report["wall_seconds"]
+    return report
+
+
+def print_report(report: dict):
+    config = report["config"]
+    print(f"{config['bots']} bots against {config['mode'] or config['connect']} for {config['duration']:g} s, "
+          f"{report['achieved_rate']:.1f}/{config['rate']:g} frames/s")
+    print("sent/s    " + "  ".join(f"{k} {v:.0f}" for k, v in report["sent_per_second"].items()))
+    for name in ("state_latency", "claim_latency"):
+        s = report[name]
+        print(f"{name:<14} n={s['count']:<7} p50 {s['p50_ms']:6.1f} ms  p90 {s['p90_ms']:6.1f} ms  p99 {s['p99_ms']:6.1f} ms  max {s['max_ms']:6.1f} ms")
+    print(f"states ahead of their sender (dropped) {report['state_ahead']}")
+    print(f"claims confirmed {report['claims_confirmed']}, deaths {report['deaths']}")
+    server = report["server"]
+    if server:
+        print(f"server cpu {server['cpu_seconds']:.2f} s ({server['cpu_percent']:.0f}% of one core)", end="")
+        if "hits_confirmed" in server:
+            print(f", hits {server['hits_confirmed']} confirmed / {server['hits_rejected']} rejected", end="")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["eventloop", "threaded"], default="eventloop", help="server core to start")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="load an already running server instead of starting one")
+    parser.add_argument("--bots", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=30, help="frames (player updates) per bot per second")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds, after warm-up")
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--tick-rate", type=float, default=30)
+    parser.add_argument("--miss-rate", type=float, default=0.6, help="fraction of bullets that miss")
+    parser.add_argument("--join-interval", type=float, default=0.02, help="seconds between bot joins")
+    parser.add_argument("--no-udp", dest="udp", action="store_false")
+    parser.add_argument("--no-codec", dest="codec", action="store_false", help="send JSON player updates")
+    parser.add_argument("--encoding", choices=["binary", "json"], default="binary", help="encoding for other messages")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--capture", help="record what the first bot receives to this capture file")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Capture files: everything a client received, as raw bytes with receive times.
+
+``Network(capture=path)`` writes one record per TCP read and per UDP
+datagram, handshake included, so the file holds all a client needs to
+decode the session again. ``network.NetworkPlayback`` replays it through
+the normal decoding path without a server.
+
+The file is gzip-compressed: a magic string, then per record a
+``!dBH`` header (seconds since the capture started, source, length)
+followed by the bytes.
+"""
+
+import gzip
+import struct
+import time
+
+CAPTURE_MAGIC = b"NCAP\x01"
+RECORD = struct.Struct("!dBH")
+SOURCE_TCP = 0
+SOURCE_UDP = 1
+
+
+class CaptureWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._file = gzip.open(path, "wb", compresslevel=6)
+        self._file.write(CAPTURE_MAGIC)
+        self._start = time.perf_counter()
+
+    def write(self, source: int, data: bytes) -> None:
+        self._file.write(RECORD.pack(time.perf_counter() - self._start, source, len(data)))
+        self._file.write(data)
+        self.records += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_capture(path: str):
+    """Yield ``(t, source, data)`` for every record in a capture file."""
+    with gzip.open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a network capture")
+        while header := f.read(RECORD.size):
+            if len(header) < RECORD.size:
+                raise ValueError(f"{path} is truncated")
+            t, source, length = RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                raise ValueError(f"{path} is truncated")
+            yield t, source, data
@@ -0,0 +1,37 @@
+"""
+Seeded particle bursts.
+
+A hit or impact is sent as one ``effect`` event (effect name, position and
+an RNG seed) instead of one ``particle`` message per particle. Sender and
+receivers run ``burst`` with the same seed, so every client spawns the same
+particles without them going over the wire.
+"""
+
+import random
+
+# name: (particle count, spray amount, texture, direction style)
+# "spread" directions dip up to 1 below the horizon, "upward" ones stay in the positive octant
+EFFECTS = {
+    "hit": (2, 10, "particle.png", "spread"),  # bullet or rocket hitting a player
+    "impact": (2, 30, "particle.png", "upward"),  # bullet hitting the level
+    "rocket_impact": (10, 30, "jetpack", "upward"),  # rocket hitting the level
+    "destroyed": (6, 10, "destroyed", "spread"),  # enemy destroyed
+}
+
+
+def new_seed() -> int:
+    return random.getrandbits(32)
+
+
+def burst(effect: str, seed: int) -> list:
+    """``(direction, spray, texture)`` for each particle of ``effect``; the same seed gives the same burst."""
+    count, spray, texture, style = EFFECTS[effect]
+    rng = random.Random(seed)
+    particles = []
+    for _ in range(count):
+        if style == "spread":
+            direction = (rng.random(), rng.randrange(-10, 10, 1) / 10, rng.random())
+        else:
+            direction = (rng.random(), rng.random(), rng.random())
+        particles.append((direction, spray, texture))
+    return particles
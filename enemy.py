@@ -1,6 +1,7 @@
 from ursina import *
-from particles import Particles
-from guns import Bullet
+from particles import particle_system
+from sounds import sound_manager
+from guns import bullet_pool
 
 class Enemy(Entity):
     def __init__(self, player, move_speed = 20, position = (0, 0, 0), **kwargs):
@@ -33,10 +34,6 @@ class Enemy(Entity):
 
         self.random = Vec3(random.randrange(-10, 10), random.randrange(0, 3), random.randrange(-10, 10))
 
-        # Audio
-        self.gun_sound = Audio("pistol.wav", False)
-        self.gun_sound.volume = 0.05
-
     def update(self):
         if distance(self, self.player) > 20:
             self.position += ((self.player.position + self.random) - self.position).normalized() * self.move_speed * time.dt
@@ -53,16 +50,15 @@ class Enemy(Entity):
             if self.cooldown_t >= self.cooldown_length:
                 self.cooldown_t = 0
                 self.cooldown_length = random.uniform(1.5, 3)
-                Bullet(self, self.barrel.world_position, 700, color.orange).enemy = self  
-                if distance_xz(self, self.player) < 40:
-                    self.gun_sound.play()  
+                bullet_pool.fire(self, self.barrel.world_position, 700, color.orange).enemy = self  
+                sound_manager.play("pistol", volume = 0.05, position = self.world_position)
 
         # Particles
         self.particle_t += time.dt
         if self.particle_t >= self.particle_amount:
             self.particle_t = 0
-            self.particles1 = Particles(self.thruster1.world_position, Vec3(random.random(), -random.random(), random.random()), 10, texture = "jetpack")
-            self.particles2 = Particles(self.thruster2.world_position, Vec3(random.random(), -random.random(), random.random()), 10, texture = "jetpack")
+            particle_system.emit(self.thruster1.world_position, Vec3(random.random(), -random.random(), random.random()), 10, texture = "jetpack")
+            particle_system.emit(self.thruster2.world_position, Vec3(random.random(), -random.random(), random.random()), 10, texture = "jetpack")
 
     def reset_pos(self):
         self.position = Vec3(random.randint(-100, 300), random.randint(0, 50), random.randint(-100, 300))
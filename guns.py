@@ -2,7 +2,10 @@ from ursina import *
 from ursina import curve
 from trail_renderer import TrailRenderer
 
-from particles import Particles
+from effects import new_seed
+from lagcomp import MAX_SHOT_RANGE
+from particles import particle_system, spawn_burst
+from sounds import sound_manager
 
 class Gun(Entity):
     def __init__(self, player, equipped = True, **kwargs):
@@ -44,12 +47,6 @@ class Gun(Entity):
         self.charged = False
         self.equipped = equipped
 
-        # Audio
-        self.gun_sound = Audio("pistol.wav", autoplay=False)
-        self.destroyed_enemy = Audio("destroyed.wav", autoplay=False)
-        self.gun_sound.volume = 0.8
-        self.destroyed_enemy.volume = 0.1
-
     def update(self):
         if self.player.enabled:
             if self.equipped:
@@ -83,32 +80,24 @@ class Gun(Entity):
         # Spawn bullet
         if self.equipped:
             if self.gun_type == "pistol":
-                Bullet(self, self.tip.world_position)
+                bullet_pool.fire(self, self.tip.world_position)
                 
-                self.gun_sound.clip = "pistol.wav"
-                self.gun_sound.volume = 0.8
-                self.gun_sound.play()
+                sound_manager.play("pistol", volume = 0.8)
 
             elif self.gun_type == "shotgun":
                 for i in range(random.randint(2, 4)):
-                    b = Bullet(self, self.tip.world_position, randomness = 10)
+                    bullet_pool.fire(self, self.tip.world_position, randomness = 10)
 
-                self.gun_sound.clip = "shotgun.wav"
-                self.gun_sound.volume = 0.8
-                self.gun_sound.play()
+                sound_manager.play("shotgun", volume = 0.8)
             elif self.gun_type == "rifle":
-                Bullet(self, self.tip.world_position)
+                bullet_pool.fire(self, self.tip.world_position)
 
-                self.gun_sound.clip = "rifle.wav"
-                self.gun_sound.volume = 0.8
-                self.gun_sound.play()
+                sound_manager.play("rifle", volume = 0.8)
             elif self.gun_type == "minigun":
-                Bullet(self, self.tip.world_position)
+                bullet_pool.fire(self, self.tip.world_position)
 
                 self.shooting = True
-                self.gun_sound.clip = "minigun.wav"
-                self.gun_sound.volume = 0.8
-                self.gun_sound.play()
+                sound_manager.play("minigun", volume = 0.8)
 
             # Animate the gun
             if self.gun_type == "pistol" or self.gun_type == "shotgun":
@@ -178,50 +167,85 @@ class Gun(Entity):
     def on_disable(self):
         self.start_spring = False
 
+HITSCAN_RANGE = MAX_SHOT_RANGE  # hits past the server's range would be rejected
+TRACER_SPEED = 150  # units a second; how fast player bullets used to fly to their target
+SPREAD_DISTANCE = 10000  # randomness is an offset this far down the barrel, as when bullets flew there
+
+
 class Bullet(Entity):
-    def __init__(self, gun, pos, speed = 2000, trail_colour = color.hex("#00baff"), randomness = 0):
+    """A pooled bullet; take one with ``bullet_pool.fire`` rather than making it directly."""
+
+    lifetime = 2
+
+    def __init__(self, pool):
         super().__init__(
             model = "bullet.obj",
             texture = "level.png",
             scale = 0.08,
-            position = pos
+            enabled = False
         )
 
+        self.pool = pool
+        self.age = 0
+
+        self.trail_thickness = 8
+        self.trail = TrailRenderer(self.trail_thickness, color.hex("#00baff"), color.clear, 5, parent = self)
+        self.trail.enabled = False
+
+    def fire(self, gun, pos, speed = 2000, trail_colour = color.hex("#00baff"), randomness = 0):
+        self.position = pos
         self.gun = gun
         self.speed = speed
         self.hit_player = False
         self.randomness = Vec3(random.randint(-10, 10) * random.randint(-1, 1), random.randint(-10, 10) * random.randint(-1, 1), random.randint(-10, 10) * random.randint(-1, 1)) * Vec3(randomness)
         self.enemy = None
+        self.age = 0
+        self.enabled = True
 
-        self.trail_thickness = 8
-        self.trail = TrailRenderer(self.trail_thickness, trail_colour, color.clear, 5, parent = self)
+        self.expires = self.lifetime
 
         if hasattr(self.gun, "tip"):
             self.rotation = camera.world_rotation
             self.is_player = True
-            self.no_point = False
+            aim = (self.forward * SPREAD_DISTANCE + self.randomness).normalized()
+            # The aim ray the server checks hit claims against
+            self.shot_origin = tuple(camera.world_position)
+            self.shot_direction = tuple(aim)
             # Broadcast projectile so other clients can see the tracer
             mp = getattr(self.gun.player, "multiplayer", None)
             if mp:
-                mp.send_projectile(tuple(self.world_position), tuple(self.rotation), kind="bullet", direction=tuple(self.forward))
+                mp.send_projectile(tuple(self.world_position), tuple(self.rotation), kind="bullet", direction=self.shot_direction)
         else:
             self.world_rotation = self.gun.world_rotation
             self.is_player = False
 
+        self.trail.enabled = True
+        self.trail.reset(trail_colour)
+
         if self.is_player:
-            if mouse.hovered_entity:
-                if mouse.hovered_entity != self.gun.player.map:
-                    self.hovered_point = mouse.hovered_entity
-                    self.animate("position", Vec3(self.hovered_point.world_position) + (self.forward * 10000) + self.randomness, distance(self.hovered_point.world_position + (self.forward * 10000), self.gun.player) / 150, curve = curve.linear)
-                else:
-                    self.hovered_point = mouse.world_point
-                    self.animate("position", Vec3(self.hovered_point) + self.randomness + (self.forward * 10000), distance(self.hovered_point + (self.forward * 10000), self.gun.player) / 150, curve = curve.linear)
-                
-            else:
-                self.animate("position", self.world_position + (self.forward * 10000) + self.randomness, 5, curve = curve.linear)
-                self.no_point = True
-        
-            destroy(self, 2)
+            self._hitscan(aim)
+
+    def _hitscan(self, aim):
+        """Resolve the shot now with one ray along the aim; the bullet is only a tracer after this."""
+        hit = raycast(camera.world_position, aim, distance = HITSCAN_RANGE, ignore = [self, self.gun, self.gun.player])
+        end = hit.world_point if hit.hit else camera.world_position + aim * HITSCAN_RANGE
+        self.look_at(end)
+        if hit.hit:
+            if hit.entity == self.gun.player.map or not self._handle_hit(hit.entity):
+                self._impact_effect(hit.world_point)
+
+        travel = distance(self.world_position, end) / TRACER_SPEED
+        self.expires = min(self.lifetime, travel)
+        self.animate("position", end, travel, curve = curve.linear)
+
+    def release(self):
+        """Stop the bullet and hand it back to its pool."""
+        for animation in self.animations:
+            animation.kill()
+        self.animations.clear()
+        self.trail.enabled = False
+        self.enabled = False
+        self.pool.release(self)
 
     def _handle_hit(self, target_entity):
         """Apply damage and effects to enemies or remote players."""
@@ -235,79 +259,98 @@ class Bullet(Entity):
 
         # Remote player hit
         if getattr(target_owner, "is_remote_player", False):
-            for i in range(2):
-                direction = Vec3(random.random(), random.randrange(-10, 10, 1) / 10, random.random())
-                Particles(target_owner.world_position, direction, spray_amount = 10, model = "particles")
-                mp = getattr(self.gun.player, "multiplayer", None)
-                if mp:
-                    mp.send_particles(tuple(target_owner.world_position), tuple(direction), 10, model="particles")
+            seed = new_seed()
+            spawn_burst("hit", target_owner.world_position, seed)
             target_owner.health = max(0, getattr(target_owner, "health", 10) - damage)
             mp = getattr(self.gun.player, "multiplayer", None)
             if mp:
-                mp.send_damage(target_owner.id, damage, headshot=headshot)
+                mp.send_effect("hit", tuple(target_owner.world_position), seed)
+                mp.send_damage(target_owner.id, damage, headshot=headshot, origin=self.shot_origin, direction=self.shot_direction)
             return True
 
         # Enemy hit
         if hasattr(target_owner, "reset_pos") and hasattr(target_owner, "health"):
             for i in range(2):
-                Particles(target_owner.world_position, Vec3(random.random(), random.randrange(-10, 10, 1) / 10, random.random()), spray_amount = 10, model = "particles")
+                particle_system.emit(target_owner.world_position, Vec3(random.random(), random.randrange(-10, 10, 1) / 10, random.random()), spray_amount = 10, model = "particles")
             
             target_owner.health -= damage
             target_owner.texture = "hit.png"
             invoke(setattr, target_owner, "texture", "level", delay = 0.1)
             if target_owner.health <= 0:
-                for i in range(6):
-                    Particles(target_owner.world_position, Vec3(random.random(), random.randrange(-10, 10, 1) / 10, random.random()), spray_amount = 10, model = "particles", texture = "destroyed")
+                spawn_burst("destroyed", target_owner.world_position, new_seed())
                 target_owner.reset_pos()
                 target_owner.health = 2
                 self.gun.player.shot_enemy()
-                self.gun.destroyed_enemy.play() 
+                sound_manager.play("destroyed", volume = 0.1) 
             return True
 
         return False
 
-    def update(self):   
-        if self.is_player:
-            if not self.no_point:
-                if self.hovered_point != self.gun.player.map and not isinstance(self.hovered_point, LVector3f):
-                    if distance(self, self.hovered_point) < 3 and self.hovered_point != self.gun.player:
-                        if self._handle_hit(self.hovered_point):
-                            destroy(self)
-                else:
-                    if self.gun.gun_type != "shotgun":
-                        if distance(self, self.hovered_point) < 3 and self.hovered_point != self.gun.player:
-                            for i in range(2):
-                                direction = Vec3(random.random(), random.random(), random.random())
-                                Particles(self.hovered_point - (self.forward * 10), direction, 30, model = "particles")
-                                mp = getattr(self.gun.player, "multiplayer", None)
-                                if mp:
-                                    mp.send_particles(tuple(self.hovered_point - (self.forward * 10)), tuple(direction), 30, model="particles")
-
-                            destroy(self)
-                    else:
-                        level_ray = raycast(self.world_position, self.forward, distance = 3, traverse_target = self.gun.player.map, ignore = [self, self.gun, self.gun.player])
-                        if level_ray.hit:
-                            for i in range(2):
-                                direction = Vec3(random.random(), random.random(), random.random())
-                                Particles(self.hovered_point - (self.forward * 10), direction, 30, model = "particles")
-                                mp = getattr(self.gun.player, "multiplayer", None)
-                                if mp:
-                                    mp.send_particles(tuple(self.hovered_point - (self.forward * 10)), tuple(direction), 30, model="particles")
-
-                            destroy(self)
-        else:
+    def _impact_effect(self, point):
+        """Sparks where the bullet hit the level, shared with other clients as one seeded effect."""
+        impact_point = point - (self.forward * 10)
+        seed = new_seed()
+        spawn_burst("impact", impact_point, seed)
+        mp = getattr(self.gun.player, "multiplayer", None)
+        if mp:
+            mp.send_effect("impact", tuple(impact_point), seed)
+
+    def update(self):
+        self.age += time.dt
+        if self.age >= self.expires:
+            self.release()
+            return
+
+        # Player shots were resolved when fired; their bullet is just the tracer
+        if not self.is_player:
             self.position += self.forward * self.speed * time.dt
 
-            level_ray = raycast(self.world_position, self.forward, distance = 3, traverse_target = self.gun.player.map, ignore = [self, self.gun])
             if distance(self, self.gun.player) <= 2:
                 if not self.hit_player:
                     self.gun.player.health -= self.enemy.damage
                     self.gun.player.healthbar.value = self.gun.player.health
                     self.hit_player = True
-                destroy(self)
+                self.release()
+                return
+            level_ray = raycast(self.world_position, self.forward, distance = 3, traverse_target = self.gun.player.map, ignore = [self, self.gun])
             if level_ray.hit:
-                destroy(self)
-            destroy(self, delay = 2)
+                self.release()
+
+
+class BulletPool:
+    """
+    A bounded set of bullets and trails, made once. ``fire`` takes a free
+    one, or the oldest still in flight when all are out, and bullets come
+    back on a hit or when their lifetime runs out.
+    """
+
+    def __init__(self, size = 48):
+        self.size = size
+        self.free = []
+        self.live = {}  # id: bullet, oldest first
+
+    def fill(self):
+        """Make any bullets not made yet, e.g. while loading rather than on the first shot."""
+        while len(self.free) + len(self.live) < self.size:
+            self.free.append(Bullet(self))
+
+    def fire(self, gun, pos, speed = 2000, trail_colour = color.hex("#00baff"), randomness = 0):
+        if not self.free:
+            if len(self.live) < self.size:
+                self.fill()
+            else:
+                next(iter(self.live.values())).release()
+        bullet = self.free.pop()
+        self.live[id(bullet)] = bullet
+        bullet.fire(gun, pos, speed, trail_colour, randomness)
+        return bullet
+
+    def release(self, bullet):
+        if self.live.pop(id(bullet), None) is not None:
+            self.free.append(bullet)
+
+
+bullet_pool = BulletPool()
 
 class Rocket(Entity):
     def __init__(self, gun, pos, speed = 100, trail_colour = color.hex("#00baff"), randomness = 0, cooldown = 3):
@@ -366,12 +409,11 @@ class Rocket(Entity):
                 enemy.texture = "hit.png"
                 invoke(setattr, enemy, "texture", "level", delay = 0.1)
                 if enemy.health <= 0:
-                    for i in range(6):
-                        Particles(enemy.world_position, Vec3(random.random(), random.randrange(-10, 10, 1) / 10, random.random()), spray_amount = 10, model = "particles", texture = "destroyed")
+                    spawn_burst("destroyed", enemy.world_position, new_seed())
                     enemy.reset_pos()
                     enemy.health = 2
                     self.gun.player.shot_enemy()
-                    self.gun.destroyed_enemy.play()
+                    sound_manager.play("destroyed", volume = 0.1)
 
         mp = getattr(self.gun.player, "multiplayer", None)
         if mp:
@@ -382,19 +424,18 @@ class Rocket(Entity):
                     remote.health = max(0, getattr(remote, "health", 10) - damage)
                     if remote.health <= 0:
                         remote.die()
-                    mp.send_damage(remote.id, damage, headshot=False)
+                    mp.send_damage(remote.id, damage, headshot=False, splash=tuple(center))
 
     def update(self): 
         if self.fired and not self.no_point:
             if self.hovered_point != self.gun.player.map and not isinstance(self.hovered_point, LVector3f):
                 if distance(self, self.hovered_point) < 5 and self.hovered_point != self.gun.player:
                     explosion_center = self.hovered_point.world_position
-                    for i in range(2):
-                        direction = Vec3(random.random(), random.randrange(-10, 10, 1) / 10, random.random())
-                        Particles(explosion_center, direction, spray_amount = 10, model = "particles")
-                        mp = getattr(self.gun.player, "multiplayer", None)
-                        if mp:
-                            mp.send_particles(tuple(explosion_center), tuple(direction), 10, model="particles")
+                    seed = new_seed()
+                    spawn_burst("hit", explosion_center, seed)
+                    mp = getattr(self.gun.player, "multiplayer", None)
+                    if mp:
+                        mp.send_effect("hit", tuple(explosion_center), seed)
 
                     self._apply_splash_damage(explosion_center)
                     destroy(self)
@@ -402,12 +443,11 @@ class Rocket(Entity):
                 level_ray = raycast(self.world_position, self.forward, distance = 3, traverse_target = self.gun.player.map, ignore = [self, self.gun, self.gun.player])
                 if level_ray.hit:
                     impact_point = level_ray.world_point
-                    for i in range(10):
-                        direction = Vec3(random.random(), random.random(), random.random())
-                        Particles(impact_point, direction, 30, model = "particles", texture = "jetpack")
-                        mp = getattr(self.gun.player, "multiplayer", None)
-                        if mp:
-                            mp.send_particles(tuple(impact_point), tuple(direction), 30, model="particles", texture="jetpack")
+                    seed = new_seed()
+                    spawn_burst("rocket_impact", impact_point, seed)
+                    mp = getattr(self.gun.player, "multiplayer", None)
+                    if mp:
+                        mp.send_effect("rocket_impact", tuple(impact_point), seed)
 
                     self._apply_splash_damage(impact_point)
                     destroy(self)
@@ -536,8 +576,7 @@ class RocketLauncher(Gun):
             self.player.shake_camera(0.1, self.shake_divider)
             invoke(self.reload, delay = 3)
 
-            self.gun_sound.clip = "rocket_launcher.wav"
-            self.gun_sound.play()
+            sound_manager.play("rocket_launcher", volume = 0.8)
 
     def reload(self):
         self.rocket = Rocket(self, (0, 0, 0))
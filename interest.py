@@ -0,0 +1,76 @@
+"""
+Area-of-interest bookkeeping for the server.
+"""
+
+import math
+
+
+class SpatialGrid:
+    """
+    Uniform grid over the XZ plane answering "who is within r of this point".
+
+    Entries are bucketed by cell so a query only looks at the cells its radius
+    overlaps, then checks the full 3D distance.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: dict[tuple, set] = {}
+        self.positions: dict = {}
+        self._cell_of: dict = {}
+
+    def _cell(self, x: float, z: float) -> tuple:
+        return math.floor(x / self.cell_size), math.floor(z / self.cell_size)
+
+    def update(self, key, position) -> bool:
+        """Move ``key`` to ``position``; returns False if the position isn't an (x, y, z) triple."""
+        try:
+            x, y, z = (float(v) for v in position)
+        except (TypeError, ValueError):
+            return False
+
+        cell = self._cell(x, z)
+        old = self._cell_of.get(key)
+        if old != cell:
+            if old is not None:
+                self._discard(key, old)
+            self.cells.setdefault(cell, set()).add(key)
+            self._cell_of[key] = cell
+        self.positions[key] = (x, y, z)
+        return True
+
+    def remove(self, key) -> None:
+        cell = self._cell_of.pop(key, None)
+        if cell is not None:
+            self._discard(key, cell)
+        self.positions.pop(key, None)
+
+    def _discard(self, key, cell: tuple) -> None:
+        members = self.cells[cell]
+        members.discard(key)
+        if not members:
+            del self.cells[cell]
+
+    def query(self, position, radius: float) -> list:
+        """Keys within ``radius`` of ``position``."""
+        x, y, z = (float(v) for v in position)
+        r2 = radius * radius
+        min_cx, min_cz = self._cell(x - radius, z - radius)
+        max_cx, max_cz = self._cell(x + radius, z + radius)
+
+        found = []
+        if (max_cx - min_cx + 1) * (max_cz - min_cz + 1) > len(self.cells):
+            # Radius spans more cells than are occupied; scanning the occupied ones is cheaper
+            candidates = (key for members in self.cells.values() for key in members)
+        else:
+            candidates = (
+                key
+                for cx in range(min_cx, max_cx + 1)
+                for cz in range(min_cz, max_cz + 1)
+                for key in self.cells.get((cx, cz), ())
+            )
+        for key in candidates:
+            px, py, pz = self.positions[key]
+            if (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2 <= r2:
+                found.append(key)
+        return found
@@ -0,0 +1,159 @@
+"""
+Snapshot interpolation for remote players.
+
+Remote transforms arrive at the network rate with jitter. Each remote
+player buffers them with timestamps and is drawn a fixed delay in the past,
+between the two samples that straddle that moment, so motion stays smooth
+at 20 Hz updates and a late packet doesn't show as a hitch.
+
+Samples are stamped on the server's tick timeline when the message carries
+a tick (see ``ServerClock``) and with their arrival time otherwise.
+
+When updates stop for longer than the delay, the player keeps moving on its
+last velocity for up to ``EXTRAPOLATE_LIMIT`` seconds, then holds. When data
+arrives again, ``render`` blends the difference between where it guessed and
+where the player really was out over ``CORRECTION_TIME``, instead of snapping.
+"""
+
+import bisect
+import math
+from collections import deque
+
+INTERP_DELAY = 0.1  # seconds remote players are drawn behind the newest state
+INTERP_CAPACITY = 32
+HOLD_AFTER = 0.1  # a gap this long means the player stood still; servers only send what changed
+TELEPORT_DISTANCE = 20.0  # jumps further than this (respawns) snap instead of sliding
+EXTRAPOLATE_LIMIT = 0.25  # seconds a player keeps moving on its last velocity once the buffer runs dry
+CORRECTION_TIME = 0.1  # time constant for blending out an extrapolation error
+
+
+def lerp_yaw(a: float, b: float, f: float) -> float:
+    """Interpolate between two yaw angles in degrees the short way round."""
+    return a + ((b - a + 180) % 360 - 180) * f
+
+
+class ServerClock:
+    """
+    Maps server ticks onto the local ``perf_counter`` timeline.
+
+    The offset is the smallest ``arrival - tick time`` seen, i.e. the
+    fastest delivery, so queueing jitter doesn't shift samples around. It
+    creeps up slowly when the path gets permanently slower.
+    """
+
+    def __init__(self, tick_rate: float, drift: float = 0.01):
+        self.tick_rate = tick_rate
+        self.drift = drift
+        self.offset: float | None = None
+
+    def observe(self, tick: float, now: float) -> float:
+        """Record a tick that arrived at ``now``; returns its local timestamp."""
+        sample = now - tick / self.tick_rate
+        if self.offset is None or sample < self.offset:
+            self.offset = sample
+        else:
+            self.offset += (sample - self.offset) * self.drift
+        return self.local_time(tick)
+
+    def local_time(self, tick: float) -> float:
+        return tick / self.tick_rate + self.offset
+
+    def tick_at(self, local: float) -> float:
+        """The server tick being shown at local time ``local``."""
+        return (local - self.offset) * self.tick_rate
+
+
+class SnapshotBuffer:
+    """Timestamped ``(position, yaw, velocity)`` samples for one remote player; velocity may be None."""
+
+    def __init__(
+        self,
+        capacity: int = INTERP_CAPACITY,
+        hold_after: float = HOLD_AFTER,
+        teleport_distance: float = TELEPORT_DISTANCE,
+        extrapolate_limit: float = EXTRAPOLATE_LIMIT,
+        correction_time: float = CORRECTION_TIME,
+    ):
+        self.hold_after = hold_after
+        self.teleport_distance = teleport_distance
+        self.extrapolate_limit = extrapolate_limit
+        self.correction_time = correction_time
+        self._times = deque(maxlen=capacity)
+        self._states = deque(maxlen=capacity)
+        # Smoothing state for render()
+        self._error = (0.0, 0.0, 0.0)
+        self._rendered_at = None
+        self._basis = None  # newest sample the last render ran past, if it did
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def latest(self):
+        return self._states[-1] if self._states else None
+
+    def push(self, t: float, position, yaw: float, velocity=None) -> None:
+        """Add a sample; samples older than the newest one are dropped."""
+        position = tuple(position)
+        velocity = tuple(velocity) if velocity is not None else None
+        if self._times:
+            last_t = self._times[-1]
+            last_position, last_yaw, last_velocity = self._states[-1]
+            if t <= last_t:
+                return
+            if math.dist(position, last_position) > self.teleport_distance:
+                self._times.clear()
+                self._states.clear()
+                self._error, self._basis = (0.0, 0.0, 0.0), None
+            elif t - last_t > self.hold_after and not any(last_velocity or ()):
+                # Nothing was sent because nothing changed; don't slide across the whole gap
+                self._times.append(t - self.hold_after)
+                self._states.append((last_position, last_yaw, last_velocity))
+        self._times.append(t)
+        self._states.append((position, yaw, velocity))
+
+    def _extrapolate(self, t0: float, state, t: float) -> tuple:
+        position, _, velocity = state
+        if not velocity:
+            return position
+        dt = min(t - t0, self.extrapolate_limit)
+        return tuple(p + v * dt for p, v in zip(position, velocity))
+
+    def sample(self, t: float):
+        """
+        ``(position, yaw)`` at time ``t``: interpolated inside the buffer,
+        extrapolated on the last velocity (up to the limit) past its end.
+        """
+        if not self._times:
+            return None
+        i = bisect.bisect_right(self._times, t)
+        if i == 0:
+            return self._states[0][:2]
+        if i == len(self._times):
+            return self._extrapolate(self._times[-1], self._states[-1], t), self._states[-1][1]
+        t0, t1 = self._times[i - 1], self._times[i]
+        (p0, y0, _), (p1, y1, _) = self._states[i - 1], self._states[i]
+        f = (t - t0) / (t1 - t0)
+        position = tuple(a + (b - a) * f for a, b in zip(p0, p1))
+        return position, lerp_yaw(y0, y1, f)
+
+    def render(self, t: float):
+        """
+        ``sample`` for drawing frame by frame. When new data replaces an
+        extrapolation, the jump is carried as an error that decays over
+        ``correction_time`` rather than shown at once.
+        """
+        state = self.sample(t)
+        if state is None:
+            return None
+        position, yaw = state
+        if self._rendered_at is not None:
+            decay = math.exp(-max(0.0, t - self._rendered_at) / self.correction_time)
+            self._error = tuple(e * decay for e in self._error)
+            if self._basis is not None and self._basis[0] != self._times[-1]:
+                predicted = self._extrapolate(self._basis[0], self._basis[1], t)
+                self._error = tuple(e + p - q for e, p, q in zip(self._error, predicted, position))
+                if math.dist(self._error, (0, 0, 0)) > self.teleport_distance:
+                    self._error = (0.0, 0.0, 0.0)
+        self._rendered_at = t
+        self._basis = (self._times[-1], self._states[-1]) if t > self._times[-1] else None
+        return tuple(p + e for p, e in zip(position, self._error)), yaw
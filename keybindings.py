@@ -19,7 +19,8 @@ class Keybindings:
             "gun_5": "5",
             "next_gun": "scroll up",
             "prev_gun": "scroll down",
-            "reset": "g"
+            "reset": "g",
+            "net_stats": "f3"
         }
         self.load_keybinds()
 
@@ -0,0 +1,212 @@
+"""
+Lag compensation for server-side hit validation.
+
+The server records every player's position and yaw once per tick. A hit
+claim is checked against where the target was at the tick the shooter was
+looking at, using the same body/head boxes ``multiplayer.RemotePlayer``
+gives its hitboxes.
+
+numpy is used when it is installed, so a burst of claims against one target
+is rewound and ray-tested in a handful of array operations. Smaller batches,
+or any batch without numpy, run the same math once per shot, because numpy's
+per-call overhead outweighs the work for a shot or two.
+"""
+
+import bisect
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Hitboxes relative to the player's origin: (centre height, half extents).
+# Keep in sync with RemotePlayer.body_hitbox / head_hitbox.
+BODY_BOX = (2.1, (1.5, 3.25, 0.75))
+HEAD_BOX = (3.5, (0.5, 0.5, 0.5))
+
+HIT_TOLERANCE = 1.0  # slack added to each half extent for quantization and interpolation error
+MAX_SHOT_RANGE = 320  # furthest a shot can hit: the client's hitscan ray and the server's check share it
+VECTORIZE_MIN_BATCH = 24  # claims per target before the numpy path pays off
+_EPSILON = 1e-12
+
+
+class PositionHistory:
+    """Fixed-size ring of ``(tick, x, y, z, yaw)`` samples for one player."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self._rows = np.empty((capacity, 5)) if np is not None else [None] * capacity
+
+    def append(self, tick: float, x: float, y: float, z: float, yaw: float) -> None:
+        self._rows[self._next] = (tick, x, y, z, yaw)
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def samples(self):
+        """All samples, oldest first."""
+        if self.count < self.capacity:
+            return self._rows[:self.count]
+        if isinstance(self._rows, list):
+            return self._rows[self._next:] + self._rows[:self._next]
+        return np.concatenate((self._rows[self._next:], self._rows[:self._next]))
+
+    def sample_list(self) -> list:
+        samples = self.samples()
+        return samples if isinstance(samples, list) else samples.tolist()
+
+
+def _lerp_yaw(a: float, b: float, f: float) -> float:
+    return a + ((b - a + 180) % 360 - 180) * f
+
+
+def _ray_box(origin, direction, centre, yaw: float, box, tolerance: float, max_distance: float) -> bool:
+    """Slab test of a ray against a box rotated ``yaw`` degrees about +y."""
+    height, extents = box
+    c, s = math.cos(math.radians(yaw)), math.sin(math.radians(yaw))
+    rx, ry, rz = origin[0] - centre[0], origin[1] - centre[1] - height, origin[2] - centre[2]
+    local_origin = (rx * c - rz * s, ry, rx * s + rz * c)
+    local_dir = (direction[0] * c - direction[2] * s, direction[1], direction[0] * s + direction[2] * c)
+
+    t_min, t_max = 0.0, max_distance
+    for o, d, half in zip(local_origin, local_dir, extents):
+        half += tolerance
+        if abs(d) < _EPSILON:
+            d = _EPSILON
+        t1, t2 = (-half - o) / d, (half - o) / d
+        if t1 > t2:
+            t1, t2 = t2, t1
+        t_min, t_max = max(t_min, t1), min(t_max, t2)
+        if t_min > t_max:
+            return False
+    return True
+
+
+class LagCompensator:
+    """Per-player position history plus the rewind and hit tests that use it."""
+
+    def __init__(self, capacity: int, tolerance: float = HIT_TOLERANCE):
+        self.capacity = capacity
+        self.tolerance = tolerance
+        self.histories: dict = {}
+
+    def record(self, tick: float, key, position, yaw: float) -> None:
+        history = self.histories.get(key)
+        if history is None:
+            history = self.histories[key] = PositionHistory(self.capacity)
+        history.append(tick, position[0], position[1], position[2], yaw)
+
+    def remove(self, key) -> None:
+        self.histories.pop(key, None)
+
+    def _history(self, key) -> PositionHistory:
+        history = self.histories.get(key)
+        if history is None or not history.count:
+            raise KeyError(key)
+        return history
+
+    @staticmethod
+    def _vectorize(history: PositionHistory, ticks) -> bool:
+        return np is not None and not isinstance(history._rows, list) and len(ticks) >= VECTORIZE_MIN_BATCH
+
+    def rewind(self, key, ticks) -> list:
+        """``(x, y, z, yaw)`` of ``key`` at each of ``ticks``, clamped to the recorded window."""
+        history = self._history(key)
+        if self._vectorize(history, ticks):
+            return self._rewind_array(history.samples(), ticks).tolist()
+
+        samples = history.sample_list()
+        times = [row[0] for row in samples]
+        states = []
+        for tick in ticks:
+            i = bisect.bisect_right(times, tick) - 1
+            if i < 0:
+                i, f = 0, 0.0
+            elif i >= len(samples) - 1:
+                i, f = len(samples) - 1, 0.0
+            else:
+                t0, t1 = times[i], times[i + 1]
+                f = (tick - t0) / (t1 - t0) if t1 > t0 else 0.0
+            a = samples[i]
+            b = samples[min(i + 1, len(samples) - 1)]
+            states.append((
+                a[1] + (b[1] - a[1]) * f,
+                a[2] + (b[2] - a[2]) * f,
+                a[3] + (b[3] - a[3]) * f,
+                _lerp_yaw(a[4], b[4], f),
+            ))
+        return states
+
+    @staticmethod
+    def _rewind_array(samples, ticks):
+        times = samples[:, 0]
+        query = np.clip(np.asarray(ticks, dtype=float), times[0], times[-1])
+        if len(samples) == 1:
+            return np.repeat(samples[:, 1:], len(query), axis=0)
+        i = np.clip(np.searchsorted(times, query, side="right") - 1, 0, len(samples) - 2)
+        a, b = samples[i], samples[i + 1]
+        span = b[:, 0] - a[:, 0]
+        f = np.where(span > 0, (query - a[:, 0]) / np.where(span > 0, span, 1), 0.0)
+        out = np.empty((len(query), 4))
+        out[:, :3] = a[:, 1:4] + (b[:, 1:4] - a[:, 1:4]) * f[:, None]
+        out[:, 3] = a[:, 4] + ((b[:, 4] - a[:, 4] + 180) % 360 - 180) * f
+        return out
+
+    def trace(self, key, ticks, origins, directions, max_distance: float) -> list:
+        """
+        Ray-test shots against ``key`` rewound to each shot's tick.
+
+        Returns ``(hit, headshot)`` per shot. Directions need not be normalized.
+        """
+        history = self._history(key)
+        if self._vectorize(history, ticks):
+            return self._trace_array(history.samples(), ticks, origins, directions, max_distance)
+
+        results = []
+        for state, origin, direction in zip(self.rewind(key, ticks), origins, directions):
+            length = math.sqrt(sum(v * v for v in direction)) or 1.0
+            direction = [v / length for v in direction]
+            head = _ray_box(origin, direction, state, state[3], HEAD_BOX, self.tolerance, max_distance)
+            body = head or _ray_box(origin, direction, state, state[3], BODY_BOX, self.tolerance, max_distance)
+            results.append((body, head))
+        return results
+
+    def _trace_array(self, samples, ticks, origins, directions, max_distance: float) -> list:
+        state = self._rewind_array(samples, ticks)
+        origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=float).reshape(-1, 3)
+        lengths = np.linalg.norm(directions, axis=1)
+        directions = directions / np.where(lengths > 0, lengths, 1)[:, None]
+
+        yaw = np.radians(state[:, 3])
+        c, s = np.cos(yaw), np.sin(yaw)
+        local_dir = np.stack((
+            directions[:, 0] * c - directions[:, 2] * s,
+            directions[:, 1],
+            directions[:, 0] * s + directions[:, 2] * c,
+        ), axis=1)
+        local_dir = np.where(np.abs(local_dir) < _EPSILON, _EPSILON, local_dir)
+
+        hits = []
+        for height, extents in (BODY_BOX, HEAD_BOX):
+            rel = origins - state[:, :3]
+            rel[:, 1] -= height
+            local_origin = np.stack((rel[:, 0] * c - rel[:, 2] * s, rel[:, 1], rel[:, 0] * s + rel[:, 2] * c), axis=1)
+            half = np.asarray(extents) + self.tolerance
+            t1 = (-half - local_origin) / local_dir
+            t2 = (half - local_origin) / local_dir
+            t_min = np.maximum(np.minimum(t1, t2).max(axis=1), 0.0)
+            t_max = np.minimum(np.maximum(t1, t2).min(axis=1), max_distance)
+            hits.append(t_min <= t_max)
+        body, head = hits
+        return list(zip((body | head).tolist(), head.tolist()))
+
+    def splash(self, key, ticks, centres) -> list:
+        """Distance from each blast centre to ``key``'s origin at that blast's tick."""
+        states = self.rewind(key, ticks)
+        return [
+            math.dist(centre, state[:3])
+            for centre, state in zip(centres, states)
+        ]
@@ -8,6 +8,9 @@ from maps import FloatingIslands, DesertedSands, MountainousValley, ScaledMap, L
 
 from scene_lighting import SceneLighting
 from multiplayer import MultiplayerManager
+from net_hud import NetworkOverlay
+from guns import bullet_pool
+from sounds import sound_manager
 import tkinter as tk
 from keybindings import keybindings
 
@@ -136,12 +139,13 @@ def load_assets():
     for i, t in enumerate(textures_to_load):
         load_texture(t)
 
-    for i, s in enumerate(sounds_to_load):
-        # Pre-load sounds by creating Audio objects
-        Audio(s, autoplay=False)
+    # Load each clip once into the sound manager; nothing is played
+    sound_manager.preload(sounds_to_load)
 
 # Load all assets on the main thread; Panda3D's loader isn't thread-safe
 load_assets()
+# Make the pooled bullets now rather than on the first shot
+bullet_pool.fill()
 
 player = Player((-60, 50, -16)) # Flat: (-47, 50, -94) # Rope: (-61, 100, 0)
 player.disable()
@@ -156,6 +160,7 @@ player.map = floating_islands
 player.maps = [floating_islands, deserted_sands, mountainous_valley, scaled_map, loose_sands]
 
 multiplayer = MultiplayerManager(player)
+network_overlay = NetworkOverlay(multiplayer)
 
 if mp_choice["mode"] == "host":
     multiplayer.host_game(mp_choice["username"])
@@ -170,6 +175,8 @@ scene_lighting = SceneLighting(ursina = app, player = player, sun_direction = (-
 def input(key):
     if key == keybindings.get_key("reset"):
         player.reset()
+    if key == keybindings.get_key("net_stats"):
+        network_overlay.toggle()
 
 def update():
     multiplayer.update()
@@ -1,15 +1,19 @@
 import threading
+from time import perf_counter
 from typing import Dict, Optional
 
-from ursina import Entity, Vec3, color, curve, invoke, time, destroy
+from ursina import Entity, Vec3, color, curve, invoke
 
 import server
-from network import Network
-from particles import Particles
+from effects import EFFECTS
+from interpolation import INTERP_DELAY, ServerClock, SnapshotBuffer
+from network import Network, NetworkPlayback
+from particles import particle_system, spawn_burst
+from projectile_pool import ProjectilePool
 
 
 class RemotePlayer(Entity):
-    def __init__(self, player_id: str, position=(0, 1, 0), rotation_y=0):
+    def __init__(self, player_id: str, position=(0, 1, 0), rotation_y=0, interp_delay: float = INTERP_DELAY):
         super().__init__(model=None, position=position, rotation_y=rotation_y)
         # Rendered model is a child so we can offset it down to rest on the ground.
         self.gfx = Entity(
@@ -28,6 +32,11 @@ class RemotePlayer(Entity):
         self.health = 10
         self.dead = False
 
+        # Drawn interp_delay behind the newest state, between buffered samples
+        self.interp_delay = interp_delay
+        self.snapshots = SnapshotBuffer()
+        self.snapshots.push(perf_counter(), position, rotation_y)
+
         # Hitboxes for hitscan
         self.body_hitbox = Entity(
             parent=self,
@@ -49,6 +58,12 @@ class RemotePlayer(Entity):
         self.head_hitbox.damage_multiplier = 1  # no headshot bonus
         self.head_hitbox.is_headshot = False
 
+    def update(self):
+        state = self.snapshots.render(perf_counter() - self.interp_delay)
+        if state is not None:
+            self.position = Vec3(*state[0])
+            self.rotation_y = state[1]
+
     def _set_gun_prop(self, gun_index: int):
         """Update the remote player's visible gun based on index."""
         gun_index = int(gun_index)
@@ -91,25 +106,6 @@ class RemotePlayer(Entity):
         self.enable()
 
 
-class RemoteProjectile(Entity):
-    def __init__(self, position, rotation, kind="bullet"):
-        super().__init__(
-            model="bullet.obj" if kind == "bullet" else "rocket.obj",
-            texture="level.png",
-            scale=0.08 if kind == "bullet" else 0.2,
-            position=position,
-            rotation=rotation,
-        )
-        # Match local projectile speeds: bullets ~2000, rockets ~600 (per in-game animation)
-        self.speed = 2000 if kind == "bullet" else 600
-        trail_color = color.azure if kind == "bullet" else color.orange
-        self.trail = Entity(model="cube", scale=(0.02, 0.02, 0.3), color=trail_color, parent=self)
-        destroy(self, delay=2)
-
-    def update(self):
-        self.position += self.forward * self.speed * time.dt
-
-
 class MultiplayerManager:
     def __init__(self, player):
         self.player = player
@@ -119,29 +115,47 @@ class MultiplayerManager:
         self.server_thread: Optional[threading.Thread] = None
         self.connected = False
         self.port = 8000
+        self.clock: Optional[ServerClock] = None  # server tick -> local time, for stamping snapshots
+        self.interp_delay = INTERP_DELAY
+        self.projectiles: Optional[ProjectilePool] = None  # built on first connect, reused after
 
     # Server hosting -----------------------------------------------------
-    def host_game(self, username: str):
+    def host_game(self, username: str, capture: str | None = None):
         if self.server_thread is None or not self.server_thread.is_alive():
             self.server_thread = threading.Thread(target=server.main, daemon=True)
             self.server_thread.start()
             print("Started local server on port 8000")
-        self.connect("127.0.0.1", username)
+        self.connect("127.0.0.1", username, capture=capture)
 
     # Client -------------------------------------------------------------
-    def connect(self, addr: str, username: str):
+    def connect(self, addr: str, username: str, capture: str | None = None):
+        """Join a server; with ``capture`` set, everything received is recorded to that file."""
         try:
-            net = Network(addr, self.port, username)
-            net.settimeout(0.001)
+            net = Network(addr, self.port, username, capture=capture)
             net.connect()
-            self.network = net
-            self.connected = True
+            # Socket reads and decoding happen off the render thread; update() only drains
+            net.start_io_thread()
+            self._attach(net)
             print(f"Connected to server as id {self.network.id}")
         except Exception as e:
             print("Failed to connect:", e)
             self.network = None
             self.connected = False
 
+    def playback(self, path: str, speed: float | None = 1.0, clock=perf_counter) -> NetworkPlayback:
+        """Feed a capture file through ``update`` instead of a server; see ``NetworkPlayback``."""
+        net = NetworkPlayback(path, speed=speed, clock=clock)
+        net.connect()
+        self._attach(net)
+        return net
+
+    def _attach(self, net: Network):
+        self.clock = ServerClock(net.tick_rate) if net.tick_rate else None
+        self.network = net
+        self.connected = True
+        if self.projectiles is None:
+            self.projectiles = ProjectilePool()
+
     def update(self):
         if not self.connected or not self.network:
             return
@@ -160,6 +174,12 @@ class MultiplayerManager:
             else:
                 self._handle_message(msg)
 
+    def network_stats(self) -> Optional[dict]:
+        """``Network.stats()`` for the current connection, or None when offline."""
+        if not self.network:
+            return None
+        return self.network.stats()
+
     # Message handling ---------------------------------------------------
     def _handle_message(self, msg: dict):
         if msg.get("object") == "damage":
@@ -176,6 +196,26 @@ class MultiplayerManager:
                 return
             self._spawn_remote_particles(msg)
             return
+        if msg.get("object") == "effect":
+            if self.network and str(msg.get("id")) == str(self.network.id):
+                return
+            self._spawn_remote_effect(msg)
+            return
+        if msg.get("object") == "snapshot":
+            t = self._sample_time(msg.get("tick"))
+            for state in msg.get("players", ()):
+                self._apply_player_state(str(state.get("id")), state, t)
+            return
+        if msg.get("object") == "world":
+            # Everyone already in the lobby, sent once when we join
+            for state in msg.get("players", ()):
+                player_id = str(state.get("id"))
+                if self.network and player_id == str(self.network.id):
+                    continue
+                if player_id not in self.remote_players:
+                    self._spawn_remote_player(player_id, state)
+                self._apply_player_state(player_id, state, perf_counter())
+            return
 
         if msg.get("object") != "player":
             return
@@ -193,12 +233,31 @@ class MultiplayerManager:
                 self._spawn_remote_player(player_id, msg)
             return
 
-        # Regular position update
+        # Regular position update, relayed as it arrived
+        self._apply_player_state(player_id, msg, perf_counter())
+
+    def _sample_time(self, tick) -> float:
+        """Local timestamp for a state from server ``tick``, or its arrival time."""
+        now = perf_counter()
+        if self.clock is None or tick is None:
+            return now
+        return self.clock.observe(tick, now)
+
+    def view_tick(self) -> Optional[float]:
+        """The server tick remote players are currently drawn at, for hit claims."""
+        if self.clock is None or self.clock.offset is None:
+            return None
+        return self.clock.tick_at(perf_counter() - self.interp_delay)
+
+    def _apply_player_state(self, player_id: str, msg: dict, t: float):
+        """Apply a transform/health/gun update to a remote player; the transform is buffered at ``t``."""
+        if self.network and player_id == str(self.network.id):
+            return
         rp = self.remote_players.get(player_id)
         if rp:
-            pos = msg.get("position", (rp.x, rp.y, rp.z))
-            rp.position = Vec3(*pos)
-            rp.rotation_y = msg.get("rotation", rp.rotation_y)
+            if "position" in msg or "rotation" in msg or "velocity" in msg:
+                position, yaw, velocity = rp.snapshots.latest() or ((rp.x, rp.y, rp.z), rp.rotation_y, None)
+                rp.snapshots.push(t, msg.get("position", position), msg.get("rotation", yaw), msg.get("velocity", velocity))
             rp.health = msg.get("health", getattr(rp, "health", 100))
             rp._set_gun_prop(msg.get("gun", rp.gun_index))
             if rp.health <= 0 and not rp.dead:
@@ -209,7 +268,7 @@ class MultiplayerManager:
     def _spawn_remote_player(self, player_id: str, msg: dict):
         pos = msg.get("position", (0, 1, 0))
         rot = msg.get("rotation", 0)
-        rp = RemotePlayer(player_id, position=Vec3(*pos), rotation_y=rot)
+        rp = RemotePlayer(player_id, position=Vec3(*pos), rotation_y=rot, interp_delay=self.interp_delay)
         rp._set_gun_prop(msg.get("gun", 0))
         self.remote_players[player_id] = rp
         print(f"Spawned remote player {player_id}")
@@ -219,14 +278,7 @@ class MultiplayerManager:
         rot = msg.get("rotation", (0, 0, 0))
         kind = msg.get("kind", "bullet")
         direction = msg.get("direction")
-        owner_id = str(msg.get("id"))
-        spawn_pos = Vec3(*pos)
-
-        proj = RemoteProjectile(position=spawn_pos, rotation=rot, kind=kind)
-        if direction:
-            dir_vec = Vec3(*direction)
-            if dir_vec.length() > 0:
-                proj.look_at(proj.position + dir_vec)
+        self.projectiles.spawn(Vec3(*pos), rot, kind=kind, direction=direction)
 
     def _remove_remote_player(self, player_id: str):
         rp = self.remote_players.pop(player_id, None)
@@ -235,9 +287,10 @@ class MultiplayerManager:
             rp.remove_node()
             print(f"Removed remote player {player_id}")
 
-    def send_damage(self, target_id: str, amount: float, headshot: bool = False):
+    def send_damage(self, target_id: str, amount: float, headshot: bool = False, origin=None, direction=None, splash=None):
+        """Claim a hit; the server validates it and broadcasts the target's new health."""
         if self.network and self.connected:
-            self.network.send_damage(target_id, amount, headshot=headshot)
+            self.network.send_damage(target_id, amount, headshot=headshot, origin=origin, direction=direction, splash=splash, tick=self.view_tick())
 
     def send_projectile(self, position, rotation, kind="bullet", direction=None):
         """Relay a fired projectile to other clients."""
@@ -249,14 +302,21 @@ class MultiplayerManager:
         if self.network and self.connected:
             self.network.send_particles(position, direction, spray_amount, model=model, texture=texture)
 
+    def send_effect(self, effect: str, position, seed: int):
+        """Broadcast a seeded particle effect the local client has already spawned."""
+        if self.network and self.connected:
+            self.network.send_effect(effect, position, seed)
+
     def _apply_damage_message(self, msg: dict):
         target_id = str(msg.get("target"))
         amount = float(msg.get("amount", 0))
         is_headshot = bool(msg.get("headshot"))
+        # The event loop server sends the authoritative health; the threaded relay only the amount
+        health = msg.get("health")
 
         # Local player hit
         if self.network and target_id == str(self.network.id):
-            self.player.health -= amount
+            self.player.health = health if health is not None else self.player.health - amount
             self.player.healthbar.value = self.player.health
             if self.player.health <= 0:
                 self.player.dead = True
@@ -265,7 +325,7 @@ class MultiplayerManager:
         # Remote representation hit (to show damage locally)
         rp = self.remote_players.get(target_id)
         if rp:
-            rp.health = max(0, getattr(rp, "health", 10) - amount)
+            rp.health = health if health is not None else max(0, getattr(rp, "health", 10) - amount)
             if rp.health <= 0:
                 rp.die()
             elif rp.dead and rp.health > 0:
@@ -278,4 +338,14 @@ class MultiplayerManager:
         spray = msg.get("spray", 30)
         model = msg.get("model", "particles")
         texture = msg.get("texture", None)
-        Particles(position=Vec3(*pos), direction=Vec3(*direction), spray_amount=spray, model=model, texture=texture)
+        particle_system.emit(Vec3(*pos), Vec3(*direction), spray_amount=spray, model=model, texture=texture)
+
+    def _spawn_remote_effect(self, msg: dict):
+        effect = msg.get("effect")
+        if effect not in EFFECTS:
+            return
+        try:
+            seed = int(msg.get("seed"))
+        except (TypeError, ValueError):
+            return
+        spawn_burst(effect, Vec3(*msg.get("position", (0, 0, 0))), seed)
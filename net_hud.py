@@ -0,0 +1,59 @@
+from ursina import *
+
+
+def format_stats(stats):
+    """Lines of text for a ``Network.stats()`` dict."""
+    def ms(value):
+        return "-" if value is None else f"{value:.0f} ms"
+
+    lines = [
+        f"{stats['transport']}, {stats['encoding']}{' + codec' if stats['state_codec'] else ''}{'' if stats['connected'] else ' (disconnected)'}",
+        f"rtt {ms(stats['rtt_ms'])} +/- {ms(stats['rtt_var_ms'])}   min {ms(stats['min_rtt_ms'])}",
+        "",
+        f"{'':<10}{'in/s':>6}{'B/s':>8}{'out/s':>7}{'B/s':>8}",
+    ]
+    received, sent = stats["received_per_second"], stats["sent_per_second"]
+    none = {"messages": 0, "bytes": 0}
+    for kind in sorted(set(received) | set(sent)):
+        i, o = received.get(kind, none), sent.get(kind, none)
+        lines.append(f"{kind:<10}{i['messages']:>6}{i['bytes']:>8}{o['messages']:>7}{o['bytes']:>8}")
+    lines += [
+        "",
+        f"queues in {stats['inbox_depth']} out {stats['outbox_depth']}",
+        f"decode errors {stats['decode_errors']}   socket errors {stats['socket_errors']}",
+        f"stale udp dropped {stats['udp_stale_dropped']}   sends skipped {stats['player_sends_skipped']}",
+    ]
+    return "\n".join(lines)
+
+
+class NetworkOverlay(Text):
+    """Network diagnostics in the top left corner, hidden until toggled."""
+
+    def __init__(self, multiplayer, refresh = 0.5, **kwargs):
+        super().__init__(
+            text = "",
+            font = "VeraMono.ttf",
+            origin = (-0.5, 0.5),
+            position = window.top_left + (0.02, -0.02),
+            scale = 0.7,
+            background = True,
+            enabled = False,
+            **kwargs
+        )
+
+        self.multiplayer = multiplayer
+        self.refresh = refresh
+        self.refresh_timer = 0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.refresh_timer = 0
+
+    def update(self):
+        self.refresh_timer -= time.dt
+        if self.refresh_timer > 0:
+            return
+        self.refresh_timer = self.refresh
+
+        stats = self.multiplayer.network_stats()
+        self.text = format_stats(stats) if stats else "offline"
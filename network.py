@@ -1,86 +1,633 @@
-import json
+import selectors
 import socket
+import threading
+import time
+from collections import deque
 from typing import Optional
 
+from protocol import (
+    DGRAM_HELLO,
+    DATAGRAM_HEADER,
+    DGRAM_PLAYER,
+    DGRAM_SNAPSHOT,
+    FRAME_HEADER,
+    KIND_HELLO,
+    KIND_JSON,
+    KIND_MESSAGE,
+    KIND_PLAYER_STATE,
+    KIND_SNAPSHOT,
+    MAX_DATAGRAM_SIZE,
+    READ_SIZE,
+    FrameReader,
+    ProtocolError,
+    decode_datagram,
+    decode_hello,
+    decode_message,
+    encode_datagram,
+    encode_frame,
+    encode_hello,
+    seq_newer,
+)
+from schema import ENCODING_BINARY, ENCODING_JSON, decode_binary, dump_payload, encode_payload, load_payload
+from capture import SOURCE_TCP, SOURCE_UDP, CaptureWriter, read_capture
+from state_codec import SEQ, PlayerStateCodec, SequenceHistory
+
+HANDSHAKE_TIMEOUT = 5.0
+UDP_HELLO_INTERVAL = 0.5
+SEND_RATE = 30.0  # player states per second at most
+HEARTBEAT_INTERVAL = 0.5  # resend an unchanged state this often; keeps acks well inside the 64-entry histories
+POSITION_THRESHOLD = 0.01  # units a player must move before it counts as a change
+ROTATION_THRESHOLD = 0.1  # degrees
+VELOCITY_THRESHOLD = 0.5  # units/s; stopping or turning sends at once so receivers don't extrapolate stale motion
+TELEPORT_SPEED = 200.0  # faster than this between frames is a respawn, not motion
+SEND_SLACK = 0.1  # fraction of a send interval a frame may come early and still use the slot
+PING_INTERVAL = 1.0
+
+
+class TrafficCounter:
+    """Messages and bytes per kind: running totals and the counts for the last full second."""
+
+    def __init__(self):
+        self.totals: dict = {}
+        self.total_bytes: dict = {}
+        self._last_second: dict = {}
+        self._window: dict = {}
+        self._window_start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _roll(self, now: float) -> None:
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            # A window that ended more than a second ago means nothing was sent since
+            self._last_second = self._window if elapsed < 2.0 else {}
+            self._window = {}
+            self._window_start = now if elapsed >= 2.0 else self._window_start + 1.0
+
+    def count(self, kind: str, nbytes: int = 0) -> None:
+        with self._lock:
+            self._roll(time.perf_counter())
+            window = self._window.setdefault(kind, [0, 0])
+            window[0] += 1
+            window[1] += nbytes
+            self.totals[kind] = self.totals.get(kind, 0) + 1
+            self.total_bytes[kind] = self.total_bytes.get(kind, 0) + nbytes
+
+    def per_second(self) -> dict:
+        """``{kind: {"messages": n, "bytes": n}}`` for the last full second."""
+        with self._lock:
+            self._roll(time.perf_counter())
+            return {kind: {"messages": m, "bytes": b} for kind, (m, b) in self._last_second.items()}
+
 
 class Network:
     """
     Minimal client for exchanging player state with the server.
+
+    Join/leave, damage and effects go over TCP. If the server offers a UDP
+    channel during the handshake, player transforms are sent as sequenced
+    datagrams once the server confirms it has seen one, and snapshots that
+    arrive out of order are dropped.
+
+    ``send_player`` can be called every frame: the state goes out at most
+    ``send_rate`` times a second, and only when it changed, apart from a
+    heartbeat every ``heartbeat`` seconds.
+
+    The client pings the server every ``PING_INTERVAL`` seconds and keeps a
+    smoothed round-trip time. ``sent``/``received`` count messages and bytes
+    per kind, and ``stats()`` gathers everything for the diagnostics overlay
+    or for tests.
+
+    When the server supports it, player state is sent with ``state_codec``:
+    quantized and delta-encoded against the last state the server
+    acknowledged. Incoming snapshots are decoded back into the same
+    ``{"object": "snapshot", "players": [...]}`` dicts JSON servers send,
+    listing only the fields that changed.
+
+    Other messages use the binary ``schema`` encoding when ``encoding`` is
+    ``"binary"`` and the server agrees in the handshake; ``"json"`` keeps
+    them readable for debugging. Either way ``receive_info`` returns the
+    same dicts.
+
+    After ``start_io_thread`` a background thread owns the sockets: it
+    reads and decodes incoming data, encodes and writes outgoing state,
+    and hands parsed messages over through a queue. ``receive_info`` then
+    only drains that queue, so the caller never waits on a socket.
+
+    With ``capture`` set to a path, everything received (handshake
+    included) is recorded there with receive times; see ``NetworkPlayback``.
     """
 
-    def __init__(self, server_addr: str, server_port: int, username: str):
+    def __init__(
+        self,
+        server_addr: str,
+        server_port: int,
+        username: str,
+        use_udp: bool = True,
+        use_state_codec: bool = True,
+        send_rate: float | None = SEND_RATE,
+        heartbeat: float | None = HEARTBEAT_INTERVAL,
+        capture: str | None = None,
+        encoding: str = ENCODING_BINARY,
+    ):
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Messages are small and latency-sensitive; don't let Nagle hold them back
+        self.client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         self.addr = server_addr
         self.port = server_port
         self.username = username
-        self.recv_size = 2048
+        self.recv_size = READ_SIZE
         self.id: Optional[str] = None
-        self._recv_buffer = ""
+        self._reader = FrameReader()
+        self.wanted_encoding = encoding
+        self.encoding = ENCODING_JSON  # until the server agrees to something else
+
+        # Unreliable channel for transforms
+        self.use_udp = use_udp
+        self.udp: Optional[socket.socket] = None
+        self.udp_ready = False
+        self.udp_stale_dropped = 0
+        self._datagram = memoryview(bytearray(MAX_DATAGRAM_SIZE))  # reused by every UDP read
+        self._udp_token = 0
+        self._udp_hello_at = 0.0
+        self._last_snapshot_seq: Optional[int] = None
+        self.snapshot_tick: Optional[int] = None  # newest server tick we've seen, sent with hit claims
+        self.tick_rate: Optional[float] = None  # snapshots per second, if the server numbers them by tick
+
+        # Delta-encoded player state
+        self.use_state_codec = use_state_codec
+        self.state_codec: Optional[PlayerStateCodec] = None
+        self._seq = 0
+        self._sent_states = SequenceHistory(64)
+        self._acked_state_seq: Optional[int] = None
+        self._snapshots = SequenceHistory(64)
+
+        # Outgoing player state throttle; None disables the rate limit / change check
+        self.send_rate = send_rate
+        self.heartbeat = heartbeat
+        self._last_sent_state = None
+        self._last_sent_at = float("-inf")
+        self._next_send_at = float("-inf")
+        self._frame_position = None
+        self._frame_at = 0.0
+        self.player_sends_skipped = 0
+
+        # Diagnostics
+        self.sent = TrafficCounter()
+        self.received = TrafficCounter()
+        self.decode_errors = 0
+        self.socket_errors = 0
+        self.rtt: Optional[float] = None  # smoothed round-trip time, seconds
+        self.rtt_var: Optional[float] = None
+        self.last_rtt: Optional[float] = None
+        self.min_rtt: Optional[float] = None
+        self._next_ping_at = 0.0
+        self.capture: Optional[CaptureWriter] = CaptureWriter(capture) if capture else None
+        # Frame bytes a non-blocking or timed-out send left behind; written before anything newer
+        self._unsent = bytearray()
+
+        # Background I/O; everything below is only touched under _io_lock or by the I/O thread
+        self._io_thread: Optional[threading.Thread] = None
+        self._io_lock = threading.Lock()
+        self._inbox = deque()
+        self._outbox = deque()
+        self._pending_state = None
+        self._wake_r: Optional[socket.socket] = None
+        self._wake_w: Optional[socket.socket] = None
+        self._stopping = False
+        self.closed = False
 
     def settimeout(self, value: float) -> None:
         self.client.settimeout(value)
 
-    def connect(self) -> None:
-        """Connect to the server and get a unique identifier."""
-        self.client.connect((self.addr, self.port))
-        self.id = self.client.recv(self.recv_size).decode("utf8")
-        self.client.send(self.username.encode("utf8"))
+    def close(self) -> None:
+        if self._io_thread is not None:
+            self._stopping = True
+            self._wake()
+            self._io_thread.join(1.0)
+            self._wake_r.close()
+            self._wake_w.close()
+        self.client.close()
+        if self.udp is not None:
+            self.udp.close()
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
 
-    def receive_info(self):
-        """Non-blocking receive. Returns a parsed JSON dict, list of dicts, or None."""
+    # Background I/O ------------------------------------------------------
+    def start_io_thread(self) -> None:
+        """Move socket reads, writes and decoding onto a daemon thread. Call after ``connect``."""
+        if self._io_thread is not None:
+            return
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        # The thread only reads when select says there's data, so the TCP socket can block on writes
+        self.client.settimeout(None)
+        self._io_thread = threading.Thread(target=self._io_loop, name="network-io", daemon=True)
+        self._io_thread.start()
+
+    def _wake(self) -> None:
         try:
-            msg = self.client.recv(self.recv_size)
-        except (socket.timeout, BlockingIOError):
-            return None
-        except socket.error as e:
-            print("network receive error:", e)
-            return None
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # already has a wake-up pending, or closing
 
-        if not msg:
-            return None
+    def _io_loop(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self.client, selectors.EVENT_READ, "tcp")
+        selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        udp_registered = False
+        try:
+            while not self._stopping:
+                if self.udp is not None and not udp_registered:
+                    selector.register(self.udp, selectors.EVENT_READ, "udp")
+                    udp_registered = True
+                messages = []
+                for key, _ in selector.select(UDP_HELLO_INTERVAL):
+                    if key.data == "wake":
+                        try:
+                            while self._wake_r.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    elif key.data == "tcp":
+                        if not self._receive_stream(messages):
+                            self.closed = True
+                            return
+                    else:
+                        self._receive_datagrams(messages)
+                if messages:
+                    with self._io_lock:
+                        self._inbox.extend(messages)
+                self._write_pending()
+        except OSError as e:
+            if not self._stopping:
+                print("network io error:", e)
+                self.socket_errors += 1
+                self.closed = True
+        finally:
+            selector.close()
 
-        self._recv_buffer += msg.decode("utf8")
-        messages = []
+    def _write_pending(self) -> None:
+        with self._io_lock:
+            state, self._pending_state = self._pending_state, None
+            frames = list(self._outbox)
+            self._outbox.clear()
+        if state is not None:
+            self._send_state(*state)
+        elif self.udp is not None and not self.udp_ready and time.perf_counter() - self._udp_hello_at >= UDP_HELLO_INTERVAL:
+            self._send_udp_hello()
+        for frame in frames:
+            self._write_frame(frame)
+        self._ping_if_due(self._write_frame)
+
+    # Diagnostics -----------------------------------------------------------
+    def _ping_if_due(self, send) -> None:
+        now = time.perf_counter()
+        if self.id is None or now < self._next_ping_at:
+            return
+        self._next_ping_at = now + PING_INTERVAL
+        frame = encode_payload({"object": "ping", "t": now}, self.encoding)
+        self.sent.count("ping", len(frame))
+        send(frame)
+
+    def _receive_pong(self, message: dict) -> None:
+        try:
+            rtt = time.perf_counter() - float(message["t"])
+        except (KeyError, TypeError, ValueError):
+            self.decode_errors += 1
+            return
+        if rtt < 0:
+            return
+        # Smoothed like TCP's SRTT/RTTVAR (RFC 6298)
+        if self.rtt is None:
+            self.rtt, self.rtt_var = rtt, rtt / 2
+        else:
+            self.rtt_var = 0.75 * self.rtt_var + 0.25 * abs(self.rtt - rtt)
+            self.rtt = 0.875 * self.rtt + 0.125 * rtt
+        self.last_rtt = rtt
+        self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+
+    def stats(self) -> dict:
+        """A snapshot of the connection's diagnostics; everything the overlay shows."""
+        with self._io_lock:
+            inbox, outbox = len(self._inbox), len(self._outbox)
+        ms = lambda v: None if v is None else v * 1000  # noqa: E731
+        return {
+            "connected": self.id is not None and not self.closed,
+            "transport": "udp" if self.udp_ready else "tcp",
+            "state_codec": self.state_codec is not None,
+            "encoding": self.encoding,
+            "rtt_ms": ms(self.rtt),
+            "rtt_var_ms": ms(self.rtt_var),
+            "last_rtt_ms": ms(self.last_rtt),
+            "min_rtt_ms": ms(self.min_rtt),
+            "sent_per_second": self.sent.per_second(),
+            "received_per_second": self.received.per_second(),
+            "sent_totals": dict(self.sent.totals),
+            "received_totals": dict(self.received.totals),
+            "decode_errors": self.decode_errors,
+            "socket_errors": self.socket_errors,
+            "udp_stale_dropped": self.udp_stale_dropped,
+            "player_sends_skipped": self.player_sends_skipped,
+            "inbox_depth": inbox,
+            "outbox_depth": outbox,
+        }
+
+    def connect(self) -> None:
+        """Connect to the server, exchange handshakes and get a unique identifier."""
+        timeout = self.client.gettimeout()
+        self.client.settimeout(HANDSHAKE_TIMEOUT)
+        try:
+            self.client.connect((self.addr, self.port))
+            hello = {"username": self.username, "udp": self.use_udp, "state_codec": self.use_state_codec, "encoding": self.wanted_encoding}
+            self.client.sendall(encode_hello(hello))
+            welcome = None
+            while welcome is None:
+                n = self._reader.recv_into(self.client, self.recv_size)
+                if not n:
+                    raise ConnectionError("server closed the connection during handshake")
+                if self.capture is not None:
+                    self.capture.write(SOURCE_TCP, self._reader.recent(n))
+                welcome = self._read_handshake()
+        finally:
+            self.client.settimeout(timeout)
+        self._apply_welcome(welcome)
 
+    def _read_handshake(self) -> Optional[dict]:
+        """The server's hello, once the reader has all of it."""
+        for kind, body in self._reader.frames():
+            if kind == KIND_HELLO:
+                return decode_hello(body)
+        return None
+
+    def _apply_welcome(self, welcome: dict) -> None:
+        if "error" in welcome:
+            raise ProtocolError(welcome["error"])
+        self.id = str(welcome["id"])
+        self.tick_rate = welcome.get("tick_rate")
+        if self.use_state_codec and "state_precision" in welcome:
+            self.state_codec = PlayerStateCodec(welcome["state_precision"])
+        if welcome.get("encoding") == ENCODING_BINARY and self.wanted_encoding == ENCODING_BINARY:
+            self.encoding = ENCODING_BINARY
+        if self.use_udp and "udp_port" in welcome:
+            self._open_udp(welcome["udp_port"], welcome["udp_token"])
+
+    def _open_udp(self, udp_port: int, token: int) -> None:
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.connect((self.addr, udp_port))
+        self.udp.setblocking(False)
+        self._udp_token = token
+        self._send_udp_hello()
+
+    def _send_udp_hello(self) -> None:
+        self._udp_hello_at = time.perf_counter()
+        self._send_datagram(DGRAM_HELLO, b"")
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _send_datagram(self, kind: int, body: bytes, seq: Optional[int] = None) -> None:
+        if seq is None:
+            seq = self._next_seq()
+        try:
+            self.udp.send(encode_datagram(kind, self._udp_token, seq, body))
+        except (BlockingIOError, ConnectionRefusedError):
+            pass
+        except socket.error as e:
+            print("network udp send error:", e)
+            self.socket_errors += 1
+
+    def _receive_datagrams(self, messages: list) -> None:
+        """Drain the UDP socket, keeping only snapshots newer than the last one applied."""
         while True:
             try:
-                start = self._recv_buffer.index("{")
-                end = self._recv_buffer.index("}", start) + 1
-            except ValueError:
-                break
+                data = self._datagram[:self.udp.recv_into(self._datagram)]
+            except (BlockingIOError, ConnectionRefusedError):
+                return
+            except socket.error as e:
+                print("network udp receive error:", e)
+                self.socket_errors += 1
+                return
+            if self.capture is not None:
+                self.capture.write(SOURCE_UDP, bytes(data))
+            self._decode_datagram(data, messages)
 
-            chunk = self._recv_buffer[start:end]
-            self._recv_buffer = self._recv_buffer[end:]
-            try:
-                messages.append(json.loads(chunk))
-            except Exception as e:
-                print("network json error:", e)
-                continue
+    def _decode_datagram(self, data: bytes, messages: list) -> None:
+        try:
+            kind, _, seq, body = decode_datagram(data)
+            if kind != DGRAM_SNAPSHOT:
+                return
+            self.received.count("snapshot", len(data))
+            if not seq_newer(seq, self._last_snapshot_seq):
+                self.udp_stale_dropped += 1
+                return
+            self._receive_snapshot(seq, body, messages)
+        except Exception as e:
+            print("network udp decode error:", e)
+            self.decode_errors += 1
+
+    def _receive_snapshot(self, seq: int, body, messages: list) -> None:
+        if self.state_codec is None:
+            self._last_snapshot_seq = seq
+            self.snapshot_tick = seq
+            messages.append(load_payload(body))
+            return
+        try:
+            world, changes, ack = self.state_codec.decode_snapshot(body, self._snapshots)
+        except KeyError:
+            # Baseline already forgotten; the server re-sends full state once our ack moves on
+            return
+        self._last_snapshot_seq = seq
+        self.snapshot_tick = seq
+        self._snapshots.put(seq, world)
+        if ack and seq_newer(ack, self._acked_state_seq):
+            self._acked_state_seq = ack
+        if changes:
+            players = [{"id": str(player_id), **fields} for player_id, fields in changes.items()]
+            messages.append({"object": "snapshot", "tick": seq, "players": players})
+
+    def receive_info(self):
+        """Non-blocking receive. Returns a parsed JSON dict, list of dicts, or None."""
+        if self._io_thread is not None:
+            with self._io_lock:
+                messages = list(self._inbox)
+                self._inbox.clear()
+        else:
+            messages = []
+            if not self._receive_stream(messages):
+                return None
+            if self.udp is not None:
+                self._receive_datagrams(messages)
+            self._flush_unsent()
+            self._ping_if_due(self._write_frame)
+        return self._unwrap(messages)
 
+    @staticmethod
+    def _unwrap(messages: list):
         if not messages:
             return None
         if len(messages) == 1:
             return messages[0]
         return messages
 
+    def _receive_stream(self, messages: list) -> bool:
+        """One TCP read, decoded into ``messages``. False once the server has closed the connection."""
+        try:
+            n = self._reader.recv_into(self.client, self.recv_size)
+        except (socket.timeout, BlockingIOError):
+            n = None
+        except socket.error as e:
+            print("network receive error:", e)
+            self.socket_errors += 1
+            return False
+
+        if n == 0:
+            return False
+        if n and self.capture is not None:
+            self.capture.write(SOURCE_TCP, self._reader.recent(n))
+        self._decode_frames(messages)
+        return True
+
+    def _decode_frames(self, messages: list) -> None:
+        """Decode every complete frame buffered in the reader into ``messages``."""
+        for kind, body in self._reader.frames():
+            if kind == KIND_SNAPSHOT:
+                self.received.count("snapshot", len(body) + FRAME_HEADER.size)
+                try:
+                    (seq,) = SEQ.unpack_from(body)
+                    self._receive_snapshot(seq, body[SEQ.size:], messages)
+                except Exception as e:
+                    print("network snapshot error:", e)
+                    self.decode_errors += 1
+                continue
+            if kind == KIND_JSON:
+                decode = decode_message
+            elif kind == KIND_MESSAGE:
+                decode = decode_binary
+            else:
+                continue
+            try:
+                message = decode(body)
+            except Exception as e:
+                print("network decode error:", e)
+                self.decode_errors += 1
+                continue
+            self.received.count(str(message.get("object")), len(body) + FRAME_HEADER.size)
+            if message.get("object") == "pong":
+                self._receive_pong(message)
+                continue
+            if message.get("object") == "udp_ready":
+                self.udp_ready = True
+                continue
+            if message.get("object") == "snapshot":
+                self.snapshot_tick = message.get("tick", self.snapshot_tick)
+            messages.append(message)
+
     def send_player(self, player):
         """Send the local player's transform/health."""
         if self.id is None:
             return
+        position = (player.world_x, player.world_y, player.world_z)
+        health = getattr(player, "health", 0)
+        gun = getattr(player, "current_gun", 0)
+        now = time.perf_counter()
+        velocity = self._track_velocity(position, now)
+        state = (position, player.rotation_y, health, gun, velocity)
+        if not self._should_send(state, now):
+            self.player_sends_skipped += 1
+            return
+        self._last_sent_state = state
+        self._last_sent_at = now
+        if self.send_rate:
+            # Slots stay on a fixed grid so frame times that don't divide it evenly still get the full rate
+            interval = 1 / self.send_rate
+            base = self._next_send_at if now - self._next_send_at < interval else now
+            self._next_send_at = base + interval
+        if self._io_thread is not None:
+            # Only the newest state matters; the I/O thread encodes it against its own acks
+            with self._io_lock:
+                self._pending_state = state
+            self._wake()
+            return
+        self._send_state(*state)
+
+    def _track_velocity(self, position: tuple, now: float) -> tuple:
+        """Velocity over the last frame, from consecutive ``send_player`` calls."""
+        previous, previous_at = self._frame_position, self._frame_at
+        self._frame_position, self._frame_at = position, now
+        dt = now - previous_at
+        if previous is None or not 0 < dt < HEARTBEAT_INTERVAL:
+            return (0.0, 0.0, 0.0)
+        velocity = tuple((a - b) / dt for a, b in zip(position, previous))
+        if max(abs(v) for v in velocity) > TELEPORT_SPEED:
+            return (0.0, 0.0, 0.0)
+        return velocity
+
+    def _should_send(self, state: tuple, now: float) -> bool:
+        if self.send_rate and now < self._next_send_at - SEND_SLACK / self.send_rate:
+            return False
+        elapsed = now - self._last_sent_at
+        if self.heartbeat is None or self._last_sent_state is None or elapsed >= self.heartbeat:
+            return True
+        position, rotation, health, gun, velocity = state
+        last_position, last_rotation, last_health, last_gun, last_velocity = self._last_sent_state
+        return (
+            health != last_health
+            or gun != last_gun
+            or abs(((rotation or 0) - (last_rotation or 0) + 180) % 360 - 180) > ROTATION_THRESHOLD
+            or max(abs(a - b) for a, b in zip(position, last_position)) > POSITION_THRESHOLD
+            or max(abs(a - b) for a, b in zip(velocity, last_velocity)) > VELOCITY_THRESHOLD
+        )
+
+    def _send_state(self, position, rotation: float, health: float, gun: int, velocity=(0.0, 0.0, 0.0)) -> None:
+        if self.udp is not None and not self.udp_ready:
+            if time.perf_counter() - self._udp_hello_at >= UDP_HELLO_INTERVAL:
+                self._send_udp_hello()
+        use_datagram = self.udp is not None and self.udp_ready
+
+        if self.state_codec is not None:
+            seq = self._next_seq()
+            q = self.state_codec.quantize(position, rotation, health, gun, velocity)
+            baseline = self._sent_states.get(self._acked_state_seq)
+            body = self.state_codec.encode_state(q, baseline, self._acked_state_seq or 0, self._last_snapshot_seq or 0)
+            self._sent_states.put(seq, q)
+            if use_datagram:
+                self.sent.count("player", DATAGRAM_HEADER.size + len(body))
+                self._send_datagram(DGRAM_PLAYER, body, seq)
+            else:
+                frame = encode_frame(SEQ.pack(seq) + body, KIND_PLAYER_STATE)
+                self.sent.count("player", len(frame))
+                self._write_frame(frame)
+            return
+
         player_info = {
             "object": "player",
             "id": self.id,
-            "position": (player.world_x, player.world_y, player.world_z),
-            "rotation": player.rotation_y,
-            "health": getattr(player, "health", 0),
-            "gun": getattr(player, "current_gun", 0),
+            "position": position,
+            "rotation": rotation,
+            "health": health,
+            "gun": gun,
+            "velocity": velocity,
             "joined": False,
             "left": False,
         }
-        self._send_payload(player_info)
+        if use_datagram:
+            body = dump_payload(player_info, self.encoding)
+            self.sent.count("player", DATAGRAM_HEADER.size + len(body))
+            self._send_datagram(DGRAM_PLAYER, body)
+            return
+        frame = encode_payload(player_info, self.encoding)
+        self.sent.count("player", len(frame))
+        self._write_frame(frame)
 
-    def send_damage(self, target_id: str, amount: float, headshot: bool = False) -> None:
-        """Tell the server a player took damage."""
+    def send_damage(self, target_id: str, amount: float, headshot: bool = False, origin=None, direction=None, splash=None, tick=None) -> None:
+        """
+        Claim a hit on another player. The server checks it against where the
+        target was at ``tick``: a shot needs its ``origin`` and ``direction``,
+        a rocket its ``splash`` centre.
+        """
         if self.id is None:
             return
         payload = {
@@ -89,7 +636,13 @@ class Network:
             "target": target_id,
             "amount": amount,
             "headshot": False,
+            "tick": self.snapshot_tick if tick is None else tick,
         }
+        if origin is not None:
+            payload["origin"] = origin
+            payload["direction"] = direction
+        if splash is not None:
+            payload["splash"] = splash
         self._send_payload(payload)
 
     def send_projectile(self, position, rotation, kind: str = "bullet", direction=None) -> None:
@@ -122,8 +675,124 @@ class Network:
         }
         self._send_payload(payload)
 
+    def send_effect(self, effect: str, position, seed: int) -> None:
+        """Broadcast a seeded particle effect; receivers regenerate the burst from ``seed``."""
+        if self.id is None:
+            return
+        self._send_payload({"object": "effect", "id": self.id, "effect": effect, "position": position, "seed": seed})
+
     def _send_payload(self, payload: dict) -> None:
+        frame = encode_payload(payload, self.encoding)
+        self.sent.count(payload["object"], len(frame))
+        self._send_frame(frame)
+
+    def _send_frame(self, frame: bytes) -> None:
+        if self._io_thread is not None:
+            if self.closed:
+                return
+            with self._io_lock:
+                self._outbox.append(frame)
+            self._wake()
+            return
+        self._write_frame(frame)
+
+    def _write_frame(self, frame: bytes) -> None:
+        """
+        Write a frame after any earlier bytes still unsent. ``sendall`` could
+        send part of a frame and then time out, which would leave the stream
+        out of step. So whatever the socket doesn't take now is kept and
+        written on the next send or ``receive_info``.
+        """
+        self._unsent += frame
+        self._flush_unsent()
+
+    def _flush_unsent(self) -> None:
         try:
-            self.client.send(json.dumps(payload).encode("utf8"))
+            while self._unsent:
+                del self._unsent[:self.client.send(self._unsent)]
+        except (BlockingIOError, socket.timeout):
+            pass
         except socket.error as e:
             print("network send error:", e)
+            self.socket_errors += 1
+            self._unsent.clear()
+
+
+class NetworkPlayback(Network):
+    """
+    Replays a capture file (see ``capture``) through the same decoding as a
+    live connection, without a server, so client-side message handling can
+    be benchmarked repeatably.
+
+    ``receive_info`` releases the records whose receive time has come, with
+    the recording sped up by ``speed``; ``speed=None`` releases everything
+    at once. Time is read from ``clock``, so a clock advanced by a fixed
+    step per frame gives the same frames on every run. Nothing is sent and
+    the recorded session's pongs are ignored.
+    """
+
+    def __init__(self, path: str, speed: float | None = 1.0, clock=time.perf_counter, **kwargs):
+        super().__init__("playback", 0, "playback", **kwargs)
+        self.client.close()
+        self.path = path
+        self.speed = speed
+        self.clock = clock
+        self.finished = False
+        self._records = read_capture(path)
+        self._next_record = None
+        self._origin = 0.0
+        self._started_at = 0.0
+
+    def settimeout(self, value: float) -> None:
+        pass
+
+    def start_io_thread(self) -> None:
+        pass
+
+    def connect(self) -> None:
+        """Read the handshake from the capture."""
+        welcome = None
+        while welcome is None:
+            record = next(self._records, None)
+            if record is None:
+                raise ProtocolError(f"{self.path} has no handshake")
+            t, source, data = record
+            if source == SOURCE_TCP:
+                self._reader.feed(data)
+                welcome = self._read_handshake()
+        self._apply_welcome(welcome)
+        self._origin = t
+        self._started_at = self.clock()
+
+    def receive_info(self):
+        due = None if self.speed is None else self._origin + (self.clock() - self._started_at) * self.speed
+        messages = []
+        self._decode_frames(messages)  # whatever arrived along with the handshake
+        while not self.finished:
+            if self._next_record is None:
+                self._next_record = next(self._records, None)
+                if self._next_record is None:
+                    self.finished = True
+                    break
+            t, source, data = self._next_record
+            if due is not None and t > due:
+                break
+            self._next_record = None
+            if source == SOURCE_TCP:
+                self._reader.feed(data)
+                self._decode_frames(messages)
+            else:
+                self._decode_datagram(data, messages)
+        return self._unwrap(messages)
+
+    def _open_udp(self, udp_port: int, token: int) -> None:
+        pass
+
+    def _receive_pong(self, message: dict) -> None:
+        pass
+
+    def _send_datagram(self, kind: int, body: bytes, seq: Optional[int] = None) -> None:
+        pass
+
+    def _write_frame(self, frame: bytes) -> None:
+        pass
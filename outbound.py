@@ -0,0 +1,111 @@
+"""
+Bounded per-connection send queue used by both server cores.
+"""
+
+import time
+from collections import deque
+
+OUTBOUND_LIMIT = 256 * 1024  # queued bytes before droppable frames are shed
+OUTBOUND_HARD_LIMIT = 4 * OUTBOUND_LIMIT  # reliable backlog that marks a client as too slow
+SLOW_CLIENT_TIMEOUT = 5.0  # seconds a backlog may sit without the client reading any of it
+WRITE_CHUNK = 64 * 1024
+
+
+class OutboundQueue:
+    """
+    Frames waiting to be written to one client.
+
+    A frame is either reliable (handshake, joins and leaves, damage, JSON
+    snapshots) or droppable (projectile/particle relays and anything newer
+    data supersedes). Once ``limit`` bytes are queued, new droppable frames
+    are refused and the oldest queued droppable frames are shed to make
+    room for reliable ones, so a slow reader gets the newest effects rather
+    than a growing pile of stale ones. Reliable frames are never dropped;
+    a backlog past ``hard_limit``, or one the client hasn't read any of for
+    ``stall_timeout`` seconds, makes ``too_slow`` true.
+
+    Not thread-safe: the threaded core guards it with a lock, and only the
+    writer calls ``peek``/``consume``.
+    """
+
+    def __init__(self, limit: int = OUTBOUND_LIMIT, hard_limit: int = OUTBOUND_HARD_LIMIT, stall_timeout: float = SLOW_CLIENT_TIMEOUT):
+        self.limit = limit
+        self.hard_limit = hard_limit
+        self.stall_timeout = stall_timeout
+        self._frames = deque()  # (data, droppable) not yet handed to the socket
+        self._out = bytearray()  # bytes being written, possibly partly sent
+        self.queued_bytes = 0
+        self.max_queued_bytes = 0
+        self.dropped = 0
+        self.dropped_bytes = 0
+        self.blocked_since: float | None = None
+
+    def __bool__(self) -> bool:
+        return self.queued_bytes > 0
+
+    def push(self, data, droppable: bool = False) -> bool:
+        """Queue a frame; returns False if it was dropped."""
+        size = len(data)
+        if self.queued_bytes + size > self.limit:
+            if droppable:
+                self._count_drop(size)
+                return False
+            self._shed(self.queued_bytes + size - self.limit)
+        if not self.queued_bytes:
+            self.blocked_since = time.perf_counter()
+        self._frames.append((data, droppable))
+        self.queued_bytes += size
+        if self.queued_bytes > self.max_queued_bytes:
+            self.max_queued_bytes = self.queued_bytes
+        return True
+
+    def _shed(self, needed: int) -> None:
+        kept = deque()
+        freed = 0
+        for data, droppable in self._frames:
+            if droppable and freed < needed:
+                freed += len(data)
+                self._count_drop(len(data))
+                continue
+            kept.append((data, droppable))
+        self._frames = kept
+        self.queued_bytes -= freed
+
+    def _count_drop(self, size: int) -> None:
+        self.dropped += 1
+        self.dropped_bytes += size
+
+    def peek(self, max_bytes: int = WRITE_CHUNK) -> memoryview:
+        """The next bytes to write. Frames only leave the droppable pool once they are here."""
+        while self._frames and len(self._out) < max_bytes:
+            self._out += self._frames.popleft()[0]
+        return memoryview(self._out)[:max_bytes]
+
+    def consume(self, sent: int) -> None:
+        """Mark ``sent`` bytes from ``peek`` as written."""
+        del self._out[:sent]
+        self.queued_bytes -= sent
+        if sent:
+            self.blocked_since = time.perf_counter() if self.queued_bytes else None
+
+    def flush(self, send) -> int:
+        """
+        Write one chunk with ``send`` (a non-blocking ``socket.send``) and
+        return the bytes sent. Errors other than would-block propagate.
+        """
+        with self.peek() as chunk:
+            if not chunk:
+                return 0
+            try:
+                sent = send(chunk)
+            except BlockingIOError:
+                sent = 0
+        self.consume(sent)
+        return sent
+
+    def too_slow(self, now: float | None = None) -> bool:
+        if self.queued_bytes > self.hard_limit:
+            return True
+        if self.blocked_since is None:
+            return False
+        return (now if now is not None else time.perf_counter()) - self.blocked_since > self.stall_timeout
@@ -1,31 +1,188 @@
+"""
+Instanced particles.
+
+Every puff used to be an ``Entity`` with its own ``update``, a fade-out
+sequence and a destroy timer. Now each kind of particle (model and
+texture) is one ``ParticleEmitter``: a single node drawn once per live
+particle with hardware instancing. The emitter moves all of its particles
+in one ``update``, in numpy arrays when numpy is installed, and uploads
+their positions, sizes, rotations and alphas to a float texture that
+``shaders/particle_vert.glsl`` reads per instance.
+
+Particles keep their old motion: they fly along their direction at a
+spray speed that falls to zero over their one second life, and fade out
+from 0.7 to 0.9 seconds. ``particle_system`` drops new particles once
+``MAX_PARTICLES`` are alive.
+"""
+
+import math
+import random
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from panda3d.core import OmniBoundingVolume, SamplerState, Shader, Texture, TransparencyAttrib
 from ursina import *
-from ursina import curve
-
-class Particles(Entity):
-    def __init__(self, position, direction = Vec3(random.random(), random.random(), random.random()), spray_amount = 30, **kwargs):
-        super().__init__(
-            # Use the cached BAM by referring to the model without extension
-            model = "particle",
-            texture = "particle.png",
-            scale = 0.2,
-            position = position, 
-            rotation_y = random.random() * 360
-        )
-        
-        self.direction = direction
-        self.spray_amount = spray_amount
-        self.prev_spray_amount = self.spray_amount
-
-        self.destroy(1)
-
-        for key, value in kwargs.items():
-            setattr(self, key ,value)
+
+from effects import burst
+
+MAX_PARTICLES = 8192  # live particles across every emitter
+LIFETIME = 1.0
+FADE_START = 0.7
+FADE_LENGTH = 0.2
+PARTICLE_SIZE = 0.2
+DATA_WIDTH = 512  # texels per row of an emitter's data texture; two per particle
+CAPACITY_STEP = DATA_WIDTH // 2  # emitters grow by whole rows
+
+
+class ParticleEmitter(Entity):
+    """All live particles with one model and texture, drawn as instances of a single node."""
+
+    shader_program = None
+
+    def __init__(self, model = "particle", texture = "particle.png"):
+        super().__init__(model = model, texture = texture)
+
+        if ParticleEmitter.shader_program is None:
+            ParticleEmitter.shader_program = Shader.load(Shader.SL_GLSL, vertex = "shaders/particle_vert.glsl", fragment = "shaders/particle_frag.glsl")
+        self.setShader(ParticleEmitter.shader_program, 1)
+        self.setTransparency(TransparencyAttrib.M_alpha)
+        # Instances are spread over the world, so never cull against the model's own bounds
+        self.node().setBounds(OmniBoundingVolume())
+        self.node().setFinal(True)
+        self.visible = False
+
+        self.count = 0
+        self.capacity = 0
+        self.data_texture = Texture("particle data")
+        self._grow(CAPACITY_STEP)
+
+    def _grow(self, capacity):
+        count = self.count
+        if np is not None:
+            def resized(old, shape):
+                new = np.zeros(shape, dtype = np.float32)
+                if old is not None:
+                    new[:count] = old[:count]
+                return new
+            first = self.capacity == 0
+            # Plural names: position and rotation are the emitter entity's own transform
+            self.positions = resized(None if first else self.positions, (capacity, 3))
+            self.directions = resized(None if first else self.directions, (capacity, 3))
+            self.spray = resized(None if first else self.spray, capacity)
+            self.spray_rate = resized(None if first else self.spray_rate, capacity)
+            self.age = resized(None if first else self.age, capacity)
+            self.rotations = resized(None if first else self.rotations, capacity)
+            self.data = np.zeros((capacity * 2, 4), dtype = np.float32)
+        else:
+            if self.capacity == 0:
+                self.particles = []  # [x, y, z, dx, dy, dz, spray, spray rate, age, rotation]
+            self.data = array("f", bytes(capacity * 2 * 4 * 4))
+        self.capacity = capacity
+
+        self.data_texture.setup2dTexture(DATA_WIDTH, capacity * 2 // DATA_WIDTH, Texture.T_float, Texture.F_rgba32)
+        self.data_texture.setMinfilter(SamplerState.FT_nearest)
+        self.data_texture.setMagfilter(SamplerState.FT_nearest)
+        self.setShaderInput("particleData", self.data_texture)
+
+    def add(self, position, direction, spray_amount, rotation):
+        if self.count == self.capacity:
+            self._grow(self.capacity + CAPACITY_STEP)
+        i = self.count
+        self.count += 1
+        if np is not None:
+            self.positions[i] = position
+            self.directions[i] = direction
+            self.spray[i] = spray_amount
+            self.spray_rate[i] = spray_amount
+            self.age[i] = 0
+            self.rotations[i] = rotation
+        else:
+            self.particles.append([*position, *direction, spray_amount, spray_amount, 0.0, rotation])
 
     def update(self):
-        self.position += self.direction * self.spray_amount * time.dt
-        self.spray_amount -= self.prev_spray_amount * time.dt
+        if not self.count:
+            return
+        if np is not None:
+            self._advance_arrays(time.dt)
+        else:
+            self._advance_lists(time.dt)
+
+        if self.count:
+            data = self.data if np is None else self.data.reshape(-1)
+            self.data_texture.setRamImageAs(data.tobytes(), "RGBA")
+            self.setInstanceCount(self.count)
+        self.visible = self.count > 0
+
+    def _advance_arrays(self, dt):
+        n = self.count
+        age = self.age[:n]
+        age += dt
+        alive = age < LIFETIME
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            for column in (self.positions, self.directions, self.spray, self.spray_rate, self.age, self.rotations):
+                column[:len(keep)] = column[keep]
+            n = self.count = len(keep)
+            if not n:
+                return
+            age = self.age[:n]
+
+        spray = self.spray[:n]
+        position = self.positions[:n]
+        position += self.directions[:n] * (spray * dt)[:, None]
+        spray -= self.spray_rate[:n] * dt
+
+        data = self.data
+        data[0:n * 2:2, :3] = position
+        data[0:n * 2:2, 3] = PARTICLE_SIZE
+        data[1:n * 2:2, 0] = np.clip((FADE_START + FADE_LENGTH - age) / FADE_LENGTH, 0, 1)
+        data[1:n * 2:2, 1] = self.rotations[:n]
+
+    def _advance_lists(self, dt):
+        self.particles = [p for p in self.particles if p[8] + dt < LIFETIME]
+        self.count = len(self.particles)
+        data = self.data
+        for i, p in enumerate(self.particles):
+            p[8] += dt
+            p[0] += p[3] * p[6] * dt
+            p[1] += p[4] * p[6] * dt
+            p[2] += p[5] * p[6] * dt
+            p[6] -= p[7] * dt
+            o = i * 8
+            data[o:o + 5] = array("f", (p[0], p[1], p[2], PARTICLE_SIZE, min(1, max(0, (FADE_START + FADE_LENGTH - p[8]) / FADE_LENGTH))))
+            data[o + 5] = p[9]
+
+
+class ParticleSystem:
+    """The emitters for every kind of particle, made on first use, and the cap on live particles."""
+
+    def __init__(self, cap = MAX_PARTICLES):
+        self.cap = cap
+        self.emitters = {}
+
+    @property
+    def live(self):
+        return sum(emitter.count for emitter in self.emitters.values())
+
+    def emit(self, position, direction, spray_amount = 30, model = "particle", texture = "particle.png"):
+        """Spawn one particle; returns False when the cap is reached and it was dropped."""
+        if self.live >= self.cap:
+            return False
+        emitter = self.emitters.get((model, texture))
+        if emitter is None:
+            emitter = self.emitters[(model, texture)] = ParticleEmitter(model, texture)
+        emitter.add(tuple(position), tuple(direction), spray_amount, random.random() * 2 * math.pi)
+        return True
+
+
+particle_system = ParticleSystem()
+
 
-    def destroy(self, delay = 1):
-        self.fade_out(duration = 0.2, delay = 0.7, curve = curve.linear)
-        destroy(self, delay)
-        del self
+def spawn_burst(effect, position, seed):
+    """Spawn the particles of a seeded effect; every client gets the same burst from the same seed."""
+    for direction, spray, texture in burst(effect, seed):
+        particle_system.emit(position, direction, spray_amount = spray, model = "particles", texture = texture)
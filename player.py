@@ -7,6 +7,7 @@ from guns import *
 from abilities import *
 
 from keybindings import keybindings
+from sounds import sound_manager
 import json
 
 sign = lambda x: -1 if x < 0 else (1 if x > 0 else 0)
@@ -120,9 +121,6 @@ class Player(Entity):
                 json.dump({"highscore": 0}, hs, indent = 4)
                 self.highscore = 0
 
-        # Audio
-        self.fall_sound = Audio("fall.wav", autoplay=False)
-
     def jump(self):
         self.jumping = True
         self.velocity_y = self.jump_height
@@ -141,7 +139,7 @@ class Player(Entity):
             if not self.grounded:
                 self.velocity_y = 0
                 self.grounded = True
-                self.fall_sound.play()
+                sound_manager.play("fall")
 
             # Check if hitting a wall or steep slope
             if y_dir(self.velocity_y) == -1:
@@ -348,7 +346,10 @@ class Player(Entity):
         self.velocity_x = 0
         self.velocity_y = 0
         self.velocity_z = 0
-        self.health = 10
+        # Online the server owns health and only restores it after a death, so a reset doesn't heal
+        multiplayer = getattr(self, "multiplayer", None)
+        if multiplayer is None or not multiplayer.connected or self.health <= 0:
+            self.health = 10
         self.healthbar.value = self.health
         self.ability_bar.value = 10
         self.dead = False
@@ -0,0 +1,129 @@
+"""
+Remote projectiles drawn from fixed pools.
+
+Every remote shot used to be a new ``Entity`` with a child trail entity, its
+own ``update`` and a destroy timer, so sustained remote fire meant dozens of
+node allocations a second. ``ProjectilePool`` is one entity that builds the
+projectile nodes (model plus trail) for each kind up front and moves every
+live one in a single ``update``. Positions, velocities and expiry times are
+kept in arrays, numpy ones when it is installed, and only the transforms of
+live nodes are written back. A shot takes its kind's oldest slot, so when a
+pool is full the projectile furthest along its flight makes way.
+"""
+
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ursina import Entity, Vec3, color, time
+
+from trail_renderer import TrailRenderer
+
+PROJECTILE_LIFETIME = 2.0  # seconds a remote projectile flies before its slot is free
+
+# kind: (model, scale, speed, trail colour, pool size)
+# Speeds match local projectiles: bullets ~2000, rockets ~600 (per in-game animation)
+KINDS = {
+    "bullet": ("bullet.obj", 0.08, 2000, color.azure, 192),
+    "rocket": ("rocket.obj", 0.2, 600, color.orange, 32),
+}
+
+
+class _Slots:
+    """The prebuilt nodes of one projectile kind and their flight state."""
+
+    def __init__(self, parent: Entity, model: str, scale: float, speed: float, trail_color, size: int):
+        self.speed = speed
+        self.size = size
+        self.nodes = []
+        for _ in range(size):
+            node = Entity(parent=parent, model=model, texture="level.png", scale=scale)
+            node.trail = TrailRenderer(8, trail_color, color.clear, 5, parent=node, enabled=False)
+            node.visible = False
+            self.nodes.append(node)
+        if np is not None:
+            self.position = np.zeros((size, 3))
+            self.velocity = np.zeros((size, 3))
+        else:
+            self.position = [[0.0, 0.0, 0.0] for _ in range(size)]
+            self.velocity = [[0.0, 0.0, 0.0] for _ in range(size)]
+        self.expires = [0.0] * size
+        self.active = set()
+        self._expiry = deque()  # (expires, slot) in spawn order
+        self._next = 0
+
+    def spawn(self, position, rotation, direction, expires: float):
+        i = self._next
+        self._next = (i + 1) % self.size
+        node = self.nodes[i]
+        node.position = position
+        node.rotation = rotation
+        if direction:
+            dir_vec = Vec3(*direction)
+            if dir_vec.length() > 0:
+                node.look_at(node.position + dir_vec)
+        forward = node.forward
+        self.position[i][0], self.position[i][1], self.position[i][2] = position
+        self.velocity[i][0], self.velocity[i][1], self.velocity[i][2] = (v * self.speed for v in forward)
+        self.expires[i] = expires
+        self._expiry.append((expires, i))
+        if i not in self.active:
+            self.active.add(i)
+            node.visible = True
+            node.trail.enabled = True
+        node.trail.reset()
+
+    def advance(self, dt: float, now: float):
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            expires, i = expiry.popleft()
+            if self.expires[i] == expires:  # not taken over by a newer shot
+                self.active.discard(i)
+                self.nodes[i].visible = False
+                self.nodes[i].trail.enabled = False
+                if np is not None:
+                    self.velocity[i] = 0.0
+        if not self.active:
+            return
+
+        nodes = self.nodes
+        if np is not None:
+            self.position += self.velocity * dt
+            rows = self.position.tolist()
+            for i in self.active:
+                x, y, z = rows[i]
+                nodes[i].setPos(x, y, z)
+            return
+        for i in self.active:
+            p, v = self.position[i], self.velocity[i]
+            p[0] += v[0] * dt
+            p[1] += v[1] * dt
+            p[2] += v[2] * dt
+            nodes[i].setPos(p[0], p[1], p[2])
+
+
+class ProjectilePool(Entity):
+    """One entity that owns, moves and recycles every remote projectile."""
+
+    def __init__(self, kinds: dict = KINDS, lifetime: float = PROJECTILE_LIFETIME):
+        super().__init__()
+        self.lifetime = lifetime
+        self.clock = 0.0
+        self.pools = {kind: _Slots(self, *spec) for kind, spec in kinds.items()}
+
+    def spawn(self, position, rotation, kind: str = "bullet", direction=None):
+        """Fire a projectile from ``position``, along ``direction`` if given, else its ``rotation``."""
+        pool = self.pools.get(kind) or self.pools["rocket"]
+        pool.spawn(position, rotation, direction, self.clock + self.lifetime)
+
+    @property
+    def live(self) -> int:
+        return sum(len(pool.active) for pool in self.pools.values())
+
+    def update(self):
+        self.clock += time.dt
+        for pool in self.pools.values():
+            pool.advance(time.dt, self.clock)
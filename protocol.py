@@ -0,0 +1,198 @@
+"""
+Wire protocol shared by ``network.Network`` and ``server``.
+
+Every message on the TCP stream is a frame: a 2-byte big-endian body length,
+a 1-byte frame kind, then the body. The connection opens with a ``HELLO``
+frame in each direction whose body starts with the protocol version byte.
+
+Player transforms can also travel over an unreliable UDP channel negotiated
+in that handshake. Each datagram carries a kind, the sender's session token
+(zero from the server) and a sequence number so stale packets are dropped.
+"""
+
+import json
+import struct
+
+PROTOCOL_VERSION = 1
+
+FRAME_HEADER = struct.Struct("!HB")
+MAX_FRAME_SIZE = 0xFFFF
+READ_SIZE = 16384  # bytes asked for per recv_into
+READER_CAPACITY = 65536  # initial FrameReader buffer; holds a few reads before compacting
+
+# Frame kinds
+KIND_HELLO = 1
+KIND_JSON = 2
+KIND_PLAYER_STATE = 3  # state_codec player update, prefixed with its sequence number
+KIND_SNAPSHOT = 4  # state_codec snapshot, prefixed with its tick
+KIND_MESSAGE = 5  # schema-encoded message, see ``schema``
+
+VERSION_BYTE = struct.Struct("!B")
+
+DATAGRAM_HEADER = struct.Struct("!BII")
+MAX_DATAGRAM_SIZE = 65507
+SEQ_MASK = 0xFFFFFFFF
+
+# Datagram kinds
+DGRAM_HELLO = 1
+DGRAM_PLAYER = 2
+DGRAM_SNAPSHOT = 3
+
+
+class ProtocolError(Exception):
+    """Raised when the peer sends something this protocol version can't accept."""
+
+
+def encode_frame(body, kind: int = KIND_JSON) -> bytes:
+    """Prefix a bytes-like ``body`` with its frame header."""
+    if len(body) > MAX_FRAME_SIZE:
+        raise ValueError(f"frame body of {len(body)} bytes exceeds {MAX_FRAME_SIZE}")
+    return FRAME_HEADER.pack(len(body), kind) + body
+
+
+def dump_message(payload: dict) -> bytes:
+    """Serialize a message dict to compact JSON bytes."""
+    return json.dumps(payload, separators=(",", ":")).encode("utf8")
+
+
+def encode_message(payload: dict) -> bytes:
+    """Serialize a message dict into a JSON frame."""
+    return encode_frame(dump_message(payload))
+
+
+def decode_message(body) -> dict:
+    """Parse the body of a JSON frame (bytes or memoryview); it must hold an object."""
+    message = json.loads(str(body, "utf8"))
+    if not isinstance(message, dict):
+        raise ValueError(f"message is a JSON {type(message).__name__}, not an object")
+    return message
+
+
+def encode_hello(fields: dict) -> bytes:
+    """Build a handshake frame: version byte followed by JSON fields."""
+    body = VERSION_BYTE.pack(PROTOCOL_VERSION) + dump_message(fields)
+    return encode_frame(body, KIND_HELLO)
+
+
+def decode_hello(body) -> dict:
+    """Parse a handshake frame body, rejecting other protocol versions."""
+    if len(body) < VERSION_BYTE.size:
+        raise ProtocolError("empty handshake")
+    (version,) = VERSION_BYTE.unpack_from(body)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"peer speaks protocol v{version}, expected v{PROTOCOL_VERSION}")
+    try:
+        fields = json.loads(str(body[VERSION_BYTE.size:], "utf8"))
+    except ValueError as e:  # bad UTF-8 or JSON
+        raise ProtocolError(f"malformed handshake: {e}") from None
+    if not isinstance(fields, dict):
+        raise ProtocolError("handshake fields must be a JSON object")
+    return fields
+
+
+def encode_datagram(kind: int, token: int, seq: int, body=b"") -> bytes:
+    return DATAGRAM_HEADER.pack(kind, token, seq & SEQ_MASK) + body
+
+
+def decode_datagram(data):
+    """Split a datagram into ``(kind, token, seq, body)``; raises ``ProtocolError`` if truncated."""
+    if len(data) < DATAGRAM_HEADER.size:
+        raise ProtocolError("truncated datagram")
+    kind, token, seq = DATAGRAM_HEADER.unpack_from(data)
+    return kind, token, seq, memoryview(data)[DATAGRAM_HEADER.size:]
+
+
+def seq_newer(seq: int, last: int | None) -> bool:
+    """True if ``seq`` is after ``last``, allowing for 32-bit wraparound."""
+    if last is None:
+        return True
+    return seq != last and ((seq - last) & SEQ_MASK) < 0x80000000
+
+
+class FrameReader:
+    """
+    Incremental frame parser over one preallocated ``bytearray``.
+
+    ``recv_into`` reads from a socket straight into the free space after the
+    buffered bytes; ``feed`` copies in bytes a caller already has. ``frames``
+    yields ``(kind, body)`` pairs where ``body`` is a ``memoryview`` into the
+    buffer. A body is only valid until the generator advances, so decode it
+    (or copy it) before asking for the next frame.
+
+    Consumed bytes are never deleted: the read position moves past them, and
+    once everything is consumed both ends go back to the start. The only
+    copy is of a partial frame left near the end of the buffer, moved to the
+    front when a read needs the room. The buffer only grows for a frame
+    bigger than it.
+    """
+
+    def __init__(self, capacity: int = READER_CAPACITY):
+        self.buffer = bytearray(capacity)
+        self._view = memoryview(self.buffer)
+        self._start = 0  # first byte not yet consumed
+        self._end = 0  # end of the received bytes
+
+    def _make_room(self, size: int) -> int:
+        """Free space after the buffered bytes, compacting or growing to get ``size``."""
+        free = len(self.buffer) - self._end
+        if free >= size:
+            return free
+        pending = self._end - self._start
+        if self._start:
+            self._view[:pending] = self._view[self._start:self._end]
+            self._start, self._end = 0, pending
+        if len(self.buffer) - pending < size:
+            grown = bytearray(max(2 * len(self.buffer), pending + size))
+            grown[:pending] = self._view[:pending]
+            self.buffer = grown
+            self._view = memoryview(grown)
+        return len(self.buffer) - self._end
+
+    def recv_into(self, sock, size: int = READ_SIZE) -> int:
+        """
+        One ``recv_into`` of up to ``size`` bytes from ``sock``. Returns the
+        byte count, 0 once the peer has closed; socket errors propagate.
+        """
+        size = min(size, self._make_room(size))
+        n = sock.recv_into(self._view[self._end:self._end + size])
+        self._end += n
+        return n
+
+    def recent(self, n: int) -> bytes:
+        """A copy of the last ``n`` bytes received, e.g. for a capture."""
+        return bytes(self._view[self._end - n:self._end])
+
+    def feed(self, data) -> None:
+        n = len(data)
+        self._make_room(n)
+        self._view[self._end:self._end + n] = data
+        self._end += n
+
+    def frames(self):
+        buf = self.buffer
+        view = self._view
+        end = self._end
+        offset = self._start
+        unpack_header = FRAME_HEADER.unpack_from
+        header_size = FRAME_HEADER.size
+        body = None
+        try:
+            while end - offset >= header_size:
+                length, kind = unpack_header(buf, offset)
+                start = offset + header_size
+                if end - start < length:
+                    break
+                offset = start + length
+                body = view[start:offset]
+                yield kind, body
+                body.release()
+        finally:
+            if body is not None:
+                body.release()
+            if offset == self._end:
+                self._start = self._end = 0
+            else:
+                self._start = offset
+
+    def __len__(self) -> int:
+        return self._end - self._start
@@ -1,21 +1,95 @@
 """
 Server script for hosting games.
+
+Two server cores are available. ``eventloop`` (the default) runs a single
+``selectors`` loop that owns every socket and the ``players`` state.
+``threaded`` is the original thread-per-client relay, kept for comparison.
 """
 
-import json
+import argparse
+import math
 import random
+import select
+import selectors
 import socket
+import struct
 import threading
 import time
+from collections import deque
+
+from interest import SpatialGrid
+from lagcomp import MAX_SHOT_RANGE, LagCompensator
+from outbound import OutboundQueue
+from protocol import (
+    DGRAM_PLAYER,
+    DGRAM_SNAPSHOT,
+    KIND_HELLO,
+    KIND_JSON,
+    KIND_MESSAGE,
+    KIND_PLAYER_STATE,
+    KIND_SNAPSHOT,
+    MAX_DATAGRAM_SIZE,
+    READ_SIZE,
+    FrameReader,
+    ProtocolError,
+    decode_datagram,
+    decode_hello,
+    decode_message,
+    encode_datagram,
+    encode_frame,
+    encode_hello,
+    encode_message,
+    seq_newer,
+)
+from schema import (
+    ENCODING_BINARY,
+    ENCODING_JSON,
+    EncodedMessage,
+    decode_binary,
+    dump_payload,
+    encode_payload,
+    frame_body,
+    load_payload,
+)
+from state_codec import (
+    DEFAULT_PRECISION,
+    FIELD_POSITION,
+    FIELD_ROTATION,
+    SEQ,
+    SNAPSHOT_HEADER,
+    PlayerStateCodec,
+    SequenceHistory,
+)
 
 ADDR = "0.0.0.0"
 PORT = 8000
 MAX_PLAYERS = 10
-MSG_SIZE = 2048
+MSG_SIZE = READ_SIZE
+SERVER_MODES = ("eventloop", "threaded")
+SERVER_MODE = "eventloop"
+TICK_RATE = 30  # snapshot broadcasts per second (event loop core)
+AOI_RADIUS = 150  # particle effects only reach players this close (event loop core)
+PROJECTILE_AOI_RADIUS = 400  # tracers travel, so they get a wider radius
+STATE_PRECISION = DEFAULT_PRECISION  # world units per quantization step for delta-encoded state
+STATE_HISTORY = 64  # states/snapshots kept per client to decode and encode deltas against
+
+# Hit validation (event loop core)
+PLAYER_HEALTH = 10  # matches Player.health
+BULLET_DAMAGE = {0: 0.8, 1: 1, 2: 1, 3: 0.5}  # per bullet, keyed like Player.guns
+ROCKET_DAMAGE = 10  # at the blast centre, falling off by 1 per unit
+SPLASH_RADIUS = 10
+ROCKET_RELOAD = 3.0  # seconds between rockets, as RocketLauncher.reload
+ROCKET_LIFETIME = 5.0  # seconds a rocket flies before it is destroyed, as Rocket.fire
+FIRE_RATES = {0: (0.2, 1), 1: (0.8, 4), 2: (0.3, 1), 3: (0.1, 1)}  # (cooldown s, most bullets per shot), keyed like Player.guns
+MAX_SHOT_ORIGIN_OFFSET = 50  # how far from the shooter's last known position a shot may start
+LAG_COMP_WINDOW = 0.5  # seconds a hit claim may be rewound
+HANDSHAKE_TIMEOUT = 5.0  # seconds a new connection gets to send its hello
 
 # Setup server socket (initialized in main)
 s: socket.socket | None = None
 players = {}
+joining = set()  # ids reserved by threaded-core handshakes still in progress
+join_lock = threading.Lock()
 
 
 def generate_id(player_list: dict, max_players: int):
@@ -26,62 +100,130 @@ def generate_id(player_list: dict, max_players: int):
             return unique_id
 
 
-def handle_messages(identifier: str):
-    client_info = players[identifier]
-    conn: socket.socket = client_info["socket"]
-    username = client_info["username"]
-    recv_buffer = ""
+def world_state(player_list: dict, exclude: str | None = None) -> dict:
+    """Every player in one message, sent to a newcomer instead of a message per player."""
+    return {
+        "object": "world",
+        "players": [
+            {
+                "id": player_id,
+                "username": player_info["username"],
+                "position": player_info["position"],
+                "rotation": player_info.get("rotation", 0),
+                "health": player_info["health"],
+                "gun": player_info.get("gun", 0),
+            }
+            for player_id, player_info in list(player_list.items())
+            if player_id != exclude
+        ],
+    }
+
+
+def read_hello(conn: socket.socket, reader: FrameReader) -> dict:
+    """Block until the client's handshake frame has arrived and parse it."""
+    while True:
+        hello = None
+        for kind, body in reader.frames():
+            if kind == KIND_HELLO:
+                hello = decode_hello(body)
+                break
+        if hello is not None:
+            return hello
+        if not reader.recv_into(conn, MSG_SIZE):
+            raise ConnectionError("client closed the connection during handshake")
+
 
+THREADED_WRITE_CHUNK = 4096  # small enough that a blocking send after select() returns promptly
+
+
+def send_to(player_info: dict, data: bytes, droppable: bool = False):
+    """Queue a frame for the player's writer thread; never waits on their socket."""
+    with player_info["send_cond"]:
+        if player_info["closed"]:
+            return
+        player_info["outbound"].push(data, droppable)
+        player_info["send_cond"].notify()
+
+
+def close_writer(player_info: dict):
+    with player_info["send_cond"]:
+        player_info["closed"] = True
+        player_info["send_cond"].notify()
+
+
+def write_messages(identifier: str, player_info: dict):
+    """
+    Writer thread for one player of the threaded core. Relay threads only
+    queue frames, so a client that stops reading holds up nobody but itself;
+    once it is too slow its connection is shut down and its relay thread
+    cleans up as if it had left.
+    """
+    conn: socket.socket = player_info["socket"]
+    outbound: OutboundQueue = player_info["outbound"]
+    cond: threading.Condition = player_info["send_cond"]
     while True:
+        with cond:
+            while not outbound and not player_info["closed"]:
+                cond.wait()
+            if player_info["closed"]:
+                return
+            if outbound.too_slow():
+                break
+            chunk = bytes(outbound.peek(THREADED_WRITE_CHUNK))
+
         try:
-            msg = conn.recv(MSG_SIZE)
-        except ConnectionResetError:
-            break
+            _, writable, _ = select.select([], [conn], [], outbound.stall_timeout)
+            sent = conn.send(chunk) if writable else 0
+        except OSError:
+            return
+        with cond:
+            outbound.consume(sent)
 
-        if not msg:
-            break
+    print(f"Player {player_info['username']} with ID {identifier} is not reading, disconnecting...")
+    try:
+        conn.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
 
-        recv_buffer += msg.decode("utf8")
 
-        while True:
-            try:
-                start = recv_buffer.index("{")
-                end = recv_buffer.index("}", start) + 1
-            except ValueError:
+def handle_messages(identifier: str, reader: FrameReader | None = None):
+    client_info = players[identifier]
+    conn: socket.socket = client_info["socket"]
+    username = client_info["username"]
+    reader = reader or FrameReader()
+
+    while True:
+        try:
+            if not reader.recv_into(conn, MSG_SIZE):
                 break
+        except OSError:
+            break
 
-            chunk = recv_buffer[start:end]
-            recv_buffer = recv_buffer[end:]
+        for kind, body in reader.frames():
+            if kind != KIND_JSON:
+                continue
 
             try:
-                msg_json = json.loads(chunk)
+                msg_json = decode_message(body)
             except Exception as e:
                 print(e)
                 continue
+            if msg_json.get("object") == "ping":
+                send_to(client_info, encode_message({"object": "pong", "t": msg_json.get("t")}))
+                continue
+            chunk = encode_frame(body)
 
             if msg_json.get("object") == "damage":
                 for player_id, player_info in list(players.items()):
-                    player_conn: socket.socket = player_info["socket"]
-                    try:
-                        player_conn.send(json.dumps(msg_json).encode("utf8"))
-                    except OSError:
-                        pass
+                    send_to(player_info, chunk)
                 continue
             if msg_json.get("object") == "projectile":
                 for player_id, player_info in list(players.items()):
-                    player_conn: socket.socket = player_info["socket"]
-                    try:
-                        player_conn.send(json.dumps(msg_json).encode("utf8"))
-                    except OSError:
-                        pass
+                    send_to(player_info, chunk, droppable=True)
                 continue
-            if msg_json.get("object") == "particle":
+            if msg_json.get("object") in ("particle", "effect"):
                 for player_id, player_info in list(players.items()):
-                    player_conn: socket.socket = player_info["socket"]
-                    try:
-                        player_conn.send(json.dumps(msg_json).encode("utf8"))
-                    except OSError:
-                        pass
+                    send_to(player_info, chunk, droppable=True)
                 continue
 
             if msg_json.get("object") == "player":
@@ -90,123 +232,926 @@ def handle_messages(identifier: str):
                 players[identifier]["health"] = msg_json.get("health")
                 players[identifier]["gun"] = msg_json.get("gun", players[identifier].get("gun", 0))
 
-            # Tell other players about player moving
+            # Tell other players about player moving; a newer update supersedes a dropped one
+            moving = msg_json.get("object") == "player"
             for player_id in list(players.keys()):
                 if player_id != identifier:
-                    player_info = players[player_id]
-                    player_conn: socket.socket = player_info["socket"]
-                    try:
-                        player_conn.sendall(chunk.encode("utf8"))
-                    except OSError:
-                        pass
+                    send_to(players[player_id], chunk, droppable=moving)
 
     # Tell other players about player leaving
+    close_writer(client_info)
     for player_id in list(players.keys()):
         if player_id != identifier:
-            player_info = players[player_id]
-            player_conn: socket.socket = player_info["socket"]
-            try:
-                player_conn.send(
-                    json.dumps(
-                        {
-                            "id": identifier,
-                            "object": "player",
-                            "joined": False,
-                            "left": True,
-                        }
-                    ).encode("utf8")
-                )
-            except OSError:
-                pass
+            send_to(
+                players[player_id],
+                encode_message(
+                    {
+                        "id": identifier,
+                        "object": "player",
+                        "joined": False,
+                        "left": True,
+                    }
+                ),
+            )
 
     print(f"Player {username} with ID {identifier} has left the game...")
-    del players[identifier]
+    with join_lock:
+        del players[identifier]
     conn.close()
 
 
-def main():
+def run_threaded(host: str = ADDR, port: int = PORT, max_players: int = MAX_PLAYERS):
+    """Original server core: one blocking relay thread per client."""
     global s
     if s is None:
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.bind((ADDR, PORT))
-        s.listen(MAX_PLAYERS)
+        s.bind((host, port))
+        s.listen(max_players)
 
     print("Server started, listening for new connections...")
 
     while True:
-        # Accept new connection and assign unique ID
+        # Accept new connection and assign unique ID; the handshake runs on its own thread
         conn, addr = s.accept()
-        new_id = generate_id(players, MAX_PLAYERS)
-        conn.send(new_id.encode("utf8"))
-        username = conn.recv(MSG_SIZE).decode("utf8")
+        # The writer thread already coalesces queued frames, so Nagle only adds delay
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with join_lock:
+            if len(players) + len(joining) >= max_players:
+                conn.close()
+                continue
+            new_id = generate_id({**players, **dict.fromkeys(joining)}, max_players)
+            joining.add(new_id)
+        threading.Thread(target=join_player, args=(conn, addr, new_id), daemon=True).start()
+
+
+def join_player(conn: socket.socket, addr, new_id: str):
+    """Handshake for the threaded core, off the accept loop so a slow client only holds up itself."""
+    reader = FrameReader()
+    try:
+        conn.settimeout(HANDSHAKE_TIMEOUT)
+        hello = read_hello(conn, reader)
+        conn.settimeout(None)
+    except (ProtocolError, ValueError) as e:  # wrong version, or a hello that isn't a JSON object
+        try:
+            conn.sendall(encode_hello({"error": str(e)}))
+        except OSError:
+            pass
+        conn.close()
+        with join_lock:
+            joining.discard(new_id)
+        return
+    except OSError:
+        conn.close()
+        with join_lock:
+            joining.discard(new_id)
+        return
+
+    username = hello.get("username", "Player")
+    new_player_info = {
+        "socket": conn,
+        "outbound": OutboundQueue(),
+        "send_cond": threading.Condition(),
+        "closed": False,
+        "username": username,
+        "position": (0, 1, 0),
+        "rotation": 0,
+        "health": 100,
+        "gun": 0,
+    }
+
+    # Welcome plus everyone already here in one message, queued before any relay can reach the newcomer
+    send_to(new_player_info, encode_hello({"id": new_id}))
+    send_to(new_player_info, encode_message(world_state(players)))
+
+    # Tell existing players about new player
+    for player_id in list(players.keys()):
+        send_to(
+            players[player_id],
+            encode_message(
+                {
+                    "id": new_id,
+                    "object": "player",
+                    "username": new_player_info["username"],
+                    "position": new_player_info["position"],
+                    "health": new_player_info["health"],
+                    "gun": new_player_info["gun"],
+                    "joined": True,
+                    "left": False,
+                }
+            ),
+        )
+
+    # Add new player to players list
+    with join_lock:
+        players[new_id] = new_player_info
+        joining.discard(new_id)
+
+    # Start threads to receive messages from and write messages to the client
+    threading.Thread(target=write_messages, args=(new_id, new_player_info), daemon=True).start()
+    msg_thread = threading.Thread(target=handle_messages, args=(new_id, reader), daemon=True)
+    msg_thread.start()
+
+    print(f"New connection from {addr}, assigned ID: {new_id}...")
+
+
+class ClientConnection:
+    """Socket plus buffered I/O state for one client of the event loop server."""
+
+    def __init__(self, sock: socket.socket, addr):
+        self.socket = sock
+        self.addr = addr
+        self.id: str | None = None
+        self.username: str | None = None
+        self.reader = FrameReader()
+        self.outbound = OutboundQueue()
+        self.connected_at = time.perf_counter()
+        self.wants_udp = False
+        self.udp_token = 0
+        self.udp_addr = None
+        self.encoding = ENCODING_JSON
+
+        # Sequenced player state; ``state_codec`` clients send and receive deltas
+        self.state_codec = False
+        self.last_state_seq: int | None = None
+        self.received_states = SequenceHistory(STATE_HISTORY)
+        self.sent_snapshots = SequenceHistory(STATE_HISTORY)
+        self.acked_snapshot: int | None = None
+        self.acked_state_seq: int | None = None
+
+        # Damage claims read this pass, validated together
+        self.hit_claims: list = []
+        # Claim rate limits: bullets the held gun could have fired, and the current rocket blast
+        self.shot_budget = 0.0
+        self.shot_budget_at = self.connected_at
+        self.rockets: deque = deque()  # fire times of rockets that haven't exploded yet
+        self.next_rocket = 0.0
+        self.blast_centre = None
+        self.blast_targets: set = set()
+        self.blast_until = 0.0
+
+
+class TickStats:
+    """Outbound traffic counters, bucketed by server tick."""
+
+    def __init__(self):
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.last_tick_bytes = 0
+        self.last_tick_messages = 0
+        self.max_tick_bytes = 0
+        self._tick_bytes = 0
+        self._tick_messages = 0
+
+    def count(self, nbytes: int):
+        self._tick_bytes += nbytes
+        self._tick_messages += 1
+
+    def end_tick(self):
+        self.ticks += 1
+        self.bytes_sent += self._tick_bytes
+        self.messages_sent += self._tick_messages
+        self.last_tick_bytes = self._tick_bytes
+        self.last_tick_messages = self._tick_messages
+        self.max_tick_bytes = max(self.max_tick_bytes, self._tick_bytes)
+        self._tick_bytes = 0
+        self._tick_messages = 0
+
+    def as_dict(self) -> dict:
+        ticks = max(1, self.ticks)
+        return {
+            "ticks": self.ticks,
+            "bytes_sent": self.bytes_sent,
+            "messages_sent": self.messages_sent,
+            "last_tick_bytes": self.last_tick_bytes,
+            "last_tick_messages": self.last_tick_messages,
+            "max_tick_bytes": self.max_tick_bytes,
+            "avg_tick_bytes": self.bytes_sent / ticks,
+            "avg_tick_messages": self.messages_sent / ticks,
+        }
+
+
+class EventLoopServer:
+    """
+    Single-threaded server core. One ``selectors`` loop accepts connections,
+    reads and parses client messages and flushes per-client send buffers, so
+    no socket is ever touched from more than one thread.
+
+    Player transforms are not relayed as they arrive. They update
+    ``players`` and every ``1 / tick_rate`` seconds each client gets one
+    ``snapshot`` message with the other players that changed since the last
+    tick, so outbound traffic no longer scales with client frame rate.
+
+    A UDP socket on the same port carries transforms for clients that ask for
+    it in their hello: their player updates arrive as sequenced datagrams and
+    their snapshots are sent the same way, so a lost packet never holds up
+    the TCP stream behind it.
+
+    Cosmetic events (``projectile``/``particle``/``effect``) are only relayed to players
+    near where they happened, found through a ``SpatialGrid`` of last known
+    positions. Passing ``aoi_radius=None`` relays them to everyone.
+    A ``ping`` is answered with a ``pong`` to its sender only.
+
+    Clients that negotiate ``state_codec`` send quantized deltas against the
+    last state the server acknowledged, and get snapshots delta-encoded
+    against the last snapshot they acknowledged. Other clients keep the JSON
+    messages.
+
+    Clients that ask for the ``binary`` encoding get every other message in
+    the ``schema`` encoding. A relayed message is re-encoded at most once
+    per encoding, for the recipients that use the other one.
+
+    The server owns health. A ``damage`` message is a claim: the target is
+    rewound to the snapshot tick the shooter was looking at and the shot
+    (or rocket blast) is tested against its hitboxes. Only confirmed hits
+    change health, and they are broadcast with the resulting value.
+    """
+
+    def __init__(
+        self,
+        addr: str = ADDR,
+        port: int = PORT,
+        max_players: int = MAX_PLAYERS,
+        tick_rate: float = TICK_RATE,
+        aoi_radius: float | None = AOI_RADIUS,
+        projectile_aoi_radius: float | None = PROJECTILE_AOI_RADIUS,
+    ):
+        self.max_players = max_players
+        self.tick_rate = tick_rate
+        self.aoi_radius = aoi_radius
+        self.projectile_aoi_radius = projectile_aoi_radius if aoi_radius is not None else None
+        self.grid = SpatialGrid(aoi_radius or AOI_RADIUS)
+        self.aoi_culled = 0
+        self.state_codec = PlayerStateCodec(STATE_PRECISION)
+        self.lag_comp = LagCompensator(int(LAG_COMP_WINDOW * tick_rate) + 2)
+        self.hits_confirmed = 0
+        self.hits_rejected = 0
+        self.outbound_dropped = 0
+        self.slow_disconnects = 0
+        self.tick = 0
+        self.stats = TickStats()
+        self.players = {}
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((addr, port))
+        self.listener.listen(max_players)
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ, None)
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind((addr, self.port))
+        self.udp.setblocking(False)
+        self.selector.register(self.udp, selectors.EVENT_READ, None)
+        self.udp_stale_dropped = 0
+        self._datagram = memoryview(bytearray(MAX_DATAGRAM_SIZE))  # reused by every UDP read
+        self._udp_tokens = {}
+        self._pending = {}
+        self._running = False
+
+    @property
+    def port(self) -> int:
+        return self.listener.getsockname()[1]
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        print("Server started, listening for new connections...")
+        self._running = True
+        tick_interval = 1 / self.tick_rate
+        next_tick = time.perf_counter() + tick_interval
+        try:
+            while self._running:
+                timeout = min(poll_interval, max(0.0, next_tick - time.perf_counter()))
+                for key, mask in self.selector.select(timeout):
+                    if key.fileobj is self.listener:
+                        self._accept()
+                        continue
+                    if key.fileobj is self.udp:
+                        self._read_datagrams()
+                        continue
+                    conn: ClientConnection = key.data
+                    if mask & selectors.EVENT_WRITE:
+                        self._flush(conn)
+                    if mask & selectors.EVENT_READ:
+                        try:
+                            self._read(conn)
+                        except Exception as e:
+                            # A client sending something we didn't expect loses its own connection, not the server
+                            print(f"Dropping connection {conn.id} after bad input: {e!r}")
+                            self._drop(conn)
+
+                now = time.perf_counter()
+                if now >= next_tick:
+                    self._broadcast_snapshots()
+                    self._drop_slow_clients(now)
+                    # Skip ticks we were too busy to run instead of bursting to catch up
+                    next_tick = max(next_tick + tick_interval, now)
+        finally:
+            self.close()
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        for conn in list(self._pending.values()) + [info["connection"] for info in self.players.values()]:
+            self._close_socket(conn)
+        self._pending.clear()
+        self.players.clear()
+        for sock in (self.listener, self.udp):
+            try:
+                self.selector.unregister(sock)
+            except (KeyError, ValueError):
+                pass
+            sock.close()
+        self.selector.close()
+
+    # Connection lifecycle ------------------------------------------------
+    def _accept(self):
+        try:
+            sock, addr = self.listener.accept()
+        except BlockingIOError:
+            return
+        if len(self.players) + len(self._pending) >= self.max_players:
+            sock.close()
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = ClientConnection(sock, addr)
+        conn.id = generate_id({**self.players, **self._pending}, self.max_players)
+        self._pending[conn.id] = conn
+        self.selector.register(sock, selectors.EVENT_READ, conn)
+
+    def _join(self, conn: ClientConnection, username: str):
+        """Finish the handshake once the client has sent its username."""
+        del self._pending[conn.id]
+        conn.username = username
+        welcome = {"id": conn.id, "tick_rate": self.tick_rate}
+        if conn.wants_udp:
+            conn.udp_token = self._new_udp_token()
+            self._udp_tokens[conn.udp_token] = conn
+            welcome["udp_port"] = self.port
+            welcome["udp_token"] = conn.udp_token
+        if conn.state_codec:
+            welcome["state_precision"] = self.state_codec.precision
+        if conn.encoding == ENCODING_BINARY:
+            welcome["encoding"] = ENCODING_BINARY
+        self._queue(conn, encode_hello(welcome))
         new_player_info = {
-            "socket": conn,
+            "connection": conn,
             "username": username,
             "position": (0, 1, 0),
             "rotation": 0,
-            "health": 100,
+            "health": PLAYER_HEALTH,
             "gun": 0,
+            "velocity": (0, 0, 0),
+            "dirty": False,
+            "respawn_ready": False,
         }
+        new_player_info["state"] = self.state_codec.quantize((0, 1, 0), 0, PLAYER_HEALTH, 0)
+        self.grid.update(conn.id, new_player_info["position"])
 
         # Tell existing players about new player
-        for player_id in list(players.keys()):
-            if player_id != new_id:
-                player_info = players[player_id]
-                player_conn: socket.socket = player_info["socket"]
-                try:
-                    player_conn.send(
-                        json.dumps(
-                            {
-                                "id": new_id,
-                                "object": "player",
-                                "username": new_player_info["username"],
-                                "position": new_player_info["position"],
-                                "health": new_player_info["health"],
-                                "gun": new_player_info["gun"],
-                                "joined": True,
-                                "left": False,
-                            }
-                        ).encode("utf8")
-                    )
-                except OSError:
-                    pass
+        self._broadcast(
+            {
+                "id": conn.id,
+                "object": "player",
+                "username": username,
+                "position": new_player_info["position"],
+                "health": new_player_info["health"],
+                "gun": new_player_info["gun"],
+                "joined": True,
+                "left": False,
+            }
+        )
 
         # Tell new player about existing players
-        for player_id in list(players.keys()):
-            if player_id != new_id:
-                player_info = players[player_id]
+        self._queue(conn, encode_payload(world_state(self.players), conn.encoding))
+
+        self.players[conn.id] = new_player_info
+        print(f"New connection from {conn.addr}, assigned ID: {conn.id}...")
+
+    def _new_udp_token(self) -> int:
+        while True:
+            token = random.getrandbits(32)
+            if token and token not in self._udp_tokens:
+                return token
+
+    def _drop_slow_clients(self, now: float):
+        for conn in list(self._pending.values()):
+            if now - conn.connected_at > HANDSHAKE_TIMEOUT:
+                self._drop(conn)
+        for info in list(self.players.values()):
+            conn = info["connection"]
+            if conn.outbound.too_slow(now):
+                self.slow_disconnects += 1
+                print(f"Player {conn.username} with ID {conn.id} is not reading, disconnecting...")
+                self._drop(conn)
+
+    def outbound_stats(self) -> dict:
+        """Send queue depth (bytes) per player plus drop and disconnect totals."""
+        depth = {player_id: info["connection"].outbound.queued_bytes for player_id, info in self.players.items()}
+        return {
+            "queued_bytes": depth,
+            "max_queued_bytes": max((info["connection"].outbound.max_queued_bytes for info in self.players.values()), default=0),
+            "dropped": self.outbound_dropped,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+    def _drop(self, conn: ClientConnection):
+        self._close_socket(conn)
+        self._udp_tokens.pop(conn.udp_token, None)
+        if self._pending.pop(conn.id, None) is not None:
+            return
+        if self.players.pop(conn.id, None) is None:
+            return
+        self.grid.remove(conn.id)
+        self.lag_comp.remove(conn.id)
+
+        # Tell other players about player leaving
+        self._broadcast({"id": conn.id, "object": "player", "joined": False, "left": True})
+        print(f"Player {conn.username} with ID {conn.id} has left the game...")
+
+    def _reject(self, conn: ClientConnection, reason: str):
+        """Answer a bad handshake with an error hello and hang up."""
+        self._queue(conn, encode_hello({"error": reason}))
+        self._drop(conn)
+
+    def _close_socket(self, conn: ClientConnection):
+        try:
+            self.selector.unregister(conn.socket)
+        except (KeyError, ValueError):
+            pass
+        conn.socket.close()
+
+    # Reading ---------------------------------------------------------------
+    def _read(self, conn: ClientConnection):
+        try:
+            received = conn.reader.recv_into(conn.socket, MSG_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            received = 0
+
+        if not received:
+            self._drop(conn)
+            return
+
+        for kind, body in conn.reader.frames():
+            if conn.id in self._pending:
+                if kind == KIND_HELLO:
+                    try:
+                        hello = decode_hello(body)
+                    except ProtocolError as e:
+                        self._reject(conn, str(e))
+                        return
+                    conn.wants_udp = bool(hello.get("udp"))
+                    conn.state_codec = bool(hello.get("state_codec"))
+                    if hello.get("encoding") == ENCODING_BINARY:
+                        conn.encoding = ENCODING_BINARY
+                    self._join(conn, hello.get("username", "Player"))
+                continue
+
+            if kind == KIND_PLAYER_STATE:
                 try:
-                    conn.send(
-                        json.dumps(
-                            {
-                                "id": player_id,
-                                "object": "player",
-                                "username": player_info["username"],
-                                "position": player_info["position"],
-                                "health": player_info["health"],
-                                "gun": player_info.get("gun", 0),
-                                "joined": True,
-                                "left": False,
-                            }
-                        ).encode("utf8")
-                    )
-                    time.sleep(0.1)
-                except OSError:
-                    pass
-
-        # Add new player to players list
-        players[new_id] = new_player_info
+                    (seq,) = SEQ.unpack_from(body)
+                except struct.error:
+                    continue
+                self._receive_state(conn, seq, body[SEQ.size:])
+                continue
+            if kind == KIND_JSON:
+                encoding, decode = ENCODING_JSON, decode_message
+            elif kind == KIND_MESSAGE:
+                encoding, decode = ENCODING_BINARY, decode_binary
+            else:
+                continue
+            try:
+                msg_json = decode(body)
+            except Exception as e:
+                print(e)
+                continue
+            self._handle_message(conn, msg_json, EncodedMessage(msg_json, encoding, encode_frame(body, kind)))
+
+        if conn.hit_claims:
+            self._resolve_hits(conn)
+
+    def _handle_message(self, conn: ClientConnection, msg_json: dict, message: EncodedMessage):
+        info = self.players.get(conn.id)
+        if info is None:
+            return
+
+        if msg_json.get("object") == "ping":
+            self._queue(conn, encode_payload({"object": "pong", "t": msg_json.get("t")}, conn.encoding))
+            return
+        if msg_json.get("object") == "damage":
+            conn.hit_claims.append(msg_json)
+            return
+        if msg_json.get("object") == "projectile":
+            if msg_json.get("kind") == "rocket":
+                self._record_rocket(conn, time.perf_counter())
+            self._relay_nearby(conn, msg_json.get("position"), self.projectile_aoi_radius, message)
+            return
+        if msg_json.get("object") in ("particle", "effect"):
+            self._relay_nearby(conn, msg_json.get("position"), self.aoi_radius, message)
+            return
+
+        if msg_json.get("object") == "player":
+            self._update_player(info, msg_json)
+            return
+
+        self._broadcast_raw(message, exclude=conn.id)
+
+    def _update_player(self, info: dict, msg_json: dict):
+        info["position"] = msg_json.get("position")
+        info["rotation"] = msg_json.get("rotation")
+        info["health"] = self._reported_health(info, msg_json.get("health"))
+        info["gun"] = msg_json.get("gun", info.get("gun", 0))
+        info["velocity"] = msg_json.get("velocity") or (0, 0, 0)
+        info["dirty"] = True
+        try:
+            info["state"] = self.state_codec.quantize(info["position"], info["rotation"], info["health"], info["gun"], info["velocity"])
+        except (TypeError, ValueError):
+            pass
+        self.grid.update(info["connection"].id, info["position"])
+
+    def _receive_state(self, conn: ClientConnection, seq: int, body):
+        """Apply a sequenced player update (codec or JSON body), dropping stale ones."""
+        if not seq_newer(seq, conn.last_state_seq):
+            self.udp_stale_dropped += 1
+            return
+        info = self.players[conn.id]
+
+        if not conn.state_codec:
+            conn.last_state_seq = seq
+            try:
+                msg_json = load_payload(body)
+            except Exception as e:
+                print(e)
+                return
+            self._update_player(info, msg_json)
+            return
+
+        try:
+            q, ack = self.state_codec.decode_state(body, conn.received_states)
+        except KeyError:
+            # Delta against a baseline we've already forgotten; the client
+            # falls back to a full state once it sees our newer ack.
+            return
+        except (struct.error, ValueError):
+            # Truncated or garbled state: drop it like a bad datagram
+            return
+        conn.last_state_seq = seq
+        conn.received_states.put(seq, q)
+        if ack and seq_newer(ack, conn.acked_snapshot):
+            conn.acked_snapshot = ack
+
+        fields = self.state_codec.to_fields(q)
+        fields["health"] = self._reported_health(info, fields["health"])
+        info.update(fields)
+        info["state"] = self.state_codec.with_health(q, info["health"])
+        info["dirty"] = True
+        self.grid.update(conn.id, info["position"])
+
+    def _reported_health(self, info: dict, reported) -> float:
+        """
+        Health from a client's own update. It may lower it (fall damage) but
+        only hit validation raises damage from others, and it only comes back
+        up as a respawn after the client has seen itself die. So the reset key
+        moves a live player back to spawn without healing them; ``Player.reset``
+        keeps its health to match.
+        """
+        try:
+            reported = float(reported)
+        except (TypeError, ValueError):
+            return info["health"]
+        if info["health"] > 0:
+            return min(reported, info["health"])
+        if reported <= 0:
+            info["respawn_ready"] = True
+            return info["health"]
+        if info["respawn_ready"]:
+            info["respawn_ready"] = False
+            return min(reported, PLAYER_HEALTH)
+        return info["health"]
+
+    # Hit validation --------------------------------------------------------
+    def _view_tick(self, tick) -> float:
+        """The shooter's claimed view tick, clamped to the rewind window."""
+        try:
+            tick = float(tick)
+        except (TypeError, ValueError):
+            return self.tick
+        return min(self.tick, max(self.tick - LAG_COMP_WINDOW * self.tick_rate, tick))
+
+    def _resolve_hits(self, conn: ClientConnection):
+        """Validate the damage claims ``conn`` sent this pass, a target at a time."""
+        claims, conn.hit_claims = conn.hit_claims, []
+        shooter = self.players.get(conn.id)
+        if shooter is None or shooter["health"] <= 0:
+            self.hits_rejected += len(claims)
+            return
+
+        now = time.perf_counter()
+        shots = {}
+        blasts = {}
+        for msg in claims:
+            target_id = str(msg.get("target"))
+            if target_id == conn.id or target_id not in self.lag_comp.histories:
+                self.hits_rejected += 1
+                continue
+            tick = self._view_tick(msg.get("tick"))
+            try:
+                if msg.get("splash") is not None:
+                    centre = tuple(float(v) for v in msg["splash"][:3])
+                    if len(centre) != 3 or not self._allow_blast(conn, target_id, tick, centre, now):
+                        self.hits_rejected += 1
+                        continue
+                    blasts.setdefault(target_id, []).append((tick, centre))
+                    continue
+                origin = tuple(float(v) for v in msg["origin"][:3])
+                direction = tuple(float(v) for v in msg["direction"][:3])
+                amount = float(msg.get("amount", 0))
+            except (KeyError, TypeError, ValueError):
+                self.hits_rejected += 1
+                continue
+            if len(origin) != 3 or len(direction) != 3 or math.dist(origin, self.grid.positions.get(conn.id, origin)) > MAX_SHOT_ORIGIN_OFFSET:
+                self.hits_rejected += 1
+                continue
+            if not self._allow_shot(conn, shooter["gun"], now):
+                self.hits_rejected += 1
+                continue
+            shots.setdefault(target_id, []).append((tick, origin, direction, amount))
+
+        max_bullet = BULLET_DAMAGE.get(shooter["gun"], max(BULLET_DAMAGE.values()))
+        for target_id, target_shots in shots.items():
+            ticks, origins, directions, amounts = zip(*target_shots)
+            results = self.lag_comp.trace(target_id, ticks, origins, directions, MAX_SHOT_RANGE)
+            for (hit, headshot), amount in zip(results, amounts):
+                if hit:
+                    self._apply_damage(conn, target_id, min(max(amount, 0.0), max_bullet), headshot)
+                else:
+                    self.hits_rejected += 1
+
+        for target_id, target_blasts in blasts.items():
+            ticks, centres = zip(*target_blasts)
+            for dist in self.lag_comp.splash(target_id, ticks, centres):
+                if dist < SPLASH_RADIUS:
+                    self._apply_damage(conn, target_id, max(0.0, ROCKET_DAMAGE - dist), False)
+                else:
+                    self.hits_rejected += 1
+
+    def _allow_shot(self, conn: ClientConnection, gun, now: float) -> bool:
+        """
+        Spend one bullet of ``conn``'s budget, which refills at the held gun's
+        fire rate and holds up to a lag compensation window's worth of shots.
+        """
+        rate = FIRE_RATES.get(gun)
+        if rate is None:
+            return False
+        cooldown, per_shot = rate
+        capacity = per_shot * max(1.0, LAG_COMP_WINDOW / cooldown)
+        conn.shot_budget = min(capacity, conn.shot_budget + (now - conn.shot_budget_at) * per_shot / cooldown)
+        conn.shot_budget_at = now
+        if conn.shot_budget < 1:
+            return False
+        conn.shot_budget -= 1
+        return True
+
+    def _record_rocket(self, conn: ClientConnection, now: float):
+        """Note a rocket ``conn`` fired, at most one per reload (less the jitter a claim may have)."""
+        if now < conn.next_rocket:
+            return
+        conn.rockets.append(now)
+        conn.next_rocket = now + ROCKET_RELOAD - LAG_COMP_WINDOW
+
+    def _allow_blast(self, conn: ClientConnection, target_id: str, tick: float, centre, now: float) -> bool:
+        """
+        A splash claim needs a centre in range of where the shooter was at
+        ``tick`` and a rocket still in flight, whatever gun the shooter holds
+        now. A blast uses up its rocket; every claim of it shares its centre
+        and names a target only once.
+        """
+        try:
+            shooter_position = self.lag_comp.rewind(conn.id, (tick,))[0][:3]
+        except KeyError:
+            shooter_position = self.grid.positions.get(conn.id)
+        if shooter_position is None or math.dist(centre, shooter_position) > MAX_SHOT_RANGE:
+            return False
+        if centre == conn.blast_centre and now < conn.blast_until:
+            if target_id in conn.blast_targets:
+                return False
+            conn.blast_targets.add(target_id)
+            return True
+
+        rockets = conn.rockets
+        while rockets and now - rockets[0] > ROCKET_LIFETIME + LAG_COMP_WINDOW:
+            rockets.popleft()
+        if not rockets:
+            return False
+        rockets.popleft()
+        conn.blast_centre = centre
+        conn.blast_targets = {target_id}
+        conn.blast_until = now + LAG_COMP_WINDOW
+        return True
+
+    def _apply_damage(self, conn: ClientConnection, target_id: str, amount: float, headshot: bool):
+        target = self.players[target_id]
+        if target["health"] <= 0:
+            self.hits_rejected += 1
+            return
+        self.hits_confirmed += 1
+        target["health"] = max(0.0, target["health"] - amount)
+        target["state"] = self.state_codec.with_health(target["state"], target["health"])
+        target["dirty"] = True
+        self._broadcast(
+            {
+                "object": "damage",
+                "id": conn.id,
+                "target": target_id,
+                "amount": amount,
+                "headshot": headshot,
+                "health": target["health"],
+            }
+        )
+
+    def _relay_nearby(self, conn: ClientConnection, position, radius: float | None, message: EncodedMessage):
+        """Send a cosmetic event to the other players within ``radius`` of ``position``."""
+        try:
+            nearby = self.grid.query(position, radius) if radius is not None else None
+        except (TypeError, ValueError):
+            nearby = None
+        if nearby is None:
+            self._broadcast_raw(message, exclude=conn.id, droppable=True)
+            return
+
+        self.aoi_culled += len(self.players) - len(nearby)
+        for player_id in nearby:
+            if player_id != conn.id:
+                recipient = self.players[player_id]["connection"]
+                self._queue(recipient, message.frame(recipient.encoding), droppable=True)
+
+    def _read_datagrams(self):
+        while True:
+            try:
+                n, addr = self.udp.recvfrom_into(self._datagram)
+            except OSError:
+                return
+            try:
+                kind, token, seq, body = decode_datagram(self._datagram[:n])
+            except ProtocolError:
+                continue
+            conn = self._udp_tokens.get(token)
+            if conn is None or conn.id not in self.players:
+                continue
+
+            if conn.udp_addr != addr:
+                # First datagram (or the client's NAT mapping moved): answer over TCP
+                # so the client knows it can switch transforms to UDP.
+                conn.udp_addr = addr
+                self._queue(conn, encode_payload({"object": "udp_ready"}, conn.encoding))
+
+            if kind == DGRAM_PLAYER:
+                try:
+                    self._receive_state(conn, seq, body)
+                except Exception as e:
+                    print(e)
+
+    # Ticking ---------------------------------------------------------------
+    def _broadcast_snapshots(self):
+        """Send each client one batched update of every other player that moved this tick."""
+        self.tick += 1
+        world = {int(player_id): info["state"] for player_id, info in self.players.items()}
+        for player_id, info in self.players.items():
+            fields = self.state_codec.to_fields(info["state"], FIELD_POSITION | FIELD_ROTATION)
+            self.lag_comp.record(self.tick, player_id, fields["position"], fields["rotation"])
+        for info in list(self.players.values()):
+            conn = info["connection"]
+            if conn.state_codec:
+                self._send_state_snapshot(conn, world)
+
+        changed = []
+        for player_id, info in self.players.items():
+            if info["dirty"]:
+                info["dirty"] = False
+                changed.append(
+                    {
+                        "id": player_id,
+                        "position": info["position"],
+                        "rotation": info["rotation"],
+                        "health": info["health"],
+                        "gun": info["gun"],
+                        "velocity": info["velocity"],
+                    }
+                )
+
+        if changed:
+            shared = {}
+            changed_ids = {state["id"] for state in changed}
+            for player_id, info in list(self.players.items()):
+                if info["connection"].state_codec:
+                    continue
+                if player_id in changed_ids:
+                    states = [state for state in changed if state["id"] != player_id]
+                    if not states:
+                        continue
+                    body = dump_payload({"object": "snapshot", "tick": self.tick, "players": states}, info["connection"].encoding)
+                else:
+                    # Recipients that didn't move themselves all get the same snapshot per encoding
+                    encoding = info["connection"].encoding
+                    if encoding not in shared:
+                        shared[encoding] = dump_payload({"object": "snapshot", "tick": self.tick, "players": changed}, encoding)
+                    body = shared[encoding]
+                self._send_snapshot(info["connection"], body)
+
+        self.stats.end_tick()
+
+    def _send_state_snapshot(self, conn: ClientConnection, world: dict):
+        """Delta-encode everyone else against the last snapshot ``conn`` acknowledged."""
+        others = {player_id: q for player_id, q in world.items() if player_id != int(conn.id)}
+        baseline = conn.sent_snapshots.get(conn.acked_snapshot)
+        body = self.state_codec.encode_snapshot(others, baseline, conn.acked_snapshot or 0, conn.last_state_seq or 0)
+        if len(body) == SNAPSHOT_HEADER.size and conn.acked_state_seq == conn.last_state_seq:
+            # Nothing changed and no new state of theirs to acknowledge
+            return
+        conn.sent_snapshots.put(self.tick, others)
+        if self._send_snapshot(conn, body):
+            conn.acked_state_seq = conn.last_state_seq
+
+    def _send_snapshot(self, conn: ClientConnection, body: bytes) -> bool:
+        if conn.udp_addr is not None:
+            self._send_datagram(conn, DGRAM_SNAPSHOT, self.tick, body)
+            return True
+        if conn.state_codec:
+            # Delta snapshots heal themselves (an unacked one is never used as a baseline), so they can be shed
+            return self._queue(conn, encode_frame(SEQ.pack(self.tick) + body, KIND_SNAPSHOT), droppable=True)
+        return self._queue(conn, frame_body(body))
+
+    # Writing ---------------------------------------------------------------
+    def _broadcast(self, payload: dict, exclude: str | None = None):
+        self._broadcast_raw(EncodedMessage(payload), exclude)
+
+    def _broadcast_raw(self, message: EncodedMessage, exclude: str | None = None, droppable: bool = False):
+        for player_id, player_info in list(self.players.items()):
+            if player_id != exclude:
+                conn = player_info["connection"]
+                self._queue(conn, message.frame(conn.encoding), droppable)
+
+    def _send_datagram(self, conn: ClientConnection, kind: int, seq: int, body: bytes):
+        data = encode_datagram(kind, 0, seq, body)
+        self.stats.count(len(data))
+        try:
+            self.udp.sendto(data, conn.udp_addr)
+        except (BlockingIOError, OSError):
+            pass
+
+    def _queue(self, conn: ClientConnection, data: bytes, droppable: bool = False) -> bool:
+        """Queue a frame for ``conn``; droppable frames are refused while its queue is over the limit."""
+        had_backlog = bool(conn.outbound)
+        dropped_before = conn.outbound.dropped
+        queued = conn.outbound.push(data, droppable)
+        self.outbound_dropped += conn.outbound.dropped - dropped_before
+        if not queued:
+            return False
+        self.stats.count(len(data))
+        if not had_backlog:
+            self._flush(conn)
+        return True
+
+    def _flush(self, conn: ClientConnection):
+        try:
+            conn.outbound.flush(conn.socket.send)
+        except OSError:
+            self._drop(conn)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.outbound else 0)
+        try:
+            self.selector.modify(conn.socket, events, conn)
+        except (KeyError, ValueError):
+            pass
 
-        # Start thread to receive messages from client
-        msg_thread = threading.Thread(target=handle_messages, args=(new_id,), daemon=True)
-        msg_thread.start()
 
-        print(f"New connection from {addr}, assigned ID: {new_id}...")
+def main(
+    mode: str = SERVER_MODE,
+    addr: str = ADDR,
+    port: int = PORT,
+    max_players: int = MAX_PLAYERS,
+    tick_rate: float = TICK_RATE,
+    aoi_radius: float | None = AOI_RADIUS,
+):
+    if mode == "threaded":
+        run_threaded(addr, port, max_players)
+        return
+    EventLoopServer(addr, port, max_players, tick_rate, aoi_radius).serve_forever()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=SERVER_MODES, default=SERVER_MODE)
+    parser.add_argument("--addr", default=ADDR)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-players", type=int, default=MAX_PLAYERS)
+    parser.add_argument("--tick-rate", type=float, default=TICK_RATE, help="snapshot broadcasts per second (eventloop mode)")
+    parser.add_argument("--aoi-radius", type=float, default=AOI_RADIUS, help="particle relay radius, 0 to relay to everyone (eventloop mode)")
+    args = parser.parse_args()
     try:
-        main()
+        main(args.mode, args.addr, args.port, args.max_players, args.tick_rate, args.aoi_radius or None)
     except (KeyboardInterrupt, SystemExit):
         pass
     finally:
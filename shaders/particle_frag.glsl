@@ -0,0 +1,16 @@
+#version 140
+
+in vec4 color;
+in vec2 uv;
+
+out vec4 p3d_FragColor;
+
+uniform sampler2D p3d_Texture0;
+uniform vec4 p3d_ColorScale;
+
+void main()
+{
+    p3d_FragColor = texture(p3d_Texture0, uv) * p3d_ColorScale * color;
+    if (p3d_FragColor.a <= 0.0)
+        discard;
+}
@@ -0,0 +1,32 @@
+#version 140
+
+// One instance per particle. particleData holds two texels per particle:
+// (x, y, z, size) then (alpha, rotation about y, 0, 0), in instance order.
+
+in vec4 p3d_Vertex;
+in vec4 p3d_Color;
+in vec2 p3d_MultiTexCoord0;
+
+out vec4 color;
+out vec2 uv;
+
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform sampler2D particleData;
+
+void main()
+{
+    int width = textureSize(particleData, 0).x;
+    int i = gl_InstanceID * 2;
+    ivec2 texel = ivec2(i % width, i / width);
+    vec4 placement = texelFetch(particleData, texel, 0);
+    vec4 look = texelFetch(particleData, texel + ivec2(1, 0), 0);
+
+    float s = sin(look.y);
+    float c = cos(look.y);
+    vec3 v = p3d_Vertex.xyz * placement.w;
+    v = vec3(c * v.x + s * v.z, v.y, c * v.z - s * v.x);
+
+    gl_Position = p3d_ModelViewProjectionMatrix * vec4(placement.xyz + v, 1.0);
+    color = vec4(p3d_Color.rgb, p3d_Color.a * look.x);
+    uv = p3d_MultiTexCoord0;
+}
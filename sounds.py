@@ -0,0 +1,119 @@
+"""
+Pooled sound voices.
+
+Guns, enemies and abilities used to hold their own ``Audio`` entities, and
+the game made throwaway ones at startup just to preload the clips, which
+is the burst of noise on launch. ``sound_manager`` loads each clip once;
+Panda3D's audio manager keeps the decoded data and shares it between every
+voice of that clip. A clip gets up to ``VOICE_LIMITS`` voices (default
+``DEFAULT_VOICES``); when they are all playing, the one that started
+first is cut off and restarted. No more than ``MAX_VOICES`` play at once.
+
+Sounds given a position are faded with distance from the camera, from
+full volume at ``FULL_VOLUME_DISTANCE`` to silence at ``MAX_DISTANCE``,
+and those further away are not played at all.
+"""
+
+from time import perf_counter
+
+from panda3d.core import AudioSound, Filename
+from ursina import *
+
+MAX_VOICES = 24
+DEFAULT_VOICES = 3
+VOICE_LIMITS = {
+    "pistol": 6,  # every enemy fires it
+    "minigun": 4,
+    "destroyed": 2,
+    "fall": 1,
+    "rope": 1,
+    "dash": 1,
+}
+FULL_VOLUME_DISTANCE = 20
+MAX_DISTANCE = 120
+AUDIO_EXTENSIONS = (".wav", ".ogg", ".mp3")
+
+
+class Voice:
+    def __init__(self, sound):
+        self.sound = sound
+        self.started = 0
+
+    @property
+    def playing(self):
+        return self.sound.status() == AudioSound.PLAYING
+
+
+class SoundManager:
+    """Each clip loaded once, played through a bounded pool of voices."""
+
+    def __init__(self, listener = None):
+        self.listener = listener  # entity the distances are measured from; the camera if None
+        self.voices = {}  # clip: [Voice]
+        self.paths = {}
+        self.culled = 0
+        self.stolen = 0
+
+    def _path(self, clip):
+        path = self.paths.get(clip)
+        if path is None:
+            for extension in AUDIO_EXTENSIONS:
+                path = next(application.asset_folder.glob(f"**/{clip}{extension}"), None)
+                if path is not None:
+                    break
+            else:
+                raise FileNotFoundError(f"no audio clip named {clip}")
+            self.paths[clip] = path
+        return path
+
+    def _voice(self, clip):
+        voices = self.voices.setdefault(clip, [])
+        for voice in voices:
+            if not voice.playing:
+                return voice
+        if len(voices) < VOICE_LIMITS.get(clip, DEFAULT_VOICES) and self.playing() < MAX_VOICES:
+            voice = Voice(base.loader.loadSfx(Filename.fromOsSpecific(str(self._path(clip)))))
+            voices.append(voice)
+            return voice
+        if not voices:
+            return None
+        self.stolen += 1
+        voice = min(voices, key = lambda v: v.started)
+        voice.sound.stop()
+        return voice
+
+    def preload(self, clips):
+        """Load clips, and make one voice each, without playing anything."""
+        for clip in clips:
+            if not self.voices.get(clip):
+                self.voices[clip] = [Voice(base.loader.loadSfx(Filename.fromOsSpecific(str(self._path(clip)))))]
+
+    def playing(self):
+        return sum(voice.playing for voices in self.voices.values() for voice in voices)
+
+    def play(self, clip, volume = 1, pitch = 1, position = None):
+        """Play a clip, faded by its distance when a position is given; returns the voice or None if culled."""
+        if position is not None:
+            listener = self.listener if self.listener is not None else camera
+            volume *= self.attenuation(distance(listener.world_position, position))
+            if volume <= 0:
+                self.culled += 1
+                return None
+
+        voice = self._voice(clip)
+        if voice is None:
+            return None
+        voice.sound.setVolume(volume)
+        voice.sound.setPlayRate(pitch)
+        voice.sound.play()
+        voice.started = perf_counter()
+        return voice
+
+    @staticmethod
+    def attenuation(dist):
+        if dist <= FULL_VOLUME_DISTANCE:
+            return 1
+        return max(0, 1 - (dist - FULL_VOLUME_DISTANCE) / (MAX_DISTANCE - FULL_VOLUME_DISTANCE))
+
+
+sound_manager = SoundManager()
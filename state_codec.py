@@ -0,0 +1,207 @@
+"""
+Compact binary encoding of player state.
+
+A state is quantized to a tuple of ints
+``(x, y, z, rotation, health, gun, vx, vy, vz)``: positions in steps of
+``precision`` world units, yaw packed into 16 bits, health in hundredths and
+velocity in steps of ``VELOCITY_PRECISION`` units per second. Updates carry a field mask and only the fields that
+differ from a baseline the receiver has acknowledged, so a player standing
+still costs a few header bytes.
+
+Client -> server state body:  ack, baseline seq, mask, changed fields
+Server -> client snapshot:    ack, baseline seq, count, then per player
+                              id, mask, changed fields
+"""
+
+import struct
+from collections import OrderedDict
+
+DEFAULT_PRECISION = 1 / 64
+VELOCITY_PRECISION = 1 / 64  # units/s per step; 16 bits covers +-512 units/s
+
+FIELD_POSITION = 0x01
+FIELD_ROTATION = 0x02
+FIELD_HEALTH = 0x04
+FIELD_GUN = 0x08
+FIELD_VELOCITY = 0x10
+ALL_FIELDS = FIELD_POSITION | FIELD_ROTATION | FIELD_HEALTH | FIELD_GUN | FIELD_VELOCITY
+
+SEQ = struct.Struct("!I")
+STATE_HEADER = struct.Struct("!IIB")  # ack, baseline seq, field mask
+SNAPSHOT_HEADER = struct.Struct("!IIB")  # ack, baseline seq, entry count
+ENTRY_HEADER = struct.Struct("!BB")  # player id, field mask
+
+POSITION = struct.Struct("!iii")
+ROTATION = struct.Struct("!H")
+HEALTH = struct.Struct("!h")
+GUN = struct.Struct("!B")
+VELOCITY = struct.Struct("!hhh")
+
+INT32_MIN, INT32_MAX = -(2 ** 31), 2 ** 31 - 1
+
+
+class SequenceHistory:
+    """The last ``maxlen`` values stored by sequence number."""
+
+    def __init__(self, maxlen: int = 32):
+        self.maxlen = maxlen
+        self._items = OrderedDict()
+
+    def put(self, seq: int, value) -> None:
+        self._items[seq] = value
+        self._items.move_to_end(seq)
+        while len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+
+    def get(self, seq: int | None):
+        if seq is None:
+            return None
+        return self._items.get(seq)
+
+    def __contains__(self, seq) -> bool:
+        return seq in self._items
+
+
+class PlayerStateCodec:
+    def __init__(self, precision: float = DEFAULT_PRECISION):
+        self.precision = precision
+        self._scale = 1 / precision
+
+    # Quantization ----------------------------------------------------------
+    def quantize(self, position, rotation, health, gun, velocity=None) -> tuple:
+        x, y, z = (max(INT32_MIN, min(INT32_MAX, round(float(v) * self._scale))) for v in position)
+        rot = round((float(rotation or 0) % 360) * 65536 / 360) & 0xFFFF
+        vx, vy, vz = (max(-32768, min(32767, round(float(v) / VELOCITY_PRECISION))) for v in (velocity or (0, 0, 0)))
+        return (x, y, z, rot, self._quantize_health(health), int(gun or 0) & 0xFF, vx, vy, vz)
+
+    @staticmethod
+    def _quantize_health(health) -> int:
+        return max(-32768, min(32767, round(float(health or 0) * 100)))
+
+    def with_health(self, q: tuple, health: float) -> tuple:
+        """``q`` with its health replaced."""
+        return q[:4] + (self._quantize_health(health),) + q[5:]
+
+    def to_fields(self, q: tuple, mask: int = ALL_FIELDS) -> dict:
+        """Turn (part of) a quantized state back into message fields."""
+        fields = {}
+        if mask & FIELD_POSITION:
+            fields["position"] = (q[0] * self.precision, q[1] * self.precision, q[2] * self.precision)
+        if mask & FIELD_ROTATION:
+            fields["rotation"] = q[3] * 360 / 65536
+        if mask & FIELD_HEALTH:
+            fields["health"] = q[4] / 100
+        if mask & FIELD_GUN:
+            fields["gun"] = q[5]
+        if mask & FIELD_VELOCITY:
+            fields["velocity"] = (q[6] * VELOCITY_PRECISION, q[7] * VELOCITY_PRECISION, q[8] * VELOCITY_PRECISION)
+        return fields
+
+    @staticmethod
+    def diff(q: tuple, baseline: tuple | None) -> int:
+        if baseline is None:
+            return ALL_FIELDS
+        mask = 0
+        if q[0:3] != baseline[0:3]:
+            mask |= FIELD_POSITION
+        if q[3] != baseline[3]:
+            mask |= FIELD_ROTATION
+        if q[4] != baseline[4]:
+            mask |= FIELD_HEALTH
+        if q[5] != baseline[5]:
+            mask |= FIELD_GUN
+        if q[6:9] != baseline[6:9]:
+            mask |= FIELD_VELOCITY
+        return mask
+
+    # Field packing ---------------------------------------------------------
+    @staticmethod
+    def pack_fields(q: tuple, mask: int) -> bytes:
+        parts = []
+        if mask & FIELD_POSITION:
+            parts.append(POSITION.pack(q[0], q[1], q[2]))
+        if mask & FIELD_ROTATION:
+            parts.append(ROTATION.pack(q[3]))
+        if mask & FIELD_HEALTH:
+            parts.append(HEALTH.pack(q[4]))
+        if mask & FIELD_GUN:
+            parts.append(GUN.pack(q[5]))
+        if mask & FIELD_VELOCITY:
+            parts.append(VELOCITY.pack(q[6], q[7], q[8]))
+        return b"".join(parts)
+
+    @staticmethod
+    def unpack_fields(data, offset: int, mask: int, baseline: tuple | None):
+        """Read the fields in ``mask`` and fill the rest from ``baseline``; returns ``(q, offset)``."""
+        if baseline is None and mask != ALL_FIELDS:
+            raise ValueError("partial state without a baseline")
+        x, y, z, rot, hp, gun, vx, vy, vz = baseline or (0, 0, 0, 0, 0, 0, 0, 0, 0)
+        if mask & FIELD_POSITION:
+            x, y, z = POSITION.unpack_from(data, offset)
+            offset += POSITION.size
+        if mask & FIELD_ROTATION:
+            (rot,) = ROTATION.unpack_from(data, offset)
+            offset += ROTATION.size
+        if mask & FIELD_HEALTH:
+            (hp,) = HEALTH.unpack_from(data, offset)
+            offset += HEALTH.size
+        if mask & FIELD_GUN:
+            (gun,) = GUN.unpack_from(data, offset)
+            offset += GUN.size
+        if mask & FIELD_VELOCITY:
+            vx, vy, vz = VELOCITY.unpack_from(data, offset)
+            offset += VELOCITY.size
+        return (x, y, z, rot, hp, gun, vx, vy, vz), offset
+
+    # Player updates (client -> server) ---------------------------------------
+    def encode_state(self, q: tuple, baseline: tuple | None, baseline_seq: int, ack: int) -> bytes:
+        if baseline is None:
+            baseline_seq = 0
+        mask = self.diff(q, baseline)
+        return STATE_HEADER.pack(ack, baseline_seq, mask) + self.pack_fields(q, mask)
+
+    def decode_state(self, body, history: SequenceHistory):
+        """Returns ``(q, ack)``; raises ``KeyError`` if the baseline is no longer in ``history``."""
+        ack, baseline_seq, mask = STATE_HEADER.unpack_from(body)
+        baseline = None
+        if baseline_seq:
+            baseline = history.get(baseline_seq)
+            if baseline is None:
+                raise KeyError(baseline_seq)
+        q, _ = self.unpack_fields(body, STATE_HEADER.size, mask, baseline)
+        return q, ack
+
+    # Snapshots (server -> client) --------------------------------------------
+    def encode_snapshot(self, world: dict, baseline_world: dict | None, baseline_seq: int, ack: int) -> bytes:
+        """``world`` maps int player ids to quantized states; unchanged players are left out."""
+        if baseline_world is None:
+            baseline_seq = 0
+            baseline_world = {}
+        entries = []
+        for player_id, q in world.items():
+            mask = self.diff(q, baseline_world.get(player_id))
+            if mask:
+                entries.append(ENTRY_HEADER.pack(player_id, mask) + self.pack_fields(q, mask))
+        return SNAPSHOT_HEADER.pack(ack, baseline_seq, len(entries)) + b"".join(entries)
+
+    def decode_snapshot(self, body, history: SequenceHistory):
+        """
+        Returns ``(world, changes, ack)``: the full reconstructed world, a
+        ``{player_id: fields}`` dict of what this snapshot changed, and the
+        sender's ack. Raises ``KeyError`` if the baseline is unknown.
+        """
+        ack, baseline_seq, count = SNAPSHOT_HEADER.unpack_from(body)
+        baseline_world = {}
+        if baseline_seq:
+            baseline_world = history.get(baseline_seq)
+            if baseline_world is None:
+                raise KeyError(baseline_seq)
+        world = dict(baseline_world)
+        changes = {}
+        offset = SNAPSHOT_HEADER.size
+        for _ in range(count):
+            player_id, mask = ENTRY_HEADER.unpack_from(body, offset)
+            q, offset = self.unpack_fields(body, offset + ENTRY_HEADER.size, mask, baseline_world.get(player_id))
+            world[player_id] = q
+            changes[player_id] = self.to_fields(q, mask)
+        return world, changes, ack
@@ -1,31 +1,184 @@
+from array import array
+
+from panda3d.core import Geom, GeomLines, GeomNode, GeomVertexArrayFormat, GeomVertexData, GeomVertexFormat, InternalName, OmniBoundingVolume, TransparencyAttrib
 from ursina import *
 
-class TrailRenderer(Entity):
-    def __init__(self, thickness=10, color=color.white, end_color=color.clear, length=6, **kwargs):
-        super().__init__(**kwargs)
-        self.renderer = Entity(
-            model = Mesh(
-            vertices=[self.world_position for i in range(length)],
-            colors=[lerp(end_color, color, i/length*2) for i in range(length)],
-            mode='line',
-            thickness=thickness,
-            static=False
-            )
-        )
+
+_POINT = 3 * 4  # bytes per vertex position
+_COLOR = 4 * 4  # bytes per vertex colour
+
+
+def _vertex_format():
+    positions = GeomVertexArrayFormat()
+    positions.addColumn(InternalName.getVertex(), 3, Geom.NT_float32, Geom.C_point)
+    colors = GeomVertexArrayFormat()
+    colors.addColumn(InternalName.getColor(), 4, Geom.NT_float32, Geom.C_color)
+    vertex_format = GeomVertexFormat()
+    vertex_format.addArray(positions)
+    vertex_format.addArray(colors)
+    return GeomVertexFormat.registerFormat(vertex_format)
+
+
+class TrailBatch(Entity):
+    """
+    Every trail of one thickness and length in a single line mesh, drawn
+    in one call. Each trail owns a slot of ``length`` points in one vertex
+    array, oldest first. Every ``update_step`` all slots take their trail's
+    newest position, and only the rows between the first and last slot that
+    changed are written back to the mesh.
+    """
+
+    vertex_format = None
+
+    def __init__(self, thickness, length, capacity = 64, update_step = .025):
+        super().__init__()
+        if TrailBatch.vertex_format is None:
+            TrailBatch.vertex_format = _vertex_format()
+
+        self.length = length
+        self.update_step = update_step
         self._t = 0
-        self.update_step = .025
+        self.trails = {}  # slot: TrailRenderer
+        self.free = []
+        self.capacity = 0
+        self.positions = array("f")
+
+        self.vdata = GeomVertexData("trails", TrailBatch.vertex_format, Geom.UH_dynamic)
+        self.lines = GeomLines(Geom.UH_static)
+        self.geom = Geom(self.vdata)
+        self.geom.addPrimitive(self.lines)
+        geom_node = GeomNode("trails")
+        geom_node.addGeom(self.geom)
+        # Trails go everywhere; never cull against stale vertex bounds
+        geom_node.setBounds(OmniBoundingVolume())
+        geom_node.setFinal(True)
+        self.attachNewNode(geom_node)
+        self.setRenderModeThickness(thickness)
+        self.setTransparency(TransparencyAttrib.M_alpha)
+
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        length = self.length
+        self.positions.extend(array("f", bytes((capacity - self.capacity) * length * _POINT)))
+        self.vdata.setNumRows(capacity * length)
+        colors = self.vdata.modifyArrayHandle(1)
+        colors.setSubdata(self.capacity * length * _COLOR, (capacity - self.capacity) * length * _COLOR, bytes((capacity - self.capacity) * length * _COLOR))
+        for slot in range(self.capacity, capacity):
+            first = slot * length
+            for i in range(length - 1):
+                self.lines.addVertices(first + i, first + i + 1)
+        self.geom.setPrimitive(0, self.lines)
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+        self._upload(0, capacity)
+
+    def claim(self, trail):
+        if not self.free:
+            self._grow(self.capacity * 2)
+        slot = self.free.pop()
+        self.trails[slot] = trail
+        return slot
+
+    def release(self, slot):
+        if self.trails.pop(slot, None) is not None:
+            self.free.append(slot)
+            self.set_colors(slot, None)
+
+    def collapse(self, slot, position):
+        """Put every point of a slot at ``position``: a fresh trail with no length yet."""
+        first = slot * self.length * 3
+        self.positions[first:first + self.length * 3] = array("f", (position[0], position[1], position[2]) * self.length)
+        self._upload(slot, slot + 1)
+
+    def set_colors(self, slot, colors):
+        """One colour per point, oldest first; None hides the slot."""
+        if colors is None:
+            data = bytes(self.length * _COLOR)
+        else:
+            data = array("f", [c for col in colors for c in (col[0], col[1], col[2], col[3])]).tobytes()
+        self.vdata.modifyArrayHandle(1).setSubdata(slot * self.length * _COLOR, self.length * _COLOR, data)
 
+    def _upload(self, start, end):
+        size = self.length * _POINT
+        data = memoryview(self.positions).cast("B")[start * size:end * size]
+        self.vdata.modifyArrayHandle(0).setSubdata(start * size, (end - start) * size, data.tobytes())
 
     def update(self):
+        if not self.trails:
+            return
         self._t += time.dt
-        if self._t >= self.update_step:
-            self._t = 0
-            self.renderer.model.vertices.pop(0)
-            self.renderer.model.vertices.append(self.world_position)
-            self.renderer.model.generate()
+        if self._t < self.update_step:
+            return
+        self._t = 0
+
+        positions = self.positions
+        stride = self.length * 3
+        for slot, trail in self.trails.items():
+            first = slot * stride
+            x, y, z = trail.world_position
+            positions[first:first + stride - 3] = positions[first + 3:first + stride]
+            positions[first + stride - 3] = x
+            positions[first + stride - 2] = y
+            positions[first + stride - 1] = z
+        self._upload(min(self.trails), max(self.trails) + 1)
+
+
+class TrailManager:
+    """The ``TrailBatch`` for each thickness and length in use, made on first use."""
+
+    def __init__(self):
+        self.batches = {}
+
+    def batch(self, thickness, length):
+        batch = self.batches.get((thickness, length))
+        if batch is None:
+            batch = self.batches[(thickness, length)] = TrailBatch(thickness, length)
+        return batch
+
+
+trail_manager = TrailManager()
+
+
+class TrailRenderer(Entity):
+    """A trail behind its parent, drawn by the shared ``trail_manager`` while it is enabled."""
+
+    batch = None
+    slot = None
+
+    def __init__(self, thickness=10, color=color.white, end_color=color.clear, length=6, **kwargs):
+        super().__init__(**kwargs)
+        self.length = length
+        self.color_start = color
+        self.color_end = end_color
+        self.batch = trail_manager.batch(thickness, length)
+        if self.enabled:
+            self.on_enable()
+
+    def _colors(self):
+        return [lerp(self.color_end, self.color_start, i/self.length*2) for i in range(self.length)]
+
+    def reset(self, color=None, end_color=color.clear):
+        """Collapse the trail onto where it is now, recoloured if a color is given, so it can be reused."""
+        if color is not None:
+            self.color_start = color
+            self.color_end = end_color
+        if self.slot is not None:
+            self.batch.collapse(self.slot, self.world_position)
+            self.batch.set_colors(self.slot, self._colors())
+
+    def on_enable(self):
+        if self.batch is not None and self.slot is None:
+            self.slot = self.batch.claim(self)
+            self.reset()
+
+    def on_disable(self):
+        if self.slot is not None:
+            self.batch.release(self.slot)
+            self.slot = None
 
     def on_destroy(self):
-        destroy(self.renderer)
+        self.on_disable()
 
 
 
@@ -55,4 +208,4 @@ if __name__ == '__main__':
             destroy(pivot)
 
 
-    app.run()
\ No newline at end of file
+    app.run()